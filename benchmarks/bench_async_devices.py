@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scene fan-out to devices behind a network backend
+
+Every device needs 50 ms per backend request (an HTTP or Modbus-TCP round
+trip). The vdSM calls a scene on all of them with one notification, a
+number of times. Reports the time until every device has applied the
+scene, for synchronous devices called directly, synchronous devices on the
+output debouncer's worker threads, and AsyncVdcDevice drivers awaited on
+the host's event loop.
+
+Usage:
+    python benchmarks/bench_async_devices.py [devices] [rounds]
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import AsyncVdcDevice, VdcHost, VdcDevice
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+BACKEND_LATENCY = 0.05
+
+
+class Counter:
+    def __init__(self, expected):
+        self.expected = expected
+        self.count = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def hit(self):
+        with self.lock:
+            self.count += 1
+            if self.count == self.expected:
+                self.done.set()
+
+
+class SyncNetworkDevice(VdcDevice):
+    counter = None
+
+    def call_scene(self, scene, force=False):
+        time.sleep(BACKEND_LATENCY)
+        super().call_scene(scene, force)
+        self.counter.hit()
+
+
+class AsyncNetworkDevice(AsyncVdcDevice):
+    counter = None
+
+    async def call_scene(self, scene, force=False):
+        await asyncio.sleep(BACKEND_LATENCY)
+        await super().call_scene(scene, force)
+        self.counter.hit()
+
+
+def run(mode, count, rounds):
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    device_type = AsyncNetworkDevice if mode == "async" else SyncNetworkDevice
+    if mode == "debounced":
+        host.enable_output_debouncing()
+    devices = [device_type(f"CC{index:030X}C1", f"Device {index}") for index in range(count)]
+    host.add_devices(devices)
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    vdsm.connect()
+    vdsm.wait_announced(count, quiet=0.5, timeout=10)
+
+    dsuids = [device.dsuid for device in devices]
+    timings = []
+    for index in range(rounds):
+        counter = Counter(count)
+        device_type.counter = counter
+        started = time.perf_counter()
+        vdsm.call_scene(dsuids, 5 if index % 2 == 0 else 0)
+        counter.done.wait(count * BACKEND_LATENCY * 2 + 5)
+        timings.append(time.perf_counter() - started)
+
+    vdsm.close()
+    host.stop()
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"callScene to {count} devices, backend {BACKEND_LATENCY * 1000:.0f} ms per request, median of {rounds}")
+    print(f"{'mode':<10} {'all applied ms':>15}")
+    for mode in ("direct", "debounced", "async"):
+        print(f"{mode:<10} {run(mode, count, rounds) * 1000:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: large configuration writes through setProperty
+
+Devices with 64 button inputs receive setProperty requests rewriting the
+group, function and mode of every input (192 values). Each backend commit
+costs 1 ms (one configuration frame to the hardware) and the configuration
+is saved as a JSON file. Reports the round trip of a request when every
+property is committed and saved as it is set, and when the request is
+committed and saved once as a transaction.
+
+Usage:
+    python benchmarks/bench_batched_set_property.py [requests] [inputs]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api.property_paths import PropertySetter
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+COMMIT_LATENCY = 0.001
+
+
+class ConfiguredDevice(VdcDevice):
+    """Device keeping its button input settings in a backend and a file."""
+
+    PROPERTY_SETTERS = {
+        "buttonInputSettings[].group": PropertySetter(int, method="set_button_group", minimum=0, maximum=63),
+        "buttonInputSettings[].function": PropertySetter(int, method="set_button_function", minimum=0, maximum=15),
+        "buttonInputSettings[].mode": PropertySetter(int, method="set_button_mode", minimum=0, maximum=255),
+    }
+    inputs = 64
+
+    def __init__(self, dsuid, name, path):
+        super().__init__(dsuid, name)
+        self.path = path
+        self.settings = [[0, 0, 0] for _ in range(self.inputs)]
+        self.commits = 0
+
+    def set_button_group(self, index, value):
+        self.settings[index][0] = value
+
+    def set_button_function(self, index, value):
+        self.settings[index][1] = value
+
+    def set_button_mode(self, index, value):
+        self.settings[index][2] = value
+
+    def commit_properties(self, changes):
+        time.sleep(COMMIT_LATENCY)
+        self.commits += 1
+
+    def persist_properties(self, changes):
+        with open(self.path, "w") as f:
+            json.dump(self.settings, f)
+
+
+class PerPropertyDevice(ConfiguredDevice):
+    """The same device committing and saving every property as it is set."""
+
+    def set_property(self, name, value):
+        for index, fields in value.items():
+            for field, field_value in fields.items():
+                path = f"{name}.{index}.{field}"
+                super().set_property(path, field_value)
+                self.commit_properties({path: field_value})
+                self.persist_properties({path: field_value})
+
+
+def run(device_type, requests, directory):
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    device = device_type("CC000000000000000000000000000000C1", "Keypad", os.path.join(directory, "keypad.json"))
+    host.add_device(device)
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    vdsm.connect()
+    vdsm.wait_announced(1, quiet=0.2, timeout=10)
+
+    timings = []
+    for round_index in range(requests):
+        settings = {str(index): {"group": (index + round_index) % 64, "function": index % 16,
+                                 "mode": round_index % 256}
+                    for index in range(device.inputs)}
+        started = time.perf_counter()
+        vdsm.set_property(device.dsuid, {"buttonInputSettings": settings})
+        timings.append(time.perf_counter() - started)
+
+    vdsm.close()
+    host.stop()
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, device.commits / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ConfiguredDevice.inputs = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    print(f"setProperty of {ConfiguredDevice.inputs * 3} values, backend commit {COMMIT_LATENCY * 1000:.0f} ms, "
+          f"median of {requests}")
+    print(f"{'mode':<14} {'round trip ms':>14} {'commits/request':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, device_type in (("per property", PerPropertyDevice), ("transaction", ConfiguredDevice)):
+            latency, commits = run(device_type, requests, directory)
+            print(f"{name:<14} {latency:>14.1f} {commits:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
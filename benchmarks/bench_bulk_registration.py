@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: registering and removing many devices one by one vs in bulk
+
+Adds and then removes N devices on a host with a live outbound queue (as
+during a session, writing to a socket pair whose far end is drained and
+discarded) and compares:
+
+    single   add_device / remove_device per device
+    bulk     add_devices / remove_devices for the whole batch
+
+Usage:
+    python benchmarks/bench_bulk_registration.py [devices ...]
+"""
+
+import logging
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api.outbound_queue import OutboundQueue
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+
+def drain(sock):
+    while sock.recv(1 << 16):
+        pass
+
+
+def run(devices, bulk):
+    ours, theirs = socket.socketpair()
+    threading.Thread(target=drain, args=(theirs,), daemon=True).start()
+    host = VdcHost(HOST_DSUID, VDC_DSUID)
+    host.outbound = OutboundQueue(ours)
+    host.outbound.start()
+    host.client_socket = ours
+    host.session_active = True
+    batch = [VdcDevice(f"{index:032X}01", f"Device {index}") for index in range(devices)]
+    dsuids = [device.dsuid for device in batch]
+
+    started = time.perf_counter()
+    if bulk:
+        host.add_devices(batch)
+    else:
+        for device in batch:
+            host.add_device(device)
+    added = time.perf_counter()
+    if bulk:
+        host.remove_devices(dsuids)
+    else:
+        for dsuid in dsuids:
+            host.remove_device(dsuid)
+    removed = time.perf_counter()
+
+    host.outbound.close(flush_timeout=5.0)
+    host.session_active = False
+    ours.close()
+    theirs.close()
+    return added - started, removed - added
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 2000, 10000]
+    logging.basicConfig(level=logging.INFO, stream=open("/dev/null", "w"))
+
+    print("add/remove N devices during a session, INFO logging")
+    print(f"{'devices':>8} {'mode':<7} {'add ms':>9} {'remove ms':>10} {'speedup':>8}")
+    for devices in sizes:
+        single = run(devices, bulk=False)
+        bulk = run(devices, bulk=True)
+        for name, (add, remove) in (("single", single), ("bulk", bulk)):
+            speedup = sum(single) / (add + remove)
+            print(f"{devices:>8} {name:<7} {add * 1000:>9.1f} {remove * 1000:>10.1f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: host startup time with mDNS advertisement
+
+Measures the time from starting a host until it accepts a vdSM connection,
+advertising the service on loopback:
+
+    none     no advertisement
+    sync     zeroconf registration before start() (the former example)
+    async    VdcHost.enable_discovery (registration on a background thread)
+
+The registration time itself is reported by the advertiser's stats.
+Requires zeroconf (pip install ds-vdc-api[discovery]).
+
+Usage:
+    python benchmarks/bench_discovery_startup.py [runs]
+"""
+
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from zeroconf import IPVersion, ServiceInfo, Zeroconf
+
+from ds_vdc_api import VdcHost
+from ds_vdc_api.discovery import SERVICE_TYPE
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+
+def wait_connectable(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.001)
+    raise TimeoutError(f"port {port} not connectable")
+
+
+def run(mode, port):
+    host = VdcHost(HOST_DSUID, VDC_DSUID, port=port, ping_interval=None)
+    zc = info = advertiser = None
+    started = time.perf_counter()
+    if mode == "sync":
+        info = ServiceInfo(SERVICE_TYPE, f"bench sync {port}.{SERVICE_TYPE}",
+                           addresses=[socket.inet_aton("127.0.0.1")], port=port)
+        zc = Zeroconf(interfaces=["127.0.0.1"], ip_version=IPVersion.V4Only)
+        zc.register_service(info)
+    elif mode == "async":
+        advertiser = host.enable_discovery(name=f"bench async {port}", addresses=["127.0.0.1"])
+    host.start(blocking=False)
+    wait_connectable(port)
+    ready = time.perf_counter() - started
+
+    registered = None
+    if advertiser is not None:
+        advertiser.registered.wait(10)
+        registered = advertiser.stats["register_seconds"]
+    host.stop()
+    if zc is not None:
+        zc.unregister_service(info)
+        zc.close()
+    return ready, registered
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    port = 18700
+    print(f"{'mode':<7} {'ready ms':>9} {'registered ms':>14}")
+    for mode in ("none", "sync", "async"):
+        for _ in range(runs):
+            port += 1
+            ready, registered = run(mode, port)
+            registered = f"{registered * 1000:.0f}" if registered is not None else "-"
+            print(f"{mode:<7} {ready * 1000:>9.1f} {registered:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: logging cost of a callScene fan-out to many devices
+
+Calls VdcHost._handle_call_scene for a 500-device scene call with logging
+at INFO level, writing formatted lines to a file, and compares:
+
+    per-device   one f-string INFO line per device (the former behaviour)
+    summary      one rate-limited summary line per call
+    async        summary line, handlers run on a QueueListener thread
+    off          logging at WARNING level
+
+Usage:
+    python benchmarks/bench_fanout_logging.py [iterations] [devices]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api.genericVDC_pb2 import Message, Type
+from ds_vdc_api.log_utils import AsyncLogging
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+host_logger = logging.getLogger("ds_vdc_api.vdc_host")
+
+
+class PerDeviceLoggingHost(VdcHost):
+    """callScene handler logging one line per device, as before."""
+
+    def _handle_call_scene(self, msg):
+        dsuids = msg.vdsm_send_call_scene.dSUID
+        scene = msg.vdsm_send_call_scene.scene
+        force = msg.vdsm_send_call_scene.force
+        devices = self.devices.snapshot()
+        for dsuid in dsuids:
+            device = devices.get(dsuid)
+            if device is not None:
+                started = time.monotonic()
+                device.call_scene(scene, force)
+                self._record_vdc(device, "notifications", started)
+                host_logger.info(f"Called scene {scene} on device {device.name}")
+
+
+def make_host(cls, devices):
+    host = cls(HOST_DSUID, VDC_DSUID)
+    for index in range(devices):
+        host.add_device(VdcDevice(f"{index:032X}01", f"Device {index}"))
+    return host
+
+
+def scene_call(devices):
+    msg = Message()
+    msg.type = Type.VDSM_NOTIFICATION_CALL_SCENE
+    msg.vdsm_send_call_scene.dSUID.extend(f"{index:032X}01" for index in range(devices))
+    msg.vdsm_send_call_scene.scene = 5
+    return msg
+
+
+def timed(host, msg, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        host._handle_call_scene(msg)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    devices = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    root = logging.getLogger()
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root.addHandler(file_handler)
+    root.setLevel(logging.INFO)
+    logging.getLogger("ds_vdc_api.vdc").setLevel(logging.WARNING)  # quiet device setup
+
+    msg = scene_call(devices)
+    legacy = make_host(PerDeviceLoggingHost, devices)
+    current = make_host(VdcHost, devices)
+    # Measure the handler, not the limiter: let every summary line through
+    current.log_throttle.configure("call_scene", rate=1e9, burst=10 ** 9)
+
+    results = [("per-device", timed(legacy, msg, iterations)),
+               ("summary", timed(current, msg, iterations))]
+    with AsyncLogging("ds_vdc_api"):
+        results.append(("async", timed(current, msg, iterations)))
+    root.setLevel(logging.WARNING)
+    results.append(("off", timed(current, msg, iterations)))
+
+    root.removeHandler(file_handler)
+    file_handler.close()
+    os.unlink(path)
+
+    baseline = results[0][1][0]
+    print(f"callScene to {devices} devices, {iterations} calls, INFO level to a file")
+    print(f"{'logging':<12} {'p50 ms':>9} {'p99 ms':>9} {'vs per-device':>14}")
+    for name, (p50, p99) in results:
+        print(f"{name:<12} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f} {baseline / p50:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
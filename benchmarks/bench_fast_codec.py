@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fast codec vs. protobuf runtime for small fixed-shape messages
+
+Before timing anything, the fast codec output is cross-checked against the
+protobuf runtime with the cases of tests/test_fast_codec.py. The script
+exits with an error if any frame differs.
+
+Usage:
+    python benchmarks/bench_fast_codec.py [iterations]
+    PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python python benchmarks/bench_fast_codec.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import fast_codec
+from ds_vdc_api.genericVDC_pb2 import Message, Type, ResultCode
+from tests.test_fast_codec import DSUIDS, cross_check, pb_announce_device, pb_generic_response, pb_pong, pb_vanish
+
+
+def timed(func, args, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(*args)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"protobuf backend: {fast_codec.protobuf_backend()}")
+    try:
+        print(f"cross-check: {cross_check()} cases identical")
+    except AssertionError as e:
+        print(f"MISMATCH {e}")
+        sys.exit(1)
+
+    dsuid = DSUIDS[1]
+    ping = Message()
+    ping.type = Type.VDSM_SEND_PING
+    ping.message_id = 42
+    ping.vdsm_send_ping.dSUID = dsuid
+    ping_data = ping.SerializeToString()
+
+    def pb_decode_ping(data):
+        msg = Message()
+        msg.ParseFromString(data)
+        return msg.message_id, msg.vdsm_send_ping.dSUID
+
+    cases = [
+        ("encode pong", fast_codec.encode_pong, pb_pong, (42, dsuid)),
+        ("encode generic response", fast_codec.encode_generic_response, pb_generic_response,
+         (42, ResultCode.ERR_OK)),
+        ("encode announce device", fast_codec.encode_announce_device, pb_announce_device, (dsuid, dsuid)),
+        ("encode vanish", fast_codec.encode_vanish, pb_vanish, (dsuid,)),
+        ("decode ping", fast_codec.decode_ping, pb_decode_ping, (ping_data,)),
+    ]
+
+    print(f"{'operation':<26} {'fast/s':>12} {'protobuf/s':>12} {'speedup':>8}")
+    for name, fast, reference, args in cases:
+        fast_rate = timed(fast, args, iterations)
+        pb_rate = timed(reference, args, iterations)
+        print(f"{name:<26} {fast_rate:>12,.0f} {pb_rate:>12,.0f} {fast_rate / pb_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Message object pooling on the host hot path
+
+Runs ping, setProperty and getProperty round trips through the VdcHost
+message handlers (parse -> handle -> serialize, no sockets) with and without
+the per-session MessagePool, and reports throughput, tail latency (where
+GC pauses show up) and the number of garbage collector runs.
+
+Results depend heavily on the protobuf backend: with upb/cpp, Message
+objects live outside the Python heap and pooling mostly adds overhead;
+with the pure-Python backend (PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python)
+it saves the construction of the message object graph.
+
+Usage:
+    python benchmarks/bench_message_pool.py [iterations]
+"""
+
+import gc
+import sys
+import time
+from google.protobuf.internal import api_implementation
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api.genericVDC_pb2 import Message, Type
+from ds_vdc_api.message_pool import MessagePool
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+DEVICE_DSUID = "CC000000000000000000000000000000CC"
+
+
+def make_frames():
+    """Build serialized request frames as they would arrive from a vdSM."""
+    frames = []
+
+    msg = Message()
+    msg.type = Type.VDSM_SEND_PING
+    msg.message_id = 1
+    msg.vdsm_send_ping.dSUID = DEVICE_DSUID
+    frames.append(("ping", msg.SerializeToString()))
+
+    msg = Message()
+    msg.type = Type.VDSM_REQUEST_SET_PROPERTY
+    msg.message_id = 2
+    msg.vdsm_request_set_property.dSUID = DEVICE_DSUID
+    elem = msg.vdsm_request_set_property.properties.add()
+    elem.name = "name"
+    elem.value.v_string = "Kitchen"
+    frames.append(("setProperty", msg.SerializeToString()))
+
+    msg = Message()
+    msg.type = Type.VDSM_REQUEST_GET_PROPERTY
+    msg.message_id = 3
+    msg.vdsm_request_get_property.dSUID = DEVICE_DSUID
+    frames.append(("getProperty", msg.SerializeToString()))
+
+    return frames
+
+
+def run(host, data, iterations):
+    """Parse, handle and serialize one request type repeatedly."""
+    pool = host._pool
+    encode = host.message_handler.encode_frame
+
+    clock = time.perf_counter
+    samples = []
+
+    gc.collect()
+    collections_before = sum(stat["collections"] for stat in gc.get_stats())
+    start = clock()
+
+    for _ in range(iterations):
+        t0 = clock()
+        msg = pool.acquire() if pool is not None else Message()
+        msg.ParseFromString(data)
+        response = host._process_message(msg)
+        if isinstance(response, Message):
+            encode(response)
+            host._release_message(response)
+        host._release_message(msg)
+        samples.append(clock() - t0)
+
+    elapsed = clock() - start
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections_before
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99)]
+    return iterations / elapsed, p99, collections
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    host = VdcHost(HOST_DSUID, VDC_DSUID)
+    host.add_device(VdcDevice(DEVICE_DSUID, "Bench Light"))
+
+    print(f"protobuf backend: {api_implementation.Type()}, {iterations} iterations")
+    print(f"{'request':<12} {'mode':<8} {'msgs/s':>12} {'p99 us':>8} {'gc runs':>8}")
+    for name, data in make_frames():
+        for mode in ("plain", "pooled"):
+            host._pool = MessagePool() if mode == "pooled" else None
+            rate, p99, collections = run(host, data, iterations)
+            print(f"{name:<12} {mode:<8} {rate:>12,.0f} {p99 * 1e6:>8.1f} {collections:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a slider burst against a rate-limited backend
+
+A device whose backend takes 100 ms per write (10 writes/s) receives a
+slider burst of setOutputChannelValue notifications at 50 per second.
+Reports, with and without output debouncing, how many writes reached the
+backend and how long after the last notification the final value arrived.
+
+Usage:
+    python benchmarks/bench_output_debounce.py [seconds] [rate]
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+DEVICE_DSUID = "CC000000000000000000000000000000C1"
+
+
+class SlowBackendDevice(VdcDevice):
+    """Device whose backend needs 100 ms per write."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = 0
+        self.last_write = 0.0
+        self.final = threading.Event()
+        self.final_value = None
+
+    def write_channels(self, changes):
+        time.sleep(0.1)
+        self.writes += 1
+        self.last_write = time.monotonic()
+        if changes.get(0) == self.final_value:
+            self.final.set()
+
+
+def run(debounce, seconds, rate):
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    if debounce:
+        host.enable_output_debouncing()
+    device = SlowBackendDevice(DEVICE_DSUID, "Slider")
+    host.add_device(device)
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    vdsm.connect()
+    vdsm.wait_announced(1, quiet=0.5, timeout=5)
+
+    count = int(seconds * rate)
+    device.final_value = float(count % 100 or 100)
+    started = time.monotonic()
+    for index in range(1, count + 1):
+        vdsm.set_output_value([DEVICE_DSUID], float(index % 100 or 100))
+        time.sleep(max(0.0, started + index / rate - time.monotonic()))
+    sent = time.monotonic()
+    device.final.wait(seconds * 20)
+    lag = device.last_write - sent
+
+    metrics = host.output_debouncer.metrics if debounce else None
+    vdsm.close()
+    host.stop()
+    return count, device.writes, lag, metrics
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+
+    print(f"slider burst: {rate:.0f} values/s for {seconds:.0f} s, backend 10 writes/s")
+    print(f"{'mode':<10} {'commands':>9} {'writes':>7} {'coalesced':>10} {'final value lag ms':>19}")
+    for debounce in (False, True):
+        count, writes, lag, metrics = run(debounce, seconds, rate)
+        coalesced = metrics["set_output_value"]["coalesced"] if metrics else 0
+        print(f"{'debounced' if debounce else 'direct':<10} {count:>9} {writes:>7} {coalesced:>10} {lag * 1000:>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
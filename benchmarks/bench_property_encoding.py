@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: direct dict-to-wire property encoding vs. PropertyElement trees
+
+Before timing anything, encode_property_tree() and the getProperty/push
+frame encoders are cross-checked against the protobuf runtime with the
+cases of tests/test_property_encoding.py. The script exits with an error if
+any frame differs.
+
+Usage:
+    python benchmarks/bench_property_encoding.py [iterations]
+    PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python python benchmarks/bench_property_encoding.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import fast_codec
+from tests.test_property_encoding import CASES, DSUID, cross_check, pb_get_property_response, pb_push_property
+
+
+def timed(func, args, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(*args)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"protobuf backend: {fast_codec.protobuf_backend()}")
+    try:
+        print(f"cross-check: {cross_check()} cases identical")
+    except AssertionError as e:
+        print(f"MISMATCH {e}")
+        sys.exit(1)
+
+    device_properties = CASES[-1]
+    cases = [
+        ("getProperty (device)", fast_codec.encode_get_property_response, pb_get_property_response,
+         (42, device_properties)),
+        ("pushProperty (output)", fast_codec.encode_push_property, pb_push_property,
+         (DSUID, {"output": {"value": 42.5}})),
+        ("getProperty (50 keys)", fast_codec.encode_get_property_response, pb_get_property_response,
+         (42, CASES[-2])),
+    ]
+
+    print(f"{'operation':<24} {'direct/s':>12} {'protobuf/s':>12} {'speedup':>8}")
+    for name, fast, reference, args in cases:
+        fast_rate = timed(fast, args, iterations)
+        pb_rate = timed(reference, args, iterations)
+        print(f"{name:<24} {fast_rate:>12,.0f} {pb_rate:>12,.0f} {fast_rate / pb_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
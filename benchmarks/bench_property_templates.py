@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled property templates vs. building the property dict per request
+
+Uses a color light with a realistic vdSD description tree (outputDescription,
+channelDescriptions, buttonInputDescriptions, sensorDescriptions). Before
+timing, the template output is cross-checked against encode_property_tree()
+of the rendered dictionary and against the protobuf runtime, for several
+device states. The script exits with an error if any tree differs.
+
+Usage:
+    python benchmarks/bench_property_templates.py [iterations]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcDevice
+from ds_vdc_api.genericVDC_pb2 import Message
+from ds_vdc_api.property_template import Slot
+from ds_vdc_api.property_tree import build_property_tree, encode_property_tree
+
+
+def channel(index, name, minimum, maximum, resolution):
+    return {"name": name, "channelIndex": index, "min": minimum, "max": maximum,
+            "resolution": resolution}
+
+
+class ColorLight(VdcDevice):
+    PROPERTY_SCHEMA = {
+        "primaryGroup": 1,
+        "outputDescription": {
+            "name": "light", "function": 3, "outputUsage": 0, "variableRamp": True,
+            "maxPower": 9.5, "activeCoolingMode": False,
+        },
+        "outputSettings": {"mode": 2, "pushChanges": True, "groups": {"1": True}},
+        "channelDescriptions": {
+            "brightness": channel(0, "brightness", 0.0, 100.0, 0.4),
+            "hue": channel(1, "hue", 0.0, 360.0, 0.1),
+            "saturation": channel(2, "saturation", 0.0, 100.0, 0.1),
+            "colortemp": channel(3, "colortemp", 100.0, 1000.0, 1.0),
+        },
+        "channelStates": {
+            "brightness": {"value": Slot("brightness")},
+            "hue": {"value": Slot("hue")},
+        },
+        "buttonInputDescriptions": {
+            "0": {"name": "button", "supportsLocalKeyMode": True, "buttonType": 1,
+                  "buttonElementID": 0},
+        },
+        "sensorDescriptions": {
+            "0": {"name": "power", "sensorType": 14, "min": 0.0, "max": 100.0,
+                  "resolution": 0.01, "updateInterval": 5.0},
+        },
+        "sensorStates": {"0": {"value": Slot("power"), "age": Slot("power_age")}},
+    }
+
+    def __init__(self, dsuid, name):
+        super().__init__(dsuid, name, model="RGB Bulb", model_uid="com.example.rgb")
+        self.brightness = 0.0
+        self.hue = 0.0
+        self.power = 0.0
+        self.power_age = None
+
+
+class DictColorLight(ColorLight):
+    """Same properties, built as a dict on every call (the pre-template way)."""
+
+    def get_properties(self, query=None):
+        properties = self.get_basic_properties()
+        properties.update(ColorLight.PROPERTY_SCHEMA)
+        properties["channelStates"] = {"brightness": {"value": self.brightness},
+                                       "hue": {"value": self.hue}}
+        properties["sensorStates"] = {"0": {"value": self.power, "age": self.power_age}}
+        properties["output"] = {"value": self.output_value, "mode": self.output_mode}
+        return properties
+
+
+def pb_tree(properties):
+    response = Message()
+    response.vdc_response_get_property.properties.extend(build_property_tree(properties))
+    return response.vdc_response_get_property.SerializeToString()
+
+
+def cross_check():
+    checked = 0
+    device = ColorLight("AA000000000000000000000000000000AA", "Kitchen")
+    states = [
+        {},
+        {"brightness": 55.5, "hue": 120.0, "output_value": 55.5, "output_mode": 2},
+        {"power": 4.2, "power_age": 1.5, "name": "Küche"},
+    ]
+    for state in states:
+        for attr, value in state.items():
+            setattr(device, attr, value)
+        encoded = device.encode_properties()
+        rendered = device.get_properties()
+        for label, reference in (("dict", encode_property_tree(rendered)), ("protobuf", pb_tree(rendered))):
+            if encoded != reference:
+                print(f"MISMATCH {label} for state {state}")
+                sys.exit(1)
+        checked += 2
+
+    # Custom properties are appended after the template
+    device.set_property("zone", 7)
+    if device.encode_properties() != encode_property_tree(device.get_properties()):
+        print("MISMATCH with custom property")
+        sys.exit(1)
+    return checked + 1
+
+
+def timed(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"cross-check: {cross_check()} cases identical")
+
+    templated = ColorLight("AA000000000000000000000000000000AA", "Kitchen")
+    per_call = DictColorLight("BB000000000000000000000000000000BB", "Kitchen")
+    size = len(templated.encode_properties())
+
+    template_rate = timed(templated.encode_properties, iterations)
+    dict_rate = timed(lambda: encode_property_tree(per_call.get_properties()), iterations)
+    pb_rate = timed(lambda: pb_tree(per_call.get_properties()), iterations // 4)
+
+    print(f"tree size: {size} bytes, template: {templated.property_template()}")
+    print(f"{'encoding':<26} {'trees/s':>12} {'vs dict':>8}")
+    print(f"{'template':<26} {template_rate:>12,.0f} {template_rate / dict_rate:>7.1f}x")
+    print(f"{'dict + direct encoder':<26} {dict_rate:>12,.0f} {1.0:>7.1f}x")
+    print(f"{'dict + protobuf':<26} {pb_rate:>12,.0f} {pb_rate / dict_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
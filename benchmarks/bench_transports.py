@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: session cost over TCP, Unix domain sockets and in-memory pipes
+
+Runs the same host (N devices) behind each transport and measures, from a
+raw client on the same process:
+
+    setup       connect + hello handshake
+    round trip  one ping at a time (p50/p99)
+    pipelined   getProperty requests written in bursts of 256, responses
+                read as they come (requests per second)
+
+Usage:
+    python benchmarks/bench_transports.py [requests] [devices]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api import fast_codec
+from ds_vdc_api.genericVDC_pb2 import Message, Type
+from ds_vdc_api.message_handler import MessageHandler
+from ds_vdc_api.transport import MemoryTransport, TcpTransport, UnixTransport
+from ds_vdc_api.wire import peek_header
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+VDSM_DSUID = "CC000000000000000000000000000000CC"
+BURST = 256
+
+
+def frame(msg):
+    return MessageHandler.encode_frame(msg)
+
+
+def hello():
+    msg = Message()
+    msg.type = Type.VDSM_REQUEST_HELLO
+    msg.message_id = 1
+    msg.vdsm_request_hello.dSUID = VDSM_DSUID
+    msg.vdsm_request_hello.api_version = 3
+    return frame(msg)
+
+
+def get_property(message_id, dsuid):
+    msg = Message()
+    msg.type = Type.VDSM_REQUEST_GET_PROPERTY
+    msg.message_id = message_id
+    msg.vdsm_request_get_property.dSUID = dsuid
+    msg.vdsm_request_get_property.query.add().name = "name"
+    return frame(msg)
+
+
+def wait_for(conn, wanted):
+    """Read frames (acknowledging announcements) until one of the wanted type arrives."""
+    while True:
+        data = MessageHandler.receive_frame(conn)
+        if data is None:
+            raise ConnectionError("closed")
+        msg_type, message_id = peek_header(data)
+        if msg_type in (Type.VDC_SEND_ANNOUNCE_DEVICE, Type.VDC_SEND_ANNOUNCE_VDC):
+            conn.sendall(fast_codec.encode_generic_response(message_id))
+        elif msg_type == wanted:
+            return
+
+
+def run(transport, requests, devices):
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    host.add_devices(VdcDevice(f"{index:032X}01", f"Device {index}") for index in range(devices))
+    host.start(blocking=False)
+
+    started = time.perf_counter()
+    conn = transport.connect(5.0)
+    conn.sendall(hello())
+    wait_for(conn, Type.VDC_RESPONSE_HELLO)
+    setup = time.perf_counter() - started
+    time.sleep(0.5)  # let the announce burst pass
+
+    ping = Message()
+    ping.type = Type.VDSM_SEND_PING
+    ping.vdsm_send_ping.dSUID = HOST_DSUID
+    ping = frame(ping)
+    samples = []
+    for _ in range(min(requests, 2000)):
+        started = time.perf_counter()
+        conn.sendall(ping)
+        wait_for(conn, Type.VDC_SEND_PONG)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+
+    frames = [get_property(index + 2, f"{index % devices:032X}01") for index in range(requests)]
+    bursts = [b''.join(frames[i:i + BURST]) for i in range(0, len(frames), BURST)]
+    done = threading.Event()
+
+    def reader():
+        received = 0
+        while received < requests:
+            data = MessageHandler.receive_frame(conn)
+            if data is None:
+                break
+            if peek_header(data)[0] == Type.VDC_RESPONSE_GET_PROPERTY:
+                received += 1
+        done.set()
+
+    thread = threading.Thread(target=reader, daemon=True)
+    started = time.perf_counter()
+    thread.start()
+    for burst in bursts:
+        conn.sendall(burst)
+    done.wait(60)
+    rate = requests / (time.perf_counter() - started)
+
+    conn.close()
+    host.stop()
+    return setup, samples[len(samples) // 2], samples[int(len(samples) * 0.99)], rate
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    devices = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    path = os.path.join(tempfile.mkdtemp(), "vdc.sock")
+    transports = [("tcp", TcpTransport("127.0.0.1", 0)), ("unix", UnixTransport(path)),
+                  ("memory", MemoryTransport())]
+
+    print(f"{devices} devices, {requests} pipelined getProperty requests")
+    print(f"{'transport':<10} {'setup ms':>9} {'rtt p50 us':>11} {'rtt p99 us':>11} {'req/s':>9}")
+    for name, transport in transports:
+        setup, p50, p99, rate = run(transport, requests, devices)
+        print(f"{name:<10} {setup * 1000:>9.2f} {p50 * 1e6:>11.0f} {p99 * 1e6:>11.0f} {rate:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
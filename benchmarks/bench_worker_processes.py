@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: protocol latency next to CPU-heavy drivers
+
+Devices whose driver spends 5 ms of Python CPU time on every command (a
+protocol decoder, a vendor SDK) receive a callScene every 10 ms. Meanwhile
+the vdSM sends pings and getProperty requests one at a time. Reports their
+round trips with the drivers in the host process (debounced, so the
+dispatch thread itself stays free) and in a worker process.
+
+Usage:
+    python benchmarks/bench_worker_processes.py [seconds] [devices]
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ds_vdc_api import VdcHost, VdcDevice
+from ds_vdc_api.device_config import DeviceSpec
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+CPU_PER_COMMAND = 0.005
+
+
+class DecoderDevice(VdcDevice):
+    """Driver burning CPU on every scene call."""
+
+    def call_scene(self, scene, force=False):
+        deadline = time.thread_time() + CPU_PER_COMMAND
+        while time.thread_time() < deadline:
+            pass
+        super().call_scene(scene, force)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def run(isolated, seconds, count):
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    specs = [DeviceSpec(f"CC{index:030X}C1", f"Decoder {index}") for index in range(count)]
+    host.start(blocking=False)
+    if isolated:
+        host.add_worker_group(DecoderDevice, specs)
+    else:
+        host.enable_output_debouncing()
+        host.add_devices([spec.build(DecoderDevice) for spec in specs])
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    vdsm.connect()
+    vdsm.wait_announced(count, quiet=0.5, timeout=10)
+    dsuids = [spec.dsuid for spec in specs]
+
+    stop = threading.Event()
+
+    def load():
+        index = 0
+        while not stop.is_set():
+            vdsm.call_scene([dsuids[index % count]], 5)
+            index += 1
+            time.sleep(0.01)
+
+    loader = threading.Thread(target=load, daemon=True)
+    loader.start()
+    time.sleep(0.5)
+
+    pings, reads = [], []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        vdsm.ping()
+        pings.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        vdsm.get_property(dsuids[0])
+        reads.append(time.perf_counter() - started)
+        time.sleep(0.002)
+
+    stop.set()
+    loader.join()
+    vdsm.close()
+    host.stop()
+    return percentiles(pings), percentiles(reads)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print(f"{count} drivers, {CPU_PER_COMMAND * 1000:.0f} ms CPU per command, a command every 10 ms")
+    print(f"{'drivers':<12} {'ping p50 ms':>12} {'ping p99 ms':>12} {'getProp p50':>12} {'getProp p99':>12}")
+    for isolated in (False, True):
+        (ping50, ping99), (read50, read99) = run(isolated, seconds, count)
+        name = "worker" if isolated else "in-process"
+        print(f"{name:<12} {ping50:>12.2f} {ping99:>12.2f} {read50:>12.2f} {read99:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,18 @@ integrations with the digitalSTROM system.
 """
 
 from .vdc_host import VdcHost
+from .vdc import Vdc
 from .vdc_device import VdcDevice
+from .async_device import AsyncVdcDevice
 from .message_handler import MessageHandler
 from .property_tree import PropertyElement, PropertyValue, build_property_tree
 
 __version__ = "1.0.0"
 __all__ = [
     "VdcHost",
+    "Vdc",
     "VdcDevice", 
+    "AsyncVdcDevice",
     "MessageHandler",
     "PropertyElement",
     "PropertyValue",
@@ -0,0 +1,464 @@
+"""
+Async device drivers - coroutine device hooks awaited on a host event loop
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from .debounce import KINDS
+from .log_utils import LogThrottle
+from .metrics import LatencyStats
+from .vdc_device import DEFAULT_SCENE_VALUES, VdcDevice
+
+
+logger = logging.getLogger(__name__)
+
+# Command kind of setProperty requests written through write_properties
+KIND_PROPERTIES = "write_properties"
+
+
+class AsyncVdcDevice(VdcDevice):
+    """
+    Virtual device whose command hooks are coroutines.
+
+    Drivers for network backends (HTTP, MQTT, Modbus-TCP, ...) override the
+    ``async def`` hooks of this class and await their I/O instead of
+    blocking a host thread. The host awaits them on its event loop (see
+    AsyncCommandRunner): the commands of a device run one at a time in
+    arrival order, each bounded by COMMAND_TIMEOUT, and a newer applied
+    output value or dim command for the same channel cancels the previous
+    one while it is still waiting or running. The cancelled hook sees
+    asyncio.CancelledError at its current await; it may clean up but should
+    let the error propagate. The next command starts only after it returned.
+
+    set_property stays synchronous, as it only updates the in-memory
+    properties (polling and device configuration use it). setProperty
+    requests of the vdSM are applied by the write_properties coroutine,
+    committed to the backend by awaiting commit_properties, and answered
+    when it completes.
+    """
+
+    # Seconds a command may run before it is cancelled (None: the host's default)
+    COMMAND_TIMEOUT: Optional[float] = None
+
+    async def call_scene(self, scene: int, force: bool = False) -> None:  # type: ignore[override]
+        """
+        Call a scene on this device.
+
+        Args:
+            scene: Scene number (0-126)
+            force: Force execution even if device has local priority
+        """
+        value = DEFAULT_SCENE_VALUES.get(scene)
+        if value is not None:
+            await self.set_output_value(value)
+
+    async def set_output_value(self, value: float, apply_now: bool = True) -> None:  # type: ignore[override]
+        """
+        Set the output channel value.
+
+        Args:
+            value: Output value (typically 0.0-100.0)
+            apply_now: Apply immediately (True) or stage for later (False)
+        """
+        await self.set_channel_value(0, value, apply_now)
+
+    async def set_channel_value(self, index: int, value: float,  # type: ignore[override]
+                                apply_now: bool = True) -> None:
+        """
+        Set the value of an output channel (see VdcDevice.set_channel_value).
+
+        Args:
+            index: Channel index (see CHANNELS)
+            value: New channel value, clamped to the channel range
+            apply_now: Apply all staged values now (True) or stage this one (False)
+        """
+        self.channels.stage(index, value)
+        if apply_now:
+            await self.apply_channels()
+
+    async def apply_channels(self) -> Dict[int, float]:  # type: ignore[override]
+        """
+        Commit all staged channel values with one write_channels call.
+
+        The values become current only after write_channels returned; if it
+        raises or is cancelled, the staged values are dropped.
+
+        Returns:
+            Dictionary of the committed channel values by index (empty if nothing was staged)
+        """
+        changes = self.channels.take_staged()
+        if changes:
+            await self.write_channels(changes)
+            self.channels.commit(changes)
+        return changes
+
+    async def write_channels(self, changes: Dict[int, float]) -> None:  # type: ignore[override]
+        """
+        Write changed channel values to the backend.
+
+        Override this method to implement the device backend.
+
+        Args:
+            changes: Dictionary mapping channel index to new value
+        """
+        pass
+
+    async def dim_channel(self, mode: int, channel: int = 0) -> None:  # type: ignore[override]
+        """
+        Start/stop dimming a channel.
+
+        Args:
+            mode: Dim mode (0=stop, 1=up, -1=down)
+            channel: Channel number (default: 0)
+        """
+        value = self._dim_step(mode)
+        if value is not None:
+            await self.set_output_value(value)
+
+    async def identify(self) -> None:  # type: ignore[override]
+        """Identify the device (e.g., blink, beep)."""
+        pass
+
+    async def write_properties(self, properties: Dict[str, Any]) -> Dict[str, Any]:  # type: ignore[override]
+        """
+        Apply a setProperty request from the vdSM as one transaction.
+
+        Like VdcDevice.write_properties, but the request is committed by
+        awaiting commit_properties, and output values by awaiting
+        apply_channels. The written paths are also restored if the request
+        is cancelled while apply_channels is awaited, and the values they
+        replaced are committed again in either case.
+
+        Args:
+            properties: Nested property dictionary
+
+        Returns:
+            Dictionary of the written values by property path
+
+        Raises:
+            PropertyPathError: If a path is unknown or a value invalid
+        """
+        writes, custom_writes, changes = self._plan_properties(properties)
+        if changes:
+            previous = self._previous_properties(writes, custom_writes)
+            await self.commit_properties(changes)
+            rollback = None
+            try:
+                rollback = self._apply_properties(properties, writes, custom_writes)
+                await self.apply_channels()
+            except BaseException:
+                if rollback is not None:
+                    rollback()
+                try:
+                    if previous:
+                        await self.commit_properties(previous)
+                except Exception as e:
+                    logger.error(f"Could not restore the backend of {self.name}: {e}")
+                raise
+            self.persist_properties(changes)
+        return changes
+
+    def _settle_channels(self) -> None:
+        """Make an output value written by set_property current (in memory only, like set_property)."""
+        value = self.channels.unstage(0)
+        if value is not None:
+            self.channels.commit({0: value})
+
+    async def commit_properties(self, changes: Dict[str, Any]) -> None:  # type: ignore[override]
+        """
+        Write changed properties to the backend.
+
+        Override this method to push configuration to the device; see
+        VdcDevice.commit_properties.
+
+        Args:
+            changes: Dictionary mapping property path to new value
+        """
+        pass
+
+    def __repr__(self) -> str:
+        return f"AsyncVdcDevice(dsuid={self.dsuid}, name={self.name}, class={self.device_class})"
+
+
+class _Entry:
+    """One submitted command; lives on the event loop until its task finished."""
+
+    __slots__ = ("device", "kind", "key", "func", "args", "coalesce", "queued", "result", "queue",
+                 "prev", "task", "started", "replaced")
+
+    def __init__(self, device: VdcDevice, kind: str, key: Hashable, func: Callable[..., Any],
+                 args: Tuple[Any, ...], coalesce: bool, queued: float, result: concurrent.futures.Future):
+        self.device = device
+        self.kind = kind
+        self.key = key
+        self.func = func
+        self.args = args
+        self.coalesce = coalesce
+        self.queued = queued
+        self.result = result
+        self.queue: List["_Entry"] = []
+        self.prev: Optional["_Entry"] = None
+        self.task: Optional[asyncio.Task] = None
+        self.started = False
+        self.replaced = False
+
+
+class AsyncCommandRunner:
+    """
+    Run device commands on an asyncio event loop in the ``vdc-async`` thread.
+
+    AsyncVdcDevice hooks are awaited on the loop, so any number of devices
+    wait for their backends concurrently without a thread each. Commands of
+    other devices are adapted by calling them on a thread pool from the same
+    loop. Per device, commands run one at a time in arrival order.
+
+    Each command is bounded by the device's COMMAND_TIMEOUT (or the runner
+    default). A timed out coroutine is cancelled; a timed out synchronous
+    call cannot be interrupted, so its command fails but the device stays
+    busy until the call returns.
+
+    A coalescable command (an applied output value, a dim command) cancels
+    the previous command of the same kind and key (channel) as long as only
+    coalescable commands of that kind lie in between, and takes its turn
+    once the cancelled command has finished. Synchronous calls are only
+    replaced while they are still waiting.
+    """
+
+    def __init__(self, timeout: float = 10.0, executor_workers: int = 8,
+                 on_done: Optional[Callable[[VdcDevice, float], None]] = None):
+        """
+        Initialize the runner (call start to run it).
+
+        Args:
+            timeout: Default seconds a command may take
+            executor_workers: Threads running the commands of synchronous devices
+            on_done: Called with (device, start time) after each executed command
+                     (not for property writes, which are answered as requests)
+        """
+        self.timeout = timeout
+        self.executor_workers = executor_workers
+        self.on_done = on_done
+        self.latency = LatencyStats()
+        self.stats: Dict[str, Dict[str, int]] = {kind: {"submitted": 0, "cancelled": 0, "executed": 0,
+                                                        "errors": 0, "timeouts": 0}
+                                                 for kind in KINDS + (KIND_PROPERTIES,)}
+        self.log_throttle = LogThrottle(logger)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._queues: Dict[str, List[_Entry]] = {}  # event loop only
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """Commands submitted but not finished."""
+        return self._pending
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Counters per command kind, pending commands and actuation latency.
+
+        ``cancelled`` counts commands replaced by a later one (or dropped on
+        stop); ``latency`` is the time from submitting a command to its
+        completion.
+        """
+        with self._cond:
+            stats: Dict[str, Any] = {kind: dict(counters) for kind, counters in self.stats.items()}
+            stats["pending"] = self._pending
+        stats["latency"] = self.latency.snapshot()
+        return stats
+
+    def start(self) -> None:
+        """Start the event loop thread (no-op if already running)."""
+        if self._thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(self.executor_workers, thread_name_prefix="vdc-sync")
+        self._thread = threading.Thread(target=self._run, name="vdc-async", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Stop the event loop after the pending commands have finished.
+
+        Args:
+            timeout: Seconds to wait for pending commands; the rest is cancelled
+        """
+        thread, loop = self._thread, self.loop
+        if thread is None or loop is None:
+            return
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+        self.loop = None
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), loop).result(
+                max(0.0, deadline - time.monotonic()) + 1.0)
+        except Exception as e:
+            logger.warning(f"Cancelling pending device commands failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def submit(self, device: VdcDevice, kind: str, key: Hashable, func: Callable[..., Any],
+               *args: Any, coalesce: bool = False) -> concurrent.futures.Future:
+        """
+        Queue a command for a device; thread-safe.
+
+        Args:
+            device: Target device
+            kind: Command kind (one of KINDS or KIND_PROPERTIES)
+            key: What the command addresses within its kind, e.g. the channel index
+            func: Device method to call (a coroutine function for AsyncVdcDevice)
+            *args: Arguments of the call
+            coalesce: Whether the command may replace a previous one of the same kind and key
+
+        Returns:
+            Future resolved with the command's result, failed with its error
+            (asyncio.TimeoutError on timeout), or cancelled if it was replaced
+        """
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        entry = _Entry(device, kind, key, func, args, coalesce, time.monotonic(), result)
+        with self._cond:
+            self.stats[kind]["submitted"] += 1
+            self._pending += 1
+        loop = self.loop
+        try:
+            if loop is None:
+                raise RuntimeError("AsyncCommandRunner is not running")
+            loop.call_soon_threadsafe(self._start, entry)
+        except RuntimeError as e:
+            self._finish(entry)
+            result.set_exception(e)
+        return result
+
+    def _run(self) -> None:
+        """Event loop thread."""
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _start(self, entry: _Entry) -> None:
+        """Queue a submitted command behind the device's previous ones (event loop)."""
+        device = entry.device
+        queue = self._queues.get(device.dsuid)
+        if queue is None or queue[0].device is not device:
+            queue = []
+            self._queues[device.dsuid] = queue
+        entry.queue = queue
+        entry.prev = queue[-1] if queue else None
+
+        if entry.coalesce:
+            for other in reversed(queue):
+                if other.kind != entry.kind or not other.coalesce:
+                    break
+                if other.key == entry.key:
+                    # A running synchronous call cannot be interrupted; queue behind it
+                    if not other.replaced and (not other.started or isinstance(device, AsyncVdcDevice)):
+                        other.replaced = True
+                        other.task.cancel()
+                    break
+
+        queue.append(entry)
+        entry.task = asyncio.get_event_loop().create_task(self._execute(entry))
+
+    async def _execute(self, entry: _Entry) -> None:
+        """Wait for the device's previous commands, then run this one (event loop)."""
+        started = None
+        try:
+            # Previous commands finished once the last of them did, unless
+            # it was replaced, which lets it finish before its predecessors
+            prev = entry.prev
+            while prev is not None:
+                if not prev.task.done():
+                    await asyncio.wait((prev.task,))
+                prev = prev.prev if prev.replaced else None
+            entry.prev = None
+
+            entry.started = True
+            started = time.monotonic()
+            device = entry.device
+            timeout = getattr(device, "COMMAND_TIMEOUT", None) or self.timeout
+            if isinstance(device, AsyncVdcDevice):
+                value = await asyncio.wait_for(entry.func(*entry.args), timeout)
+            else:
+                call = asyncio.get_running_loop().run_in_executor(self._executor, entry.func, *entry.args)
+                done, _ = await asyncio.wait((call,), timeout=timeout)
+                if not done:
+                    self._complete(entry, started, error=asyncio.TimeoutError())
+                    # The call cannot be interrupted; keep the device busy until it returns
+                    await asyncio.wait((call,))
+                    return
+                value = call.result()
+        except asyncio.CancelledError:
+            self._complete(entry, started, cancelled=True)
+            raise
+        except Exception as e:
+            self._complete(entry, started, error=e)
+        else:
+            self._complete(entry, started, value=value)
+        finally:
+            entry.queue.remove(entry)
+            if not entry.queue and self._queues.get(entry.device.dsuid) is entry.queue:
+                del self._queues[entry.device.dsuid]
+            self._finish(entry)
+
+    def _complete(self, entry: _Entry, started: Optional[float], value: Any = None,
+                  error: Optional[BaseException] = None, cancelled: bool = False) -> None:
+        """Account a finished (or timed out) command and resolve its future."""
+        if entry.result.done():
+            return
+        if cancelled:
+            outcome = "cancelled"
+            entry.result.cancel()
+        elif isinstance(error, asyncio.TimeoutError):
+            outcome = "timeouts"
+            self.log_throttle.log("timeout", logging.WARNING, "%s on device %s timed out",
+                                  entry.kind, entry.device.name)
+            entry.result.set_exception(error)
+        elif error is not None:
+            outcome = "errors"
+            if entry.kind != KIND_PROPERTIES:
+                self.log_throttle.log("error", logging.ERROR, "%s on device %s failed: %s",
+                                      entry.kind, entry.device.name, error)
+            entry.result.set_exception(error)
+        else:
+            outcome = "executed"
+            entry.result.set_result(value)
+        with self._cond:
+            self.stats[entry.kind][outcome] += 1
+        if started is not None:
+            self.latency.record(time.monotonic() - entry.queued)
+            if self.on_done is not None and entry.kind != KIND_PROPERTIES:
+                self.on_done(entry.device, started)
+
+    def _finish(self, entry: _Entry) -> None:
+        with self._cond:
+            self._pending -= 1
+            if not self._pending:
+                self._cond.notify_all()
+
+    async def _cancel_all(self) -> None:
+        """Cancel all queued and running commands and wait for them (event loop)."""
+        tasks = [entry.task for queue in list(self._queues.values()) for entry in queue
+                 if entry.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,195 @@
+"""
+Traffic capture - append-only binary log of raw session frames
+"""
+
+import mmap
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+
+# Direction of a captured record, seen from the vDC host
+DIRECTION_IN = 0    # received from the vdSM
+DIRECTION_OUT = 1   # written to the vdSM
+
+# File layout:
+#   header: magic (8 bytes) + capture start wall-clock time in ns (int64 LE)
+#   record: offset from capture start in ns (int64 LE), direction (uint8),
+#           payload length (uint32 LE), payload
+# A payload holds one or more complete length-prefixed frames, exactly as
+# they were read from or written to the socket.
+MAGIC = b"VDCCAP\x00\x01"
+_FILE_HEADER = struct.Struct("<8sq")
+_RECORD_HEADER = struct.Struct("<qBI")
+_FRAME_LENGTH = struct.Struct(">H")
+
+
+class CaptureWriter:
+    """
+    Append-only writer for session traffic.
+
+    Recording is one struct pack and one buffered write under a lock, so it
+    can stay enabled in production. Records reach the file when the write
+    buffer fills up, on ``flush`` and on ``close``.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        """
+        Open a capture file for appending; a new file gets a header.
+
+        Args:
+            path: File path
+            buffer_size: Size of the write buffer in bytes
+
+        Raises:
+            ValueError: If an existing file is not a capture file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = open(path, "ab", buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._started = time.monotonic_ns()
+            self._file.write(_FILE_HEADER.pack(MAGIC, time.time_ns()))
+        else:
+            # Appending to an earlier capture: continue its time line
+            with open(path, "rb") as existing:
+                magic, started_wall = _FILE_HEADER.unpack(existing.read(_FILE_HEADER.size))
+            if magic != MAGIC:
+                self._file.close()
+                raise ValueError(f"{path} is not a vDC capture file")
+            self._started = time.monotonic_ns() - (time.time_ns() - started_wall)
+        self.records = 0
+        self.bytes = 0
+
+    def record(self, direction: int, payload: bytes) -> None:
+        """
+        Append one record.
+
+        Args:
+            direction: DIRECTION_IN or DIRECTION_OUT
+            payload: One or more complete length-prefixed frames
+        """
+        header = _RECORD_HEADER.pack(time.monotonic_ns() - self._started, direction, len(payload))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(header)
+            self._file.write(payload)
+            self.records += 1
+            self.bytes += len(payload)
+
+    def record_frame(self, direction: int, data: bytes) -> None:
+        """
+        Append one frame given without its length header.
+
+        Args:
+            direction: DIRECTION_IN or DIRECTION_OUT
+            data: Serialized Message
+        """
+        self.record(direction, _FRAME_LENGTH.pack(len(data)) + data)
+
+    def flush(self) -> None:
+        """Write buffered records to the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the capture file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+
+class CaptureReader:
+    """
+    Memory-mapped reader for capture files.
+
+    Records are returned as memoryviews into the mapping, so iterating a
+    large capture does not copy payloads.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a capture file.
+
+        Args:
+            path: File path
+
+        Raises:
+            ValueError: If the file is not a capture file
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _FILE_HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a vDC capture file")
+        magic, self.started_wall_ns = _FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a vDC capture file")
+        self._view = memoryview(self._mmap)
+
+    def records(self) -> Iterator[Tuple[int, int, memoryview]]:
+        """
+        Iterate all complete records.
+
+        A record cut off by a crash at the end of the file is ignored.
+
+        Yields:
+            Tuples of (ns since capture start, direction, payload)
+        """
+        view = self._view
+        pos = _FILE_HEADER.size
+        end = len(view)
+        header_size = _RECORD_HEADER.size
+        unpack = _RECORD_HEADER.unpack_from
+        while pos + header_size <= end:
+            offset, direction, length = unpack(view, pos)
+            pos += header_size
+            if pos + length > end:
+                return
+            yield offset, direction, view[pos:pos + length]
+            pos += length
+
+    def frames(self) -> Iterator[Tuple[int, int, memoryview]]:
+        """
+        Iterate all frames, splitting records that hold several frames.
+
+        Yields:
+            Tuples of (ns since capture start, direction, serialized Message without length header)
+        """
+        for offset, direction, payload in self.records():
+            pos = 0
+            end = len(payload)
+            while pos + 2 <= end:
+                length = (payload[pos] << 8) | payload[pos + 1]
+                pos += 2
+                yield offset, direction, payload[pos:pos + length]
+                pos += length
+
+    def close(self) -> None:
+        """
+        Release the mapping.
+
+        If payload views returned by the iterators are still referenced, the
+        mapping is unmapped once the last of them is garbage collected.
+        """
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
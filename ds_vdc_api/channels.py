@@ -0,0 +1,164 @@
+"""
+Output channels - array-backed channel values with staged changes
+"""
+
+import threading
+from array import array
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+# Channel types (see ds-basics, "Output channel types")
+CHANNEL_DEFAULT = 0
+CHANNEL_BRIGHTNESS = 1
+CHANNEL_HUE = 2
+CHANNEL_SATURATION = 3
+CHANNEL_COLORTEMP = 4
+CHANNEL_CIE_X = 5
+CHANNEL_CIE_Y = 6
+
+
+class ChannelSpec(NamedTuple):
+    """Invariable description of one output channel."""
+
+    channel_id: str
+    channel_type: int
+    min: float = 0.0
+    max: float = 100.0
+    resolution: float = 0.1
+
+
+DEFAULT_CHANNELS: Tuple[ChannelSpec, ...] = (ChannelSpec("brightness", CHANNEL_BRIGHTNESS),)
+
+
+class ChannelStore:
+    """
+    Current and staged values of a device's output channels.
+
+    Values live in ``array('d')`` buffers indexed by channel index (the
+    position in the spec list; index 0 is the default channel). Values sent
+    with ``apply_now=False`` are staged and only take effect together with
+    the next commit, so a color change arriving as several channel values
+    reaches the hardware as one write.
+    """
+
+    def __init__(self, specs: Iterable[ChannelSpec] = DEFAULT_CHANNELS):
+        """
+        Initialize a channel store.
+
+        Args:
+            specs: Channel descriptions in channel index order
+
+        Raises:
+            ValueError: If no channel is given
+        """
+        self.specs: Tuple[ChannelSpec, ...] = tuple(specs)
+        if not self.specs:
+            raise ValueError("A device needs at least one output channel")
+
+        self.values = array('d', [0.0] * len(self.specs))
+        self._staged = array('d', [0.0] * len(self.specs))
+        self._dirty = 0  # bit i set: channel i has a staged value
+        self._lock = threading.Lock()
+        self._by_id = {spec.channel_id: index for index, spec in enumerate(self.specs)}
+        self._by_type = {spec.channel_type: index for index, spec in enumerate(self.specs)}
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def index_of(self, channel_id: str = "", channel_type: int = CHANNEL_DEFAULT) -> Optional[int]:
+        """
+        Resolve the channel addressed by a notification.
+
+        Args:
+            channel_id: Channel identifier (API v3), takes precedence if set
+            channel_type: Channel type; 0 addresses the default channel
+
+        Returns:
+            Channel index, or None if the device has no such channel
+        """
+        if channel_id:
+            return self._by_id.get(channel_id)
+        if channel_type == CHANNEL_DEFAULT:
+            return 0
+        return self._by_type.get(channel_type)
+
+    def stage(self, index: int, value: float) -> None:
+        """
+        Stage a new channel value, clamped to the channel range.
+
+        Args:
+            index: Channel index
+            value: New value
+        """
+        spec = self.specs[index]
+        value = min(spec.max, max(spec.min, float(value)))
+        with self._lock:
+            self._staged[index] = value
+            self._dirty |= 1 << index
+
+    @property
+    def pending(self) -> bool:
+        """True if there are staged values waiting for a commit."""
+        return self._dirty != 0
+
+    def take_staged(self) -> Dict[int, float]:
+        """
+        Atomically remove and return the staged change set.
+
+        Returns:
+            Dictionary mapping channel index to staged value (empty if nothing is staged)
+        """
+        with self._lock:
+            dirty = self._dirty
+            self._dirty = 0
+            staged = self._staged
+            changes = {}
+            index = 0
+            while dirty:
+                if dirty & 1:
+                    changes[index] = staged[index]
+                dirty >>= 1
+                index += 1
+        return changes
+
+    def unstage(self, index: int) -> Optional[float]:
+        """
+        Remove the staged value of one channel.
+
+        Args:
+            index: Channel index
+
+        Returns:
+            The staged value, or None if the channel had none
+        """
+        with self._lock:
+            if not self._dirty & (1 << index):
+                return None
+            self._dirty &= ~(1 << index)
+            return self._staged[index]
+
+    def commit(self, changes: Dict[int, float]) -> None:
+        """
+        Make values current, e.g. after they were written to the hardware.
+
+        Args:
+            changes: Dictionary mapping channel index to value
+        """
+        with self._lock:
+            for index, value in changes.items():
+                self.values[index] = value
+
+    def discard(self) -> None:
+        """Drop all staged values."""
+        with self._lock:
+            self._dirty = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Get the current values keyed by channel id.
+
+        Returns:
+            Dictionary mapping channel id to value
+        """
+        with self._lock:
+            return {spec.channel_id: self.values[index] for index, spec in enumerate(self.specs)}
@@ -0,0 +1,243 @@
+"""
+Output debouncing - per-device command queues that coalesce bursts of output commands
+"""
+
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+from .log_utils import LogThrottle
+from .metrics import LatencyStats
+from .vdc_device import VdcDevice
+
+
+logger = logging.getLogger(__name__)
+
+# Command kinds
+KIND_SCENE = "call_scene"
+KIND_OUTPUT = "set_output_value"
+KIND_DIM = "dim_channel"
+KIND_IDENTIFY = "identify"
+KINDS = (KIND_SCENE, KIND_OUTPUT, KIND_DIM, KIND_IDENTIFY)
+
+
+class _Command:
+    __slots__ = ("kind", "key", "func", "args", "coalesce", "queued")
+
+    def __init__(self, kind: str, key: Hashable, func: Callable[..., Any], args: Tuple[Any, ...],
+                 coalesce: bool, queued: float):
+        self.kind = kind
+        self.key = key
+        self.func = func
+        self.args = args
+        self.coalesce = coalesce
+        self.queued = queued
+
+
+class _DeviceQueue:
+    """Pending commands of one device; scheduled while it has work or a worker runs it."""
+
+    __slots__ = ("device", "commands", "scheduled", "next_allowed")
+
+    def __init__(self, device: VdcDevice):
+        self.device = device
+        self.commands: Deque[_Command] = collections.deque()
+        self.scheduled = False
+        self.next_allowed = 0.0
+
+
+class OutputDebouncer:
+    """
+    Run device commands on worker threads, coalescing bursts per device.
+
+    Each device has a FIFO of pending commands, executed one at a time in
+    arrival order, so commands of different kinds are never reordered. A
+    coalescable command (an applied output value, a dim command) replaces a
+    pending command of the same kind and key (channel) instead of queueing
+    behind it, as long as only coalescable commands of that kind lie in
+    between; scene calls, identify and staged (apply_now=False) values are
+    barriers and are always executed. So while a device is busy, a slider
+    burst holds at most one pending value per channel, and the latest value
+    is written as soon as the device is free again.
+
+    Devices whose backend cannot take writes faster than a given rate set
+    ``MIN_COMMAND_INTERVAL``; commands arriving within that interval after
+    the previous one wait (and coalesce) until it has passed.
+    """
+
+    def __init__(self, workers: int = 4, on_done: Optional[Callable[[VdcDevice, float], None]] = None):
+        """
+        Initialize the debouncer (call start to run it).
+
+        Args:
+            workers: Worker threads executing device commands; a device is
+                     only ever run by one of them at a time
+            on_done: Called with (device, start time) after each executed command
+        """
+        self.workers = workers
+        self.on_done = on_done
+        self.latency = LatencyStats()
+        self.stats: Dict[str, Dict[str, int]] = {kind: {"submitted": 0, "coalesced": 0, "executed": 0,
+                                                        "errors": 0} for kind in KINDS}
+        self.log_throttle = LogThrottle(logger)
+
+        self._queues: Dict[str, _DeviceQueue] = {}
+        self._ready: Deque[_DeviceQueue] = collections.deque()
+        self._delayed: List[Tuple[float, int, _DeviceQueue]] = []
+        self._counter = itertools.count()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def pending(self) -> int:
+        """Commands waiting to be executed."""
+        return self._pending
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Counters per command kind, pending commands and actuation latency.
+
+        ``coalesced`` counts intermediate commands replaced by a later one
+        before they were executed; ``latency`` is the time from submitting a
+        command (for a coalesced one, its latest value) to the device call
+        returning.
+        """
+        with self._cond:
+            stats: Dict[str, Any] = {kind: dict(counters) for kind, counters in self.stats.items()}
+            stats["pending"] = self._pending
+        stats["latency"] = self.latency.snapshot()
+        return stats
+
+    def start(self) -> None:
+        """Start the worker threads (no-op if already running)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [threading.Thread(target=self._run, name=f"vdc-output-{index}", daemon=True)
+                         for index in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Stop the workers after the pending commands have run.
+
+        Args:
+            timeout: Seconds to wait for pending commands; the rest is dropped
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=max(0.0, deadline - time.monotonic()) + 1.0)
+        self._threads = []
+
+    def submit(self, device: VdcDevice, kind: str, key: Hashable, func: Callable[..., Any],
+               *args: Any, coalesce: bool = False) -> bool:
+        """
+        Queue a command for a device.
+
+        Args:
+            device: Target device
+            kind: Command kind (one of KINDS)
+            key: What the command addresses within its kind, e.g. the channel index
+            func: Device method to call
+            *args: Arguments of the call
+            coalesce: Whether the command may replace a pending one of the same kind and key
+
+        Returns:
+            False if the command replaced a pending one
+        """
+        now = time.monotonic()
+        with self._cond:
+            stats = self.stats[kind]
+            stats["submitted"] += 1
+            queue = self._queues.get(device.dsuid)
+            if queue is None or queue.device is not device:
+                queue = _DeviceQueue(device)
+                self._queues[device.dsuid] = queue
+
+            if coalesce:
+                for command in reversed(queue.commands):
+                    if command.kind != kind or not command.coalesce:
+                        break
+                    if command.key == key:
+                        command.func = func
+                        command.args = args
+                        command.queued = now
+                        stats["coalesced"] += 1
+                        return False
+
+            queue.commands.append(_Command(kind, key, func, args, coalesce, now))
+            self._pending += 1
+            if not queue.scheduled:
+                queue.scheduled = True
+                self._schedule(queue, now)
+        return True
+
+    def _schedule(self, queue: _DeviceQueue, now: float) -> None:
+        """Make a device with pending commands runnable. Caller holds the lock."""
+        if queue.next_allowed > now:
+            heapq.heappush(self._delayed, (queue.next_allowed, next(self._counter), queue))
+        else:
+            self._ready.append(queue)
+        self._cond.notify()
+
+    def _next_queue(self) -> Optional[_DeviceQueue]:
+        """Wait for a runnable device. Caller holds the lock."""
+        while self._running:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                self._ready.append(heapq.heappop(self._delayed)[2])
+            if self._ready:
+                return self._ready.popleft()
+            self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+        return None
+
+    def _run(self) -> None:
+        """Worker thread - run one command of a device, then requeue the device."""
+        while True:
+            with self._cond:
+                queue = self._next_queue()
+                if queue is None:
+                    return
+                command = queue.commands.popleft()
+
+            started = time.monotonic()
+            try:
+                command.func(*command.args)
+            except Exception as e:
+                failed = True
+                self.log_throttle.log("error", logging.ERROR, "%s on device %s failed: %s",
+                                      command.kind, queue.device.name, e)
+            else:
+                failed = False
+            finished = time.monotonic()
+            self.latency.record(finished - command.queued)
+            if self.on_done is not None:
+                self.on_done(queue.device, started)
+
+            with self._cond:
+                stats = self.stats[command.kind]
+                stats["errors" if failed else "executed"] += 1
+                self._pending -= 1
+                queue.next_allowed = finished + getattr(queue.device, "MIN_COMMAND_INTERVAL", 0.0)
+                if queue.commands:
+                    self._schedule(queue, finished)
+                else:
+                    queue.scheduled = False
+                    if self._queues.get(queue.device.dsuid) is queue and not queue.next_allowed > finished:
+                        del self._queues[queue.device.dsuid]
+                if not self._pending:
+                    self._cond.notify_all()
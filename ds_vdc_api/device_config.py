@@ -0,0 +1,189 @@
+"""
+Device configuration - declarative device sets and their diff against a live registry
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple, Union
+from .vdc_device import VdcDevice
+
+
+# Accepted spellings of the spec fields in configuration dictionaries
+_KEYS = {
+    "dsuid": "dsuid", "dSUID": "dsuid",
+    "name": "name",
+    "model": "model",
+    "model_uid": "model_uid", "modelUID": "model_uid",
+    "device_class": "device_class", "deviceClass": "device_class",
+    "vdc": "vdc_dsuid", "vdc_dsuid": "vdc_dsuid",
+    "properties": "properties",
+}
+
+
+class DeviceSpec(NamedTuple):
+    """Declarative description of one device."""
+
+    dsuid: str
+    name: str
+    model: str = "Generic Device"
+    model_uid: str = "vdc:generic"
+    device_class: str = "Light"
+    vdc_dsuid: Optional[str] = None  # None: the host's default vDC
+    properties: Optional[Dict[str, Any]] = None  # set with set_property
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "DeviceSpec":
+        """
+        Build a spec from a configuration dictionary.
+
+        Keys may use the Python names (``model_uid``) or the property names
+        (``modelUID``); ``vdc`` selects the vDC by dSUID.
+
+        Args:
+            data: Dictionary with at least dsuid and name
+
+        Returns:
+            The DeviceSpec
+
+        Raises:
+            ValueError: For unknown keys or a missing dsuid or name
+        """
+        fields: Dict[str, Any] = {}
+        for key, value in data.items():
+            field = _KEYS.get(key)
+            if field is None:
+                raise ValueError(f"Unknown device configuration key: {key}")
+            fields[field] = value
+        if "dsuid" not in fields or "name" not in fields:
+            raise ValueError(f"Device configuration needs dsuid and name: {dict(data)}")
+        if fields.get("properties") is not None:
+            fields["properties"] = dict(fields["properties"])
+        return cls(**fields)
+
+    def build(self, device_type: Callable[..., VdcDevice] = VdcDevice) -> VdcDevice:
+        """
+        Create a device from this spec.
+
+        Args:
+            device_type: VdcDevice class (or factory with its signature) to instantiate
+
+        Returns:
+            The new device, with the configured properties set
+        """
+        device = device_type(self.dsuid, self.name, model=self.model, model_uid=self.model_uid,
+                             device_class=self.device_class)
+        for name, value in (self.properties or {}).items():
+            device.set_property(name, value)
+        return device
+
+
+ConfigSource = Union[str, Mapping[str, Any], Iterable[Union[DeviceSpec, Mapping[str, Any]]]]
+
+
+def load_config(source: ConfigSource) -> List[DeviceSpec]:
+    """
+    Read a declarative device configuration.
+
+    Args:
+        source: Path of a JSON file, a dictionary with a "devices" list, or an
+                iterable of DeviceSpec instances and configuration dictionaries
+
+    Returns:
+        Device specs in configuration order
+
+    Raises:
+        ValueError: If an entry is invalid or a dSUID appears twice
+    """
+    if isinstance(source, str):
+        with open(source) as f:
+            source = json.load(f)
+    if isinstance(source, Mapping):
+        source = source.get("devices", ())
+
+    specs: List[DeviceSpec] = []
+    seen = set()
+    for entry in source:
+        spec = entry if isinstance(entry, DeviceSpec) else DeviceSpec.from_dict(entry)
+        if spec.dsuid in seen:
+            raise ValueError(f"Device {spec.dsuid} is configured twice")
+        seen.add(spec.dsuid)
+        specs.append(spec)
+    return specs
+
+
+class ConfigDiff:
+    """
+    Changes needed to bring a live device set in line with a configuration.
+
+    ``added`` devices are announced, ``removed`` ones vanish, ``replaced``
+    ones (changed model, class or vDC) are vanished and announced again as
+    new instances, and ``changed`` ones are updated in place and have the
+    changed properties pushed. All other devices are left alone.
+    """
+
+    def __init__(self) -> None:
+        self.added: List[DeviceSpec] = []
+        self.removed: List[str] = []
+        self.replaced: List[DeviceSpec] = []
+        self.changed: List[Tuple[VdcDevice, Dict[str, Any], List[str]]] = []  # device, set, dropped
+        self.unchanged = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.replaced or self.changed)
+
+    def __repr__(self) -> str:
+        return (f"ConfigDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"replaced={len(self.replaced)}, changed={len(self.changed)}, unchanged={self.unchanged})")
+
+
+def diff_config(devices: Mapping[str, VdcDevice], specs: Iterable[DeviceSpec],
+                default_vdc: Optional[str] = None) -> ConfigDiff:
+    """
+    Compare a configuration with the devices currently served.
+
+    Each device is compared field by field with its spec; nothing is
+    encoded or copied for devices that did not change.
+
+    Args:
+        devices: Live devices by dSUID (e.g. a registry snapshot)
+        specs: Configured devices
+        default_vdc: vDC dSUID of specs that do not name one
+
+    Returns:
+        The ConfigDiff; its added and replaced specs carry the resolved vDC dSUID
+    """
+    diff = ConfigDiff()
+    configured = set()
+    for spec in specs:
+        configured.add(spec.dsuid)
+        vdc_dsuid = spec.vdc_dsuid or default_vdc
+        device = devices.get(spec.dsuid)
+        if device is None or (device.model != spec.model or device.model_uid != spec.model_uid
+                              or device.device_class != spec.device_class or device.vdc_dsuid != vdc_dsuid):
+            if vdc_dsuid != spec.vdc_dsuid:
+                spec = spec._replace(vdc_dsuid=vdc_dsuid)
+            (diff.added if device is None else diff.replaced).append(spec)
+            continue
+
+        changes: Dict[str, Any] = {}
+        if device.name != spec.name:
+            changes["name"] = spec.name
+        wanted = spec.properties or {}
+        custom = device.custom_properties
+        dropped: List[str] = []
+        if wanted != custom:
+            # Declared paths (e.g. outputValue) are compared with the value their setter reads back
+            for name, value in wanted.items():
+                try:
+                    if device.get_property_value(name) == value:
+                        continue
+                except KeyError:
+                    pass
+                changes[name] = value
+            dropped = [name for name in custom if name not in wanted]
+        if changes or dropped:
+            diff.changed.append((device, changes, dropped))
+        else:
+            diff.unchanged += 1
+
+    diff.removed = [dsuid for dsuid in devices if dsuid not in configured]
+    return diff
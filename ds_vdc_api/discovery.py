@@ -0,0 +1,209 @@
+"""
+Service discovery - background mDNS/DNS-SD advertisement of a vDC host
+"""
+
+import importlib.util
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .vdc_host import VdcHost
+
+
+logger = logging.getLogger(__name__)
+
+# DNS-SD service type under which vdSMs look for vDC hosts
+SERVICE_TYPE = "_ds-vdc._tcp.local."
+
+
+def local_addresses(include_loopback: bool = False) -> List[str]:
+    """
+    List the IPv4 addresses of the local interfaces.
+
+    The addresses are read from the interface table (via ``ifaddr``, which
+    comes with zeroconf) or, without it, from the host name resolution; no
+    packet is sent. Link-local addresses are skipped, and loopback addresses
+    unless requested or there is nothing else.
+
+    Args:
+        include_loopback: Also return 127.0.0.0/8 addresses
+
+    Returns:
+        Sorted list of dotted-quad addresses
+    """
+    found = set()
+    try:
+        import ifaddr
+        for adapter in ifaddr.get_adapters():
+            for ip in adapter.ips:
+                if isinstance(ip.ip, str):
+                    found.add(ip.ip)
+    except ImportError:
+        try:
+            for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+                found.add(info[4][0])
+        except OSError:
+            pass
+
+    addresses = []
+    loopback = []
+    for address in found:
+        ip = ipaddress.IPv4Address(address)
+        if ip.is_loopback:
+            loopback.append(address)
+        elif not ip.is_link_local:
+            addresses.append(address)
+    if include_loopback or not addresses:
+        addresses.extend(loopback)
+    return sorted(addresses, key=lambda address: ipaddress.IPv4Address(address))
+
+
+class ServiceAdvertiser:
+    """
+    Advertise a VdcHost via mDNS/DNS-SD from a background thread.
+
+    Registration (which includes the mDNS probing delay of about a second)
+    and unregistration run on the ``vdc-discovery`` thread, so starting and
+    stopping the host is not blocked by them. The thread re-checks the local
+    addresses every ``interval`` seconds and re-registers the service on the
+    new interfaces when they changed. Requires the ``zeroconf`` package
+    (``pip install ds-vdc-api[discovery]``).
+    """
+
+    def __init__(self, host: "VdcHost", name: Optional[str] = None, addresses: Optional[Sequence[str]] = None,
+                 interval: float = 30.0, include_loopback: bool = False,
+                 address_source: Optional[Callable[[], List[str]]] = None):
+        """
+        Initialize the advertiser (call start to register the service).
+
+        Args:
+            host: Host to advertise
+            name: Service instance name (default: derived from the host dSUID)
+            addresses: Fixed addresses to advertise, or None to follow the local interfaces
+            interval: Seconds between checks for changed local addresses
+            include_loopback: Also advertise loopback addresses
+            address_source: Callable returning the current addresses (default: local_addresses)
+
+        Raises:
+            ImportError: If zeroconf is not installed
+        """
+        # Fail here rather than on the discovery thread
+        if importlib.util.find_spec("zeroconf") is None:
+            raise ImportError("Service discovery requires zeroconf (pip install ds-vdc-api[discovery])")
+
+        self.host = host
+        self.name = name if name is not None else f"vDC host {host.dsuid[-8:]}"
+        self.fixed_addresses = list(addresses) if addresses is not None else None
+        self.interval = interval
+        self.include_loopback = include_loopback
+        self.address_source = address_source
+        self.addresses: List[str] = []
+        self.registered = threading.Event()
+        self.stats: Dict[str, Any] = {"registrations": 0, "failures": 0, "start_seconds": 0.0,
+                                      "register_seconds": 0.0}
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._zeroconf = None
+        self._info = None
+
+    def current_addresses(self) -> List[str]:
+        """Addresses the service should be advertised on right now."""
+        if self.fixed_addresses is not None:
+            return list(self.fixed_addresses)
+        if self.address_source is not None:
+            return sorted(self.address_source())
+        return local_addresses(self.include_loopback)
+
+    @property
+    def port(self) -> int:
+        """Port the host actually listens on (resolves port 0 after binding)."""
+        return getattr(self.host.transport, "port", self.host.port)
+
+    def start(self) -> None:
+        """Start advertising in the background."""
+        if self._thread is not None:
+            return
+        started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vdc-discovery", daemon=True)
+        self._thread.start()
+        self.stats["start_seconds"] = time.perf_counter() - started
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Unregister the service and stop the background thread.
+
+        Args:
+            timeout: Seconds to wait for the goodbye packets to go out
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        """Discovery thread: register, follow address changes, unregister."""
+        try:
+            while not self._stop.is_set():
+                addresses = self.current_addresses()
+                if addresses != self.addresses or self._info is None:
+                    self._unregister()
+                    if addresses:
+                        self._register(addresses)
+                    self.addresses = addresses
+                self._stop.wait(self.interval)
+        finally:
+            self._unregister()
+
+    def _register(self, addresses: List[str]) -> None:
+        from zeroconf import IPVersion, ServiceInfo, Zeroconf
+
+        started = time.perf_counter()
+        info = ServiceInfo(
+            SERVICE_TYPE,
+            f"{self.name}.{SERVICE_TYPE}",
+            addresses=[socket.inet_aton(address) for address in addresses],
+            port=self.port,
+            properties={"dSUID": self.host.dsuid, "vdcDsuid": self.host.vdc_dsuid or ""},
+        )
+        try:
+            zc = Zeroconf(interfaces=addresses, ip_version=IPVersion.V4Only)
+        except OSError as e:
+            self.stats["failures"] += 1
+            logger.error(f"mDNS advertisement failed on {', '.join(addresses)}: {e}")
+            return
+        try:
+            zc.register_service(info, allow_name_change=True)
+        except Exception as e:
+            zc.close()
+            self.stats["failures"] += 1
+            logger.error(f"mDNS advertisement failed on {', '.join(addresses)}: {e}")
+            return
+        self._zeroconf = zc
+        self._info = info
+        self.stats["registrations"] += 1
+        self.stats["register_seconds"] = time.perf_counter() - started
+        self.registered.set()
+        logger.info(f"Advertising {info.name} on {', '.join(addresses)} port {info.port}")
+
+    def _unregister(self) -> None:
+        zc, info = self._zeroconf, self._info
+        if zc is None:
+            return
+        self._zeroconf = None
+        self._info = None
+        self.registered.clear()
+        try:
+            zc.unregister_service(info)
+        except Exception as e:
+            logger.warning(f"mDNS unregistration failed: {e}")
+        finally:
+            zc.close()
+        logger.info(f"Stopped advertising {info.name}")
@@ -0,0 +1,368 @@
+"""
+Fast codec for small fixed-shape vDC messages and property responses
+
+Ping/pong, generic responses, announcements and vanish messages are tiny and
+always have the same shape. Encoding them through the protobuf runtime is
+comparatively expensive with the pure-Python backend, so this module writes
+their wire format directly. The output is byte-identical to
+``Message.SerializeToString()`` (including proto2 field presence), and every
+other message type falls back to ``genericVDC_pb2``.
+
+getProperty responses and push notifications are encoded straight from
+property dictionaries (see ``property_tree.encode_property_tree``), splicing
+the already-encoded PropertyElement entries into the response frame.
+"""
+
+import struct
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from google.protobuf.internal import api_implementation
+from .genericVDC_pb2 import Message, Type, ResultCode
+from .message_handler import MessageHandler
+from .property_tree import encode_property_tree
+from .wire import (WIRETYPE_FIXED32, WIRETYPE_FIXED64, WIRETYPE_LENGTH_DELIMITED, WIRETYPE_VARINT,
+                   encode_varint, read_varint)
+
+
+def _tag(field_number: int, wire_type: int) -> bytes:
+    return encode_varint((field_number << 3) | wire_type)
+
+
+def _string_field(tag: bytes, value: str) -> bytes:
+    data = value.encode('utf-8')
+    return tag + encode_varint(len(data)) + data
+
+
+# Pre-encoded tags
+_TAG_TYPE = _tag(1, WIRETYPE_VARINT)
+_TAG_MESSAGE_ID = _tag(2, WIRETYPE_VARINT)
+_TAG_GENERIC_RESPONSE = _tag(3, WIRETYPE_LENGTH_DELIMITED)
+_TAG_PONG = _tag(106, WIRETYPE_LENGTH_DELIMITED)
+_TAG_ANNOUNCE_DEVICE = _tag(107, WIRETYPE_LENGTH_DELIMITED)
+_TAG_VANISH = _tag(108, WIRETYPE_LENGTH_DELIMITED)
+_TAG_ANNOUNCE_VDC = _tag(120, WIRETYPE_LENGTH_DELIMITED)
+_TAG_RESPONSE_GET_PROPERTY = _tag(103, WIRETYPE_LENGTH_DELIMITED)
+_TAG_PUSH_PROPERTY = _tag(109, WIRETYPE_LENGTH_DELIMITED)
+_TAG_FIELD1_VARINT = _tag(1, WIRETYPE_VARINT)
+_TAG_FIELD1_STRING = _tag(1, WIRETYPE_LENGTH_DELIMITED)
+_TAG_FIELD2_STRING = _tag(2, WIRETYPE_LENGTH_DELIMITED)
+
+# Message field numbers of the sub-messages decoded here
+_FIELD_GENERIC_RESPONSE = 3
+_FIELD_PING = 105
+_FIELD_PONG = 106
+_FIELD_ANNOUNCE_DEVICE = 107
+_FIELD_VANISH = 108
+_FIELD_ANNOUNCE_VDC = 120
+
+_HEADER_PACK = struct.Struct('!H').pack
+
+
+def protobuf_backend() -> str:
+    """
+    Get the active protobuf runtime implementation.
+
+    Returns:
+        "upb", "cpp" or "python"
+    """
+    return api_implementation.Type()
+
+
+# The hand-written decoders beat ParseFromString only on the pure-Python
+# backend; with upb/cpp the native parser is faster (encoders win on all backends)
+PURE_PYTHON_BACKEND = protobuf_backend() == "python"
+
+
+def _frame(msg_type: int, message_id: int, body: bytes, into: Optional[bytearray]) -> bytes:
+    """Prefix the message header and the 2-byte length and emit the frame."""
+    payload = _TAG_TYPE + encode_varint(msg_type) + _TAG_MESSAGE_ID + encode_varint(message_id) + body
+    if len(payload) > MessageHandler.MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message size {len(payload)} exceeds maximum {MessageHandler.MAX_MESSAGE_SIZE}")
+    frame = _HEADER_PACK(len(payload)) + payload
+    if into is not None:
+        into += frame
+    return frame
+
+
+def _submessage(tag: bytes, body: bytes) -> bytes:
+    return tag + encode_varint(len(body)) + body
+
+
+def encode_pong(message_id: int, dsuid: str, into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed VDC_SEND_PONG.
+
+    Args:
+        message_id: Message id of the ping being answered
+        dsuid: dSUID echoed from the ping
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    body = _submessage(_TAG_PONG, _string_field(_TAG_FIELD1_STRING, dsuid))
+    return _frame(Type.VDC_SEND_PONG, message_id, body, into)
+
+
+def encode_generic_response(message_id: int, code: int = ResultCode.ERR_OK,
+                            description: str = "", into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed GENERIC_RESPONSE.
+
+    Args:
+        message_id: Message id of the request being answered
+        code: ResultCode
+        description: Optional error description (omitted if empty)
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    inner = _TAG_FIELD1_VARINT + encode_varint(code)
+    if description:
+        inner += _string_field(_TAG_FIELD2_STRING, description)
+    return _frame(Type.GENERIC_RESPONSE, message_id, _submessage(_TAG_GENERIC_RESPONSE, inner), into)
+
+
+def encode_announce_device(dsuid: str, vdc_dsuid: str, into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed VDC_SEND_ANNOUNCE_DEVICE (message_id 0).
+
+    Args:
+        dsuid: Device dSUID
+        vdc_dsuid: dSUID of the vDC the device belongs to
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    inner = _string_field(_TAG_FIELD1_STRING, dsuid) + _string_field(_TAG_FIELD2_STRING, vdc_dsuid)
+    return _frame(Type.VDC_SEND_ANNOUNCE_DEVICE, 0, _submessage(_TAG_ANNOUNCE_DEVICE, inner), into)
+
+
+def encode_announce_vdc(dsuid: str, into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed VDC_SEND_ANNOUNCE_VDC (message_id 0).
+
+    Args:
+        dsuid: vDC dSUID
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    body = _submessage(_TAG_ANNOUNCE_VDC, _string_field(_TAG_FIELD1_STRING, dsuid))
+    return _frame(Type.VDC_SEND_ANNOUNCE_VDC, 0, body, into)
+
+
+def encode_vanish(dsuid: str, into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed VDC_SEND_VANISH (message_id 0).
+
+    Args:
+        dsuid: dSUID of the vanished device
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    body = _submessage(_TAG_VANISH, _string_field(_TAG_FIELD1_STRING, dsuid))
+    return _frame(Type.VDC_SEND_VANISH, 0, body, into)
+
+
+def encode_get_property_response(message_id: int, properties: Union[Dict[str, Any], bytes],
+                                  into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed VDC_RESPONSE_GET_PROPERTY directly from a property dictionary.
+
+    Args:
+        message_id: Message id of the getProperty request
+        properties: Nested property dictionary (as for build_property_tree), or
+                    an already encoded tree (e.g. from PropertyTemplate.encode)
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    if not isinstance(properties, bytes):
+        properties = encode_property_tree(properties, 1)
+    body = _submessage(_TAG_RESPONSE_GET_PROPERTY, properties)
+    return _frame(Type.VDC_RESPONSE_GET_PROPERTY, message_id, body, into)
+
+
+def encode_push_property(dsuid: str, properties: Dict[str, Any],
+                         into: Optional[bytearray] = None) -> bytes:
+    """
+    Encode a framed VDC_SEND_PUSH_PROPERTY (message_id 0) from a property dictionary.
+
+    Args:
+        dsuid: dSUID of the device whose properties changed
+        properties: Nested dictionary of changed properties
+        into: Optional buffer the frame is appended to
+
+    Returns:
+        Length-prefixed frame
+    """
+    inner = _string_field(_TAG_FIELD1_STRING, dsuid) + encode_property_tree(properties, 2)
+    return _frame(Type.VDC_SEND_PUSH_PROPERTY, 0, _submessage(_TAG_PUSH_PROPERTY, inner), into)
+
+
+def _fields(data: bytes, pos: int, end: int) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Iterate over the fields of an encoded message.
+
+    Yields:
+        Tuples of (field number, wire type, value or start offset, end offset);
+        for varints the third item is the value, for length-delimited fields
+        it is the start of the field data
+    """
+    while pos < end:
+        tag, pos = read_varint(data, pos)
+        wire_type = tag & 0x07
+        if wire_type == WIRETYPE_VARINT:
+            value, pos = read_varint(data, pos)
+            yield tag >> 3, wire_type, value, pos
+        elif wire_type == WIRETYPE_LENGTH_DELIMITED:
+            length, pos = read_varint(data, pos)
+            start = pos
+            pos += length
+            if pos > end:
+                raise ValueError("Truncated field")
+            yield tag >> 3, wire_type, start, pos
+        elif wire_type == WIRETYPE_FIXED64:
+            pos += 8
+        elif wire_type == WIRETYPE_FIXED32:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+    if pos > end:
+        raise ValueError("Truncated field")
+
+
+def _decode_strings(data: bytes, field_number: int, count: int) -> Tuple[int, int, list]:
+    """
+    Decode header and the first ``count`` string fields of one sub-message.
+
+    Returns:
+        Tuple of (message type, message_id, [string fields 1..count])
+    """
+    msg_type = 0
+    message_id = 0
+    strings = [""] * count
+    for number, wire_type, value, end in _fields(data, 0, len(data)):
+        if number == 1 and wire_type == WIRETYPE_VARINT:
+            msg_type = value
+        elif number == 2 and wire_type == WIRETYPE_VARINT:
+            message_id = value
+        elif number == field_number and wire_type == WIRETYPE_LENGTH_DELIMITED:
+            for inner, inner_type, start, inner_end in _fields(data, value, end):
+                if inner <= count and inner_type == WIRETYPE_LENGTH_DELIMITED:
+                    strings[inner - 1] = data[start:inner_end].decode('utf-8')
+    return msg_type, message_id, strings
+
+
+def decode_ping(data: bytes) -> Tuple[int, str]:
+    """
+    Decode a VDSM_SEND_PING message.
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        Tuple of (message_id, dSUID)
+    """
+    _, message_id, strings = _decode_strings(data, _FIELD_PING, 1)
+    return message_id, strings[0]
+
+
+def decode_pong(data: bytes) -> Tuple[int, str]:
+    """
+    Decode a VDC_SEND_PONG message.
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        Tuple of (message_id, dSUID)
+    """
+    _, message_id, strings = _decode_strings(data, _FIELD_PONG, 1)
+    return message_id, strings[0]
+
+
+def decode_announce_device(data: bytes) -> Tuple[str, str]:
+    """
+    Decode a VDC_SEND_ANNOUNCE_DEVICE message.
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        Tuple of (device dSUID, vDC dSUID)
+    """
+    _, _, strings = _decode_strings(data, _FIELD_ANNOUNCE_DEVICE, 2)
+    return strings[0], strings[1]
+
+
+def decode_announce_vdc(data: bytes) -> str:
+    """
+    Decode a VDC_SEND_ANNOUNCE_VDC message.
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        vDC dSUID
+    """
+    return _decode_strings(data, _FIELD_ANNOUNCE_VDC, 1)[2][0]
+
+
+def decode_vanish(data: bytes) -> str:
+    """
+    Decode a VDC_SEND_VANISH message.
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        dSUID of the vanished device
+    """
+    return _decode_strings(data, _FIELD_VANISH, 1)[2][0]
+
+
+def decode_generic_response(data: bytes) -> Tuple[int, int, str]:
+    """
+    Decode a GENERIC_RESPONSE message.
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        Tuple of (message_id, result code, description)
+    """
+    message_id = 0
+    code = ResultCode.ERR_OK
+    description = ""
+    for number, wire_type, value, end in _fields(data, 0, len(data)):
+        if number == 2 and wire_type == WIRETYPE_VARINT:
+            message_id = value
+        elif number == _FIELD_GENERIC_RESPONSE and wire_type == WIRETYPE_LENGTH_DELIMITED:
+            for inner, inner_type, inner_value, inner_end in _fields(data, value, end):
+                if inner == 1 and inner_type == WIRETYPE_VARINT:
+                    code = inner_value
+                elif inner == 2 and inner_type == WIRETYPE_LENGTH_DELIMITED:
+                    description = data[inner_value:inner_end].decode('utf-8')
+    return message_id, code, description
+
+
+def decode(data: bytes) -> Message:
+    """
+    Parse any message with the protobuf runtime (fallback for all other types).
+
+    Args:
+        data: Serialized message (without length header)
+
+    Returns:
+        Parsed Message
+    """
+    msg = Message()
+    msg.ParseFromString(data)
+    return msg
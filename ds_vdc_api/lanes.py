@@ -0,0 +1,172 @@
+"""
+Message priority lanes - keep session liveness independent of bulk traffic
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, List, Optional, Tuple
+from .genericVDC_pb2 import Type
+from .metrics import LatencyStats
+
+
+# Lanes in priority order (lower value is served first)
+LANE_CONTROL = 0   # ping/pong, bye
+LANE_REQUEST = 1   # request/response pairs
+LANE_BULK = 2      # notifications, announcements, pushes
+
+LANE_NAMES = ("control", "request", "bulk")
+
+_CONTROL_TYPES = frozenset([
+    Type.VDSM_SEND_PING,
+    Type.VDC_SEND_PONG,
+    Type.VDSM_SEND_BYE,
+])
+
+_BULK_TYPES = frozenset([
+    Type.VDC_SEND_ANNOUNCE_DEVICE,
+    Type.VDC_SEND_ANNOUNCE_VDC,
+    Type.VDC_SEND_VANISH,
+    Type.VDC_SEND_PUSH_PROPERTY,
+    Type.VDC_SEND_IDENTIFY,
+    Type.VDSM_SEND_REMOVE,
+    Type.VDSM_NOTIFICATION_CALL_SCENE,
+    Type.VDSM_NOTIFICATION_SAVE_SCENE,
+    Type.VDSM_NOTIFICATION_UNDO_SCENE,
+    Type.VDSM_NOTIFICATION_SET_LOCAL_PRIO,
+    Type.VDSM_NOTIFICATION_CALL_MIN_SCENE,
+    Type.VDSM_NOTIFICATION_IDENTIFY,
+    Type.VDSM_NOTIFICATION_SET_CONTROL_VALUE,
+    Type.VDSM_NOTIFICATION_DIM_CHANNEL,
+    Type.VDSM_NOTIFICATION_SET_OUTPUT_CHANNEL_VALUE,
+])
+
+
+def lane_for_type(msg_type: int) -> int:
+    """
+    Get the priority lane for a message type.
+
+    Args:
+        msg_type: Message Type enum value
+
+    Returns:
+        LANE_CONTROL, LANE_REQUEST or LANE_BULK
+    """
+    if msg_type in _CONTROL_TYPES:
+        return LANE_CONTROL
+    if msg_type in _BULK_TYPES:
+        return LANE_BULK
+    return LANE_REQUEST
+
+
+class InboundLanes:
+    """
+    Inbound work queue with a priority control lane.
+
+    The session reader puts received messages into their lane; a dispatcher
+    thread takes control items first and request and bulk items in arrival
+    order, so a getProperty never overtakes a notification received before
+    it and sees its effect. Lanes still keep latency metrics apart. The
+    backlog is bounded by ``max_items``. The session reader uses offer,
+    which never blocks, so it keeps reading (and answering pings) while the
+    host is saturated; put blocks until there is space.
+    """
+
+    def __init__(self, max_items: int = 1024, latency: Optional[List[LatencyStats]] = None):
+        """
+        Initialize inbound lanes.
+
+        Args:
+            max_items: Maximum number of queued messages across all lanes
+            latency: Per-lane latency accumulators (receive-to-handled time),
+                     created if not given
+        """
+        self.max_items = max_items
+        # Entries are (arrival sequence number, enqueue time, item)
+        self._lanes: List[Deque[Tuple[int, float, Any]]] = [deque() for _ in LANE_NAMES]
+        self._size = 0
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.latency = latency if latency is not None else [LatencyStats() for _ in LANE_NAMES]
+
+    def put(self, lane: int, item: Any) -> bool:
+        """
+        Queue an item, blocking while the backlog is full.
+
+        Args:
+            lane: Lane index
+            item: Work item
+
+        Returns:
+            False if the lanes were closed
+        """
+        with self._cond:
+            while self._size >= self.max_items and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return False
+            self._append(lane, item)
+            return True
+
+    def offer(self, lane: int, item: Any) -> bool:
+        """
+        Queue an item unless the backlog is full.
+
+        Args:
+            lane: Lane index
+            item: Work item
+
+        Returns:
+            False if the backlog is full or the lanes were closed (see closed)
+        """
+        with self._cond:
+            if self._closed or self._size >= self.max_items:
+                return False
+            self._append(lane, item)
+            return True
+
+    def _append(self, lane: int, item: Any) -> None:
+        """Queue an item in arrival order. Caller holds the lock."""
+        self._seq += 1
+        self._lanes[lane].append((self._seq, time.monotonic(), item))
+        self._size += 1
+        self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the lanes were closed."""
+        return self._closed
+
+    def get(self) -> Optional[Tuple[int, float, Any]]:
+        """
+        Take the next item, blocking until one is available.
+
+        Control items come first; request and bulk items are taken in
+        arrival order.
+
+        Returns:
+            Tuple of (lane, enqueue time, item), or None once closed
+        """
+        with self._cond:
+            while not self._size and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            lane = LANE_CONTROL
+            if not self._lanes[LANE_CONTROL]:
+                request, bulk = self._lanes[LANE_REQUEST], self._lanes[LANE_BULK]
+                lane = LANE_REQUEST if request and (not bulk or request[0][0] < bulk[0][0]) else LANE_BULK
+            _, queued_at, item = self._lanes[lane].popleft()
+            self._size -= 1
+            self._cond.notify_all()
+            return lane, queued_at, item
+
+    def close(self) -> None:
+        """Discard queued items and wake up all waiters."""
+        with self._cond:
+            self._closed = True
+            for queue in self._lanes:
+                queue.clear()
+            self._size = 0
+            self._cond.notify_all()
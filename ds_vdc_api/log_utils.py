@@ -0,0 +1,221 @@
+"""
+Hot-path logging - rate-limited log categories and queue-based handler offloading
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Attribute emitted lines to the caller of LogThrottle.log (Python 3.8+)
+_STACKLEVEL = {"stacklevel": 2} if sys.version_info >= (3, 8) else {}
+
+
+class _Bucket:
+    """Token bucket and counters of one log category."""
+
+    __slots__ = ("rate", "burst", "sample", "tokens", "updated", "seen", "emitted", "suppressed", "pending")
+
+    def __init__(self, rate: float, burst: int, sample: int):
+        self.rate = rate
+        self.burst = burst
+        self.sample = sample
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.seen = 0
+        self.emitted = 0
+        self.suppressed = 0
+        self.pending = 0  # suppressed since the last emitted line
+
+
+class LogThrottle:
+    """
+    Sampling and rate limiting for log lines emitted on hot paths.
+
+    Each category (e.g. "call_scene") has a token bucket allowing ``rate``
+    lines per second with bursts of up to ``burst`` lines, and optionally
+    only considers every ``sample``-th event. Messages use lazy %-style
+    arguments, so nothing is formatted unless the line is emitted. The next
+    emitted line of a category reports how many were suppressed before it.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float = 5.0, burst: int = 20, sample: int = 1):
+        """
+        Initialize the throttle.
+
+        Args:
+            logger: Logger the lines are emitted to
+            rate: Default lines per second per category
+            burst: Default bucket size per category
+            sample: Default sampling (1 considers every event, N every N-th)
+        """
+        self.logger = logger
+        self.rate = rate
+        self.burst = burst
+        self.sample = sample
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, category: str, rate: Optional[float] = None, burst: Optional[int] = None,
+                  sample: Optional[int] = None) -> None:
+        """
+        Override the limits of one category.
+
+        Args:
+            category: Category name
+            rate: Lines per second (None keeps the current value)
+            burst: Bucket size (None keeps the current value)
+            sample: Sampling interval (None keeps the current value)
+        """
+        with self._lock:
+            bucket = self._bucket(category)
+            if rate is not None:
+                bucket.rate = rate
+            if burst is not None:
+                bucket.burst = burst
+                bucket.tokens = min(bucket.tokens, burst)
+            if sample is not None:
+                bucket.sample = max(1, sample)
+
+    def _bucket(self, category: str) -> _Bucket:
+        bucket = self._buckets.get(category)
+        if bucket is None:
+            bucket = _Bucket(self.rate, self.burst, self.sample)
+            self._buckets[category] = bucket
+        return bucket
+
+    def log(self, category: str, level: int, msg: str, *args) -> bool:
+        """
+        Emit a line unless the category is over its limit.
+
+        Args:
+            category: Category name
+            level: Logging level
+            msg: %-style message format
+            *args: Message arguments (only formatted if the line is emitted)
+
+        Returns:
+            True if the line was emitted
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        with self._lock:
+            bucket = self._bucket(category)
+            bucket.seen += 1
+            if bucket.sample > 1 and bucket.seen % bucket.sample:
+                return False
+            now = time.monotonic()
+            bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            if bucket.tokens < 1.0:
+                bucket.suppressed += 1
+                bucket.pending += 1
+                return False
+            bucket.tokens -= 1.0
+            bucket.emitted += 1
+            pending = bucket.pending
+            bucket.pending = 0
+        if pending:
+            msg += " (%d similar lines suppressed)"
+            args += (pending,)
+        self.logger.log(level, msg, *args, **_STACKLEVEL)
+        return True
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-category counters (seen, emitted, suppressed)."""
+        with self._lock:
+            return {category: {"seen": bucket.seen, "emitted": bucket.emitted, "suppressed": bucket.suppressed}
+                    for category, bucket in self._buckets.items()}
+
+
+class _OffloadingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves all formatting to the listener thread.
+
+    The stdlib handler formats the message on the logging thread to make
+    records picklable; records here stay in-process, so the raw record is
+    queued. A full queue drops the record instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    """Queue listener whose stop waits for room in a full queue."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogging:
+    """
+    Move log I/O of a logger hierarchy to a background thread.
+
+    The logger's records are put on a bounded queue; a QueueListener thread
+    passes them to the handlers that would otherwise have run on the calling
+    thread (by default the root logger's handlers).
+    """
+
+    def __init__(self, logger_name: str = "ds_vdc_api", handlers: Optional[List[logging.Handler]] = None,
+                 queue_size: int = 10000):
+        """
+        Initialize the offloading (call start to activate it).
+
+        Args:
+            logger_name: Logger whose records are offloaded, including its children
+            handlers: Handlers run on the listener thread (default: the root logger's handlers)
+            queue_size: Maximum queued records; further records are dropped and counted
+        """
+        self.logger = logging.getLogger(logger_name)
+        self.handlers = handlers
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._handler = _OffloadingQueueHandler(self._queue)
+        self._listener: Optional[_Listener] = None
+        self._propagate = self.logger.propagate
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped because the queue was full."""
+        return self._handler.dropped
+
+    def start(self) -> "AsyncLogging":
+        """Route the logger's records through the queue."""
+        if self._listener is not None:
+            return self
+        handlers = self.handlers if self.handlers is not None else list(logging.getLogger().handlers)
+        self._listener = _Listener(self._queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        self._propagate = self.logger.propagate
+        self.logger.addHandler(self._handler)
+        self.logger.propagate = False
+        return self
+
+    def stop(self) -> None:
+        """Restore direct logging and flush the queued records."""
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._handler)
+        self.logger.propagate = self._propagate
+        self._listener.stop()
+        self._listener = None
+
+    def __enter__(self) -> "AsyncLogging":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
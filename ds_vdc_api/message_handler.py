@@ -14,7 +14,7 @@ class MessageHandler:
     MAX_MESSAGE_SIZE = 16384  # 16 KB maximum message size
     
     @staticmethod
-    def receive_message(sock: socket.socket) -> Optional[Message]:
+    def receive_message(sock: socket.socket, msg: Optional[Message] = None) -> Optional[Message]:
         """
         Receive a protobuf message from the socket.
         
@@ -22,13 +22,37 @@ class MessageHandler:
         
         Args:
             sock: Socket to receive from
+            msg: Optional empty Message to parse into (e.g. from a MessagePool)
             
         Returns:
             Parsed Message object, or None if connection closed
         """
+        data = MessageHandler.receive_frame(sock)
+        if data is None:
+            return None
+        
+        # Parse protobuf message
+        if msg is None:
+            msg = Message()
+        msg.ParseFromString(data)
+        return msg
+    
+    @staticmethod
+    def receive_frame(sock: socket.socket) -> Optional[bytes]:
+        """
+        Receive one raw frame from the socket without parsing it.
+        
+        Use wire.peek_header to inspect the message type and id cheaply.
+        
+        Args:
+            sock: Socket to receive from
+            
+        Returns:
+            Serialized message data (without length header), or None if connection closed
+        """
         # Read 2-byte length header
-        header = sock.recv(2)
-        if len(header) < 2:
+        header = MessageHandler._recv_exact(sock, 2)
+        if header is None:
             return None
         
         length = struct.unpack('!H', header)[0]  # Network byte order (big-endian)
@@ -37,17 +61,45 @@ class MessageHandler:
             raise ValueError(f"Message size {length} exceeds maximum {MessageHandler.MAX_MESSAGE_SIZE}")
         
         # Read message data
+        return MessageHandler._recv_exact(sock, length)
+    
+    @staticmethod
+    def _recv_exact(sock: socket.socket, length: int) -> Optional[bytes]:
+        """
+        Read exactly length bytes from the socket.
+        
+        Args:
+            sock: Socket to receive from
+            length: Number of bytes to read
+            
+        Returns:
+            The bytes read, or None if the connection closed first
+        """
         data = b''
         while len(data) < length:
             chunk = sock.recv(length - len(data))
             if not chunk:
                 return None
             data += chunk
+        return data
+    
+    @staticmethod
+    def encode_frame(msg: Message) -> bytes:
+        """
+        Serialize a protobuf message into a length-prefixed frame.
         
-        # Parse protobuf message
-        msg = Message()
-        msg.ParseFromString(data)
-        return msg
+        Args:
+            msg: Message to serialize
+            
+        Returns:
+            2-byte length header (network byte order) followed by the message data
+        """
+        data = msg.SerializeToString()
+        
+        if len(data) > MessageHandler.MAX_MESSAGE_SIZE:
+            raise ValueError(f"Message size {len(data)} exceeds maximum {MessageHandler.MAX_MESSAGE_SIZE}")
+        
+        return struct.pack('!H', len(data)) + data
     
     @staticmethod
     def send_message(sock: socket.socket, msg: Message) -> None:
@@ -60,12 +112,4 @@ class MessageHandler:
             sock: Socket to send to
             msg: Message to send
         """
-        # Serialize message
-        data = msg.SerializeToString()
-        
-        if len(data) > MessageHandler.MAX_MESSAGE_SIZE:
-            raise ValueError(f"Message size {len(data)} exceeds maximum {MessageHandler.MAX_MESSAGE_SIZE}")
-        
-        # Send length header (2 bytes, network byte order) + message data
-        header = struct.pack('!H', len(data))
-        sock.sendall(header + data)
+        sock.sendall(MessageHandler.encode_frame(msg))
@@ -0,0 +1,103 @@
+"""
+Message object pool - reuse protobuf Message objects on the hot path
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+from .genericVDC_pb2 import Message
+
+
+class MessagePool:
+    """
+    Pool of reusable ``Message`` objects, owned by one vDC session.
+
+    Messages are kept in separate free lists per message type (outgoing
+    responses) plus one free list for parsing incoming frames, so a
+    recycled object is normally reused for the same shape of message.
+
+    Lifetime rules:
+
+    - A message obtained from ``acquire`` is leased until it is passed to
+      ``release``. The session releases outgoing messages right after they
+      were serialized and incoming messages right after their handler
+      returned.
+    - Handlers must not keep a reference to the message they are given or
+      return, nor to any of its sub-messages, beyond the call. Copy what is
+      needed (``CopyFrom`` or plain values) instead. Released messages are
+      cleared immediately, so a retained reference only ever sees an empty
+      message, never another session's data.
+    - Releasing a message that is not leased from this pool raises
+      ``ValueError``; this catches double releases.
+    """
+
+    PARSE = 0  # free-list key for messages used to parse incoming frames
+
+    def __init__(self, max_per_type: int = 32):
+        """
+        Initialize a message pool.
+
+        Args:
+            max_per_type: Maximum number of idle messages kept per free list
+        """
+        self.max_per_type = max_per_type
+        self._free: Dict[int, List[Message]] = {}
+        # id(message) -> (free-list key, message); holding the message keeps its id unique
+        self._leased: Dict[int, Tuple[int, Message]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"acquired": 0, "reused": 0, "released": 0}
+
+    def acquire(self, msg_type: Optional[int] = None) -> Message:
+        """
+        Lease a cleared message.
+
+        Args:
+            msg_type: Message Type to set on the message, or None for a
+                      message used to parse an incoming frame
+
+        Returns:
+            A Message with only the type set (if given)
+        """
+        key = self.PARSE if msg_type is None else msg_type
+        with self._lock:
+            free = self._free.get(key)
+            msg = free.pop() if free else None
+            self.stats["acquired"] += 1
+            if msg is not None:
+                self.stats["reused"] += 1
+            else:
+                msg = Message()
+            self._leased[id(msg)] = (key, msg)
+
+        if msg_type is not None:
+            msg.type = msg_type
+        return msg
+
+    def release(self, msg: Message) -> None:
+        """
+        Return a leased message to the pool.
+
+        Args:
+            msg: Message obtained from acquire
+        """
+        with self._lock:
+            lease = self._leased.pop(id(msg), None)
+            if lease is None:
+                raise ValueError("Message is not leased from this pool")
+            key = lease[0]
+            msg.Clear()
+            self.stats["released"] += 1
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_type:
+                free.append(msg)
+
+    def owns(self, msg: Message) -> bool:
+        """
+        Check whether a message is currently leased from this pool.
+
+        Args:
+            msg: Message to check
+
+        Returns:
+            True if the message must be released to this pool
+        """
+        return id(msg) in self._leased
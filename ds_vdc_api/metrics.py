@@ -0,0 +1,84 @@
+"""
+Lightweight runtime metrics for the vDC host
+"""
+
+import threading
+from typing import Dict, List
+
+
+class LatencyStats:
+    """
+    Thread-safe latency accumulator.
+
+    Keeps running count/total/max plus a ring buffer of the most recent
+    samples for percentile estimates, so memory use is constant.
+    """
+
+    def __init__(self, window: int = 1024):
+        """
+        Initialize latency statistics.
+
+        Args:
+            window: Number of recent samples kept for percentiles
+        """
+        self._lock = threading.Lock()
+        self._window = window
+        self._samples: List[float] = []
+        self._next = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Record one latency sample.
+
+        Args:
+            seconds: Measured latency in seconds
+        """
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if len(self._samples) < self._window:
+                self._samples.append(seconds)
+            else:
+                self._samples[self._next] = seconds
+                self._next = (self._next + 1) % self._window
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Get a percentile over the recent sample window.
+
+        Args:
+            fraction: Percentile as a fraction (e.g. 0.99)
+
+        Returns:
+            Latency in seconds, or 0.0 if nothing was recorded
+        """
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get a summary of the recorded latencies.
+
+        Returns:
+            Dictionary with count, mean, p50, p99 and max (seconds)
+        """
+        with self._lock:
+            count = self.count
+            total = self.total
+            maximum = self.max
+        return {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": maximum,
+        }
@@ -0,0 +1,297 @@
+"""
+Outbound message queue for vDC sessions - bounded buffering with backpressure
+"""
+
+import logging
+import select
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+from .capture import CaptureWriter, DIRECTION_OUT
+from .lanes import LANE_CONTROL, LANE_NAMES, LANE_REQUEST
+from .metrics import LatencyStats
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundQueue:
+    """
+    Bounded outbound frame queue with a dedicated writer thread.
+
+    Frames are pre-serialized (length header included) when they are queued,
+    so a slow or stalled vdSM never blocks the thread that produced them.
+    Frames are queued in priority lanes (see ``lanes``); the writer always
+    drains the control lane first, then requests, then bulk traffic, so a
+    pong is never stuck behind an announce burst. Each frame also belongs
+    to one of two message classes:
+
+    - Frames without a coalesce key (responses, announcements, vanish) are
+      always delivered, in order.
+    - Frames with a coalesce key (push notifications) are collapsed to the
+      latest value per key once the queue is above its high-water mark.
+      The queued frame keeps its position and only its payload is replaced.
+
+    If the peer stops reading entirely, memory and latency stay bounded:
+    pushes beyond ``max_frames`` are dropped, bulk producers that pass
+    ``block=True`` wait while the queue is above its high-water mark, and a
+    must-deliver frame that cannot be queued in time or a send that exceeds
+    ``send_timeout`` marks the queue as stalled and shuts the socket down so
+    the session can be torn down. Blocking producers therefore always leave
+    the room between ``high_water`` and ``max_frames`` to responses, and
+    control frames (pongs) are queued even beyond ``max_frames``.
+    """
+
+    DEFAULT_HIGH_WATER = 256
+    DEFAULT_MAX_FRAMES = 4096
+    DEFAULT_SEND_TIMEOUT = 10.0
+    MAX_BATCH_BYTES = 65536
+
+    def __init__(self, sock: socket.socket, high_water: int = DEFAULT_HIGH_WATER,
+                 max_frames: int = DEFAULT_MAX_FRAMES,
+                 send_timeout: float = DEFAULT_SEND_TIMEOUT,
+                 latency: Optional[List[LatencyStats]] = None):
+        """
+        Initialize an outbound queue.
+
+        Args:
+            sock: Connected socket (or transport connection) to write to
+            high_water: Queue depth above which push notifications coalesce
+            max_frames: Hard limit on queued frames
+            send_timeout: Seconds a single write may block before the peer
+                          is considered stalled
+            latency: Per-lane latency accumulators (queue-to-write time),
+                     created if not given
+        """
+        if high_water > max_frames:
+            raise ValueError(f"high_water {high_water} exceeds max_frames {max_frames}")
+
+        self.sock = sock
+        # Real sockets are waited on with select; in-memory connections take a send timeout
+        self._selectable = isinstance(sock, socket.socket)
+        self.high_water = high_water
+        self.max_frames = max_frames
+        self.send_timeout = send_timeout
+
+        # Entries are [coalesce_key, frame, queued_at] lists so that a pending
+        # push can be updated in place without losing its position in the queue
+        self._lanes: List[Deque[List[Any]]] = [deque() for _ in LANE_NAMES]
+        self._size = 0
+        self._pending: Dict[Hashable, List[Any]] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._above_high_water = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.stalled = False
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "sent": 0,
+            "bytes_sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "high_water_events": 0,
+            "stalls": 0,
+            "max_depth": 0,
+        }
+        self.latency = latency if latency is not None else [LatencyStats() for _ in LANE_NAMES]
+
+        # Optional traffic capture of everything actually written
+        self.capture: Optional[CaptureWriter] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        self._thread = threading.Thread(target=self._run, name="vdc-outbound", daemon=True)
+        self._thread.start()
+
+    def close(self, flush_timeout: float = 0.0) -> None:
+        """
+        Stop the writer thread.
+
+        Args:
+            flush_timeout: Seconds to wait for queued frames to be written
+        """
+        with self._cond:
+            if flush_timeout > 0 and not self.stalled:
+                deadline = time.monotonic() + flush_timeout
+                while self._size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self._closed = True
+            self._clear()
+            self._cond.notify_all()
+
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _clear(self) -> None:
+        """Drop all queued frames. Caller holds the lock."""
+        for queue in self._lanes:
+            queue.clear()
+        self._pending.clear()
+        self._size = 0
+
+    def put(self, frame: bytes, coalesce_key: Optional[Hashable] = None,
+            lane: int = LANE_REQUEST, block: bool = False) -> bool:
+        """
+        Queue a framed message for sending.
+
+        Args:
+            frame: Length-prefixed serialized message
+            coalesce_key: Key identifying the state this frame carries (e.g.
+                          device and property names). Frames with a key may be
+                          collapsed or dropped under backpressure; frames
+                          without one are always delivered.
+            lane: Priority lane (LANE_CONTROL, LANE_REQUEST or LANE_BULK)
+            block: Wait up to send_timeout for the queue to drain below its
+                   high-water mark (for bulk producers such as announce bursts)
+
+        Returns:
+            True if the frame was queued (or merged), False if it was dropped
+        """
+        with self._cond:
+            if block and coalesce_key is None and self._size >= self.high_water:
+                deadline = time.monotonic() + self.send_timeout
+                while self._size >= self.high_water and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._mark_stalled("outbound queue not draining")
+                        break
+                    self._cond.wait(remaining)
+
+            if self._closed:
+                return False
+
+            depth = self._size
+            if depth >= self.high_water and not self._above_high_water:
+                self._above_high_water = True
+                self.stats["high_water_events"] += 1
+
+            if coalesce_key is not None:
+                entry = self._pending.get(coalesce_key)
+                if entry is not None and depth >= self.high_water:
+                    # Latest value wins - replace the payload of the queued frame
+                    entry[1] = frame
+                    self.stats["coalesced"] += 1
+                    return True
+                if depth >= self.max_frames:
+                    self.stats["dropped"] += 1
+                    return False
+            elif depth >= self.max_frames and lane != LANE_CONTROL:
+                self._mark_stalled("outbound queue full")
+                return False
+
+            entry = [coalesce_key, frame, time.monotonic()]
+            self._lanes[lane].append(entry)
+            self._size += 1
+            if coalesce_key is not None:
+                self._pending[coalesce_key] = entry
+
+            self.stats["enqueued"] += 1
+            if depth + 1 > self.stats["max_depth"]:
+                self.stats["max_depth"] = depth + 1
+            self._cond.notify()
+            return True
+
+    def _mark_stalled(self, reason: str) -> None:
+        """Flag the peer as stalled and shut the socket down. Caller holds the lock."""
+        if self.stalled:
+            return
+        self.stalled = True
+        self.stats["stalls"] += 1
+        logger.warning(f"vdSM connection stalled ({reason}), closing session")
+        self._closed = True
+        self._clear()
+        self._cond.notify_all()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _take_batch(self) -> Optional[Tuple[bytes, List[Tuple[int, float]]]]:
+        """
+        Wait for frames and pop as many as fit into one write, in lane order.
+
+        Returns:
+            Tuple of (joined frames, [(lane, queued_at), ...]), or None once closed
+        """
+        with self._cond:
+            while not self._size and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+
+            frames = []
+            timings = []
+            size = 0
+            for lane, queue in enumerate(self._lanes):
+                while queue and size < self.MAX_BATCH_BYTES:
+                    entry = queue.popleft()
+                    key, frame, queued_at = entry
+                    if key is not None and self._pending.get(key) is entry:
+                        del self._pending[key]
+                    frames.append(frame)
+                    timings.append((lane, queued_at))
+                    size += len(frame)
+
+            self._size -= len(frames)
+            if self._size < self.high_water:
+                self._above_high_water = False
+            self.stats["sent"] += len(frames)
+            self.stats["bytes_sent"] += size
+            self._cond.notify_all()
+            return b''.join(frames), timings
+
+    def _send(self, data: bytes) -> None:
+        """Write all data, giving up if the peer does not drain within send_timeout."""
+        view = memoryview(data)
+        deadline = time.monotonic() + self.send_timeout
+        while view:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("send timed out")
+            if self._selectable:
+                _, writable, _ = select.select([], [self.sock], [], remaining)
+                if not writable:
+                    continue
+                sent = self.sock.send(view)
+            else:
+                sent = self.sock.send(view, remaining)
+            view = view[sent:]
+
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            data, timings = batch
+            try:
+                self._send(data)
+            except socket.timeout:
+                with self._cond:
+                    self._mark_stalled(f"no progress for {self.send_timeout}s")
+                return
+            except OSError as e:
+                with self._cond:
+                    if not self._closed:
+                        logger.error(f"Outbound write failed: {e}")
+                    self._closed = True
+                    self._clear()
+                    self._cond.notify_all()
+                return
+
+            capture = self.capture
+            if capture is not None:
+                capture.record(DIRECTION_OUT, data)
+
+            now = time.monotonic()
+            for lane, queued_at in timings:
+                self.latency[lane].record(now - queued_at)
@@ -0,0 +1,396 @@
+"""
+Property paths - compiled resolution of setProperty paths to typed setters
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple, Union
+from .genericVDC_pb2 import ResultCode
+
+
+# Trie key of an indexed segment ("buttonInputSettings[].group")
+INDEX = "[]"
+
+_SEGMENT = re.compile(r"([^.\[\]]+)|\[([^\]]*)\]")
+
+# Segment addressing an index (ASCII digits only; str.isdigit also takes "²" or "٣")
+_INDEX_SEGMENT = re.compile(r"[0-9]+")
+
+
+class PropertyPathError(ValueError):
+    """A property write addresses an unknown path or carries an invalid value."""
+
+    def __init__(self, path: str, message: str, code: int = ResultCode.ERR_NOT_FOUND):
+        """
+        Create the error.
+
+        Args:
+            path: Offending property path
+            message: Description of the problem
+            code: ResultCode to report to the vdSM
+        """
+        super().__init__(f"{path}: {message}")
+        self.path = path
+        self.message = message
+        self.code = code
+
+    def __reduce__(self):
+        return type(self), (self.path, self.message, self.code)
+
+
+def parse_path(path: str) -> Tuple[str, ...]:
+    """
+    Split a property path into segments.
+
+    ``buttonInputSettings[0].group`` and ``buttonInputSettings.0.group`` both
+    give ``("buttonInputSettings", "0", "group")``; an empty or ``*`` index
+    (``buttonInputSettings[].group``) gives the INDEX wildcard segment.
+
+    Args:
+        path: Dotted path with optional [index] segments
+
+    Returns:
+        Tuple of segments
+    """
+    segments = []
+    for name, index in _SEGMENT.findall(path):
+        if name:
+            segments.append(name)
+        else:
+            segments.append(INDEX if index in ("", "*") else index)
+    return tuple(segments)
+
+
+class PropertySetter:
+    """
+    Typed write target of a property path.
+
+    Values are checked against ``kind`` (ints are accepted for floats,
+    integral floats for ints, bool is never taken for a number), the
+    optional range and choices and an optional ``validate`` callable, then
+    either assigned to the device attribute ``attr`` or passed to the device
+    method ``method``. For indexed paths the indexes come first:
+    ``method(*indexes, value)``, or ``getattr(device, attr)[index] = value``.
+    Indexes are checked when the request is planned: the first against
+    ``count`` if given, and every index against the length of the ``attr``
+    container at its level (the first only without ``count``). The
+    current value is read from ``attr``, or from ``read`` for method setters.
+    """
+
+    __slots__ = ("kind", "attr", "method", "minimum", "maximum", "choices", "validate", "count", "read")
+
+    def __init__(self, kind: Optional[type] = None, attr: Optional[str] = None, method: Optional[str] = None,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 choices: Optional[Iterable[Any]] = None, validate: Optional[Callable[[Any], bool]] = None,
+                 count: Union[int, str, None] = None, read: Optional[str] = None):
+        """
+        Describe a setter.
+
+        Args:
+            kind: Expected value type (str, int, float, bool, dict) or None for any
+            attr: Device attribute to assign (or container to index into)
+            method: Device method to call instead of assigning
+            minimum: Smallest accepted value
+            maximum: Largest accepted value
+            choices: Accepted values
+            validate: Callable returning False for values to reject
+            count: Number of valid values of the first index: an int, or the
+                   name of a device attribute holding the number or a
+                   sequence of that length (default: the attr container)
+            read: Device attribute (or container) holding the value a
+                  method setter writes, for reading it back (default: attr)
+
+        Raises:
+            ValueError: If neither or both of attr and method are given
+        """
+        if (attr is None) == (method is None):
+            raise ValueError("A property setter needs exactly one of attr and method")
+        self.kind = kind
+        self.attr = attr
+        self.method = method
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = frozenset(choices) if choices is not None else None
+        self.validate = validate
+        self.count = count
+        self.read = read if read is not None else attr
+
+    def check_indexes(self, device: Any, path: str, indexes: Tuple[int, ...]) -> None:
+        """
+        Check that the indexes of a write address existing elements.
+
+        Args:
+            device: Target device
+            path: Property path (for error messages)
+            indexes: Values of the path's indexed segments
+
+        Raises:
+            PropertyPathError: With ERR_INVALID_VALUE_TYPE for an index out of range
+        """
+        count = self.count
+        if count is not None:
+            if type(count) is str:
+                count = getattr(device, count)
+                if type(count) is not int:
+                    count = len(count)
+            if indexes[0] >= count:
+                raise PropertyPathError(path, f"index {indexes[0]} out of range", ResultCode.ERR_INVALID_VALUE_TYPE)
+        if self.attr is None:
+            return
+        container = getattr(device, self.attr)
+        for level, index in enumerate(indexes):
+            if isinstance(container, Mapping):
+                return  # assigning adds the key
+            if index >= len(container):
+                if level == 0 and count is not None:
+                    return  # within count; the element does not exist yet
+                raise PropertyPathError(path, f"index {index} out of range", ResultCode.ERR_INVALID_VALUE_TYPE)
+            container = container[index]
+
+    def coerce(self, path: str, value: Any) -> Any:
+        """
+        Check a value and convert it to the setter's type.
+
+        Args:
+            path: Property path (for error messages)
+            value: Value from the request
+
+        Returns:
+            Converted value
+
+        Raises:
+            PropertyPathError: With ERR_INVALID_VALUE_TYPE if the value is rejected
+        """
+        kind = self.kind
+        if kind is not None and type(value) is not kind:
+            if kind is float and type(value) is int:
+                value = float(value)
+            elif kind is int and type(value) is float and value.is_integer():
+                value = int(value)
+            else:
+                raise PropertyPathError(path, f"expected {kind.__name__}, got {type(value).__name__}",
+                                        ResultCode.ERR_INVALID_VALUE_TYPE)
+        if self.minimum is not None and value < self.minimum:
+            raise PropertyPathError(path, f"{value} is below {self.minimum}", ResultCode.ERR_INVALID_VALUE_TYPE)
+        if self.maximum is not None and value > self.maximum:
+            raise PropertyPathError(path, f"{value} is above {self.maximum}", ResultCode.ERR_INVALID_VALUE_TYPE)
+        if self.choices is not None and value not in self.choices:
+            raise PropertyPathError(path, f"{value!r} is not an accepted value", ResultCode.ERR_INVALID_VALUE_TYPE)
+        if self.validate is not None and not self.validate(value):
+            raise PropertyPathError(path, f"{value!r} is not valid", ResultCode.ERR_INVALID_VALUE_TYPE)
+        return value
+
+    def apply(self, device: Any, indexes: Tuple[int, ...], value: Any) -> None:
+        """
+        Write a checked value to a device.
+
+        Args:
+            device: Target device
+            indexes: Values of the path's indexed segments
+            value: Value returned by coerce
+        """
+        if self.method is not None:
+            getattr(device, self.method)(*indexes, value)
+        elif indexes:
+            container = getattr(device, self.attr)
+            for index in indexes[:-1]:
+                container = container[index]
+            container[indexes[-1]] = value
+        else:
+            setattr(device, self.attr, value)
+
+    def current(self, device: Any, indexes: Tuple[int, ...]) -> Any:
+        """
+        Read the value this setter writes back from a device.
+
+        Args:
+            device: Target device
+            indexes: Values of the path's indexed segments
+
+        Returns:
+            The current value
+
+        Raises:
+            LookupError: If the setter has nothing to read from or an index is out of range
+        """
+        if self.read is None:
+            raise LookupError(f"{self!r} cannot be read back")
+        value = getattr(device, self.read)
+        for index in indexes:
+            value = value[index]
+        return value
+
+    def __repr__(self) -> str:
+        target = f"attr={self.attr!r}" if self.attr is not None else f"method={self.method!r}"
+        kind = self.kind.__name__ if self.kind is not None else "any"
+        return f"PropertySetter({kind}, {target})"
+
+
+class PropertyWrite(NamedTuple):
+    """One validated write, ready to be applied."""
+
+    path: str
+    setter: PropertySetter
+    indexes: Tuple[int, ...]
+    value: Any
+
+    def apply(self, device: Any) -> None:
+        self.setter.apply(device, self.indexes, self.value)
+
+
+class _Node:
+    __slots__ = ("children", "index", "setter")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.index: Optional["_Node"] = None
+        self.setter: Optional[PropertySetter] = None
+
+
+class PropertyPathTrie:
+    """
+    Writable property paths of a device class, compiled into a trie.
+
+    Resolving a request walks the trie along the request's property tree,
+    so each key costs one dictionary lookup, and all writes are validated
+    before any of them is applied.
+    """
+
+    def __init__(self, setters: Mapping[str, PropertySetter]):
+        """
+        Compile setters.
+
+        Args:
+            setters: Mapping of path pattern (e.g. "name", "output.value",
+                     "buttonInputSettings[].group") to PropertySetter
+        """
+        self._root = _Node()
+        self.paths = tuple(setters)
+        for pattern, setter in setters.items():
+            node = self._root
+            for segment in parse_path(pattern):
+                if segment == INDEX:
+                    if node.index is None:
+                        node.index = _Node()
+                    node = node.index
+                else:
+                    node = node.children.setdefault(segment, _Node())
+            node.setter = setter
+
+    def __contains__(self, name: str) -> bool:
+        """Check whether a top-level property name is writable."""
+        return name in self._root.children or (self._root.index is not None and _INDEX_SEGMENT.fullmatch(name) is not None)
+
+    def _child(self, node: _Node, segment: str, indexes: Tuple[int, ...], path: str) -> Tuple[_Node, Tuple[int, ...]]:
+        child = node.children.get(segment)
+        if child is not None:
+            return child, indexes
+        if node.index is not None and _INDEX_SEGMENT.fullmatch(segment):
+            return node.index, indexes + (int(segment),)
+        raise PropertyPathError(path, "unknown property")
+
+    def _collect(self, node: _Node, path: str, indexes: Tuple[int, ...], value: Any,
+                 out: List[PropertyWrite], device: Any) -> None:
+        setter = node.setter
+        if setter is not None and (type(value) is not dict or setter.kind is dict):
+            if indexes and device is not None:
+                setter.check_indexes(device, path, indexes)
+            out.append(PropertyWrite(path, setter, indexes, setter.coerce(path, value)))
+            return
+        if type(value) is not dict:
+            raise PropertyPathError(path, "expected a property subtree", ResultCode.ERR_INVALID_VALUE_TYPE)
+        prefix = path + "." if path else ""
+        for name, child_value in value.items():
+            child_path = prefix + name
+            child, child_indexes = self._child(node, name, indexes, child_path)
+            self._collect(child, child_path, child_indexes, child_value, out, device)
+
+    def plan(self, properties: Dict[str, Any], device: Any = None) -> List[PropertyWrite]:
+        """
+        Resolve and validate a nested property dictionary.
+
+        Args:
+            properties: Property tree as returned by property_tree_to_dict
+            device: Target device whose containers bound the indexes (None: unchecked)
+
+        Returns:
+            Validated writes in request order
+
+        Raises:
+            PropertyPathError: For the first unknown path or invalid value
+        """
+        out: List[PropertyWrite] = []
+        self._collect(self._root, "", (), properties, out, device)
+        return out
+
+    def plan_path(self, path: str, value: Any, device: Any = None) -> List[PropertyWrite]:
+        """
+        Resolve and validate a write to a single path.
+
+        Args:
+            path: Property path, e.g. "buttonInputSettings[0].group"
+            value: New value (a dictionary writes a subtree)
+            device: Target device whose containers bound the indexes (None: unchecked)
+
+        Returns:
+            Validated writes
+
+        Raises:
+            PropertyPathError: If the path is unknown or the value invalid
+        """
+        node = self._root
+        indexes: Tuple[int, ...] = ()
+        for segment in parse_path(path):
+            node, indexes = self._child(node, segment, indexes, path)
+        out: List[PropertyWrite] = []
+        self._collect(node, path, indexes, value, out, device)
+        return out
+
+    def lookup(self, path: str) -> Tuple[PropertySetter, Tuple[int, ...]]:
+        """
+        Resolve a single path to its setter, without a value.
+
+        Args:
+            path: Property path, e.g. "buttonInputSettings[0].group"
+
+        Returns:
+            Tuple of (setter, index values)
+
+        Raises:
+            PropertyPathError: With ERR_NOT_FOUND if the path does not name a setter
+        """
+        node = self._root
+        indexes: Tuple[int, ...] = ()
+        for segment in parse_path(path):
+            node, indexes = self._child(node, segment, indexes, path)
+        if node.setter is None:
+            raise PropertyPathError(path, "unknown property")
+        return node.setter, indexes
+
+    def __repr__(self) -> str:
+        return f"PropertyPathTrie(paths={len(self.paths)})"
+
+
+# Compiled tries shared by all devices of a class
+_TRIE_CACHE: Dict[type, PropertyPathTrie] = {}
+
+
+def get_path_trie(cls: type) -> PropertyPathTrie:
+    """
+    Get the compiled setter trie of a device class.
+
+    ``PROPERTY_SETTERS`` of the class and its bases are merged, subclasses
+    overriding their bases' entries.
+
+    Args:
+        cls: Device class
+
+    Returns:
+        The shared PropertyPathTrie
+    """
+    trie = _TRIE_CACHE.get(cls)
+    if trie is None:
+        setters: Dict[str, PropertySetter] = {}
+        for klass in reversed(cls.__mro__):
+            setters.update(getattr(klass, "__dict__", {}).get("PROPERTY_SETTERS", {}))
+        trie = _TRIE_CACHE.setdefault(cls, PropertyPathTrie(setters))
+    return trie
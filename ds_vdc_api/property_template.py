@@ -0,0 +1,205 @@
+"""
+Property templates - pre-encoded property trees with slots for dynamic values
+"""
+
+import copy
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .property_tree import _encode_element, _encode_name
+from .wire import encode_varint as _varint
+
+
+class Slot:
+    """
+    Placeholder for a dynamic value in a property schema.
+
+    The value is read from the device attribute of the given name each time
+    the template is rendered or encoded; with an index, from that item of
+    the attribute (e.g. one entry of an array of sensor values).
+    """
+
+    __slots__ = ("attr", "index")
+
+    def __init__(self, attr: str, index: Optional[int] = None):
+        """
+        Create a slot.
+
+        Args:
+            attr: Name of the device attribute holding the value
+            index: Item of the attribute holding the value, if it is a sequence
+        """
+        self.attr = attr
+        self.index = index
+
+    def get(self, device: Any) -> Any:
+        """Read the slot value from a device."""
+        value = getattr(device, self.attr)
+        return value if self.index is None else value[self.index]
+
+    def __repr__(self) -> str:
+        if self.index is None:
+            return f"Slot({self.attr!r})"
+        return f"Slot({self.attr!r}, {self.index})"
+
+
+# Compiled operations
+_CONST = 0   # (kind, pre-encoded bytes)
+_SLOT = 1    # (kind, tag, name, attribute, index or None)
+_NODE = 2    # (kind, tag, encoded name, child operations)
+
+_Op = Tuple[Any, ...]
+
+
+def _has_slot(value: Any) -> bool:
+    """Check whether a schema value contains a Slot anywhere."""
+    if isinstance(value, Slot):
+        return True
+    if isinstance(value, dict):
+        return any(_has_slot(child) for child in value.values())
+    return False
+
+
+def _compile(schema: Dict[str, Any], tag: bytes) -> List[_Op]:
+    """Compile one level of a schema; runs of constant elements become one byte string."""
+    ops: List[_Op] = []
+    constant: List[bytes] = []
+
+    for name, value in schema.items():
+        if not _has_slot(value):
+            element = _encode_element(name, value)
+            constant.append(tag + _varint(len(element)) + element)
+            continue
+        if constant:
+            ops.append((_CONST, b''.join(constant)))
+            constant = []
+        if isinstance(value, Slot):
+            ops.append((_SLOT, tag, name, value.attr, value.index))
+        else:
+            ops.append((_NODE, tag, _encode_name(name), _compile(value, b'\x1a')))
+
+    if constant:
+        ops.append((_CONST, b''.join(constant)))
+    return ops
+
+
+def _encode(ops: List[_Op], device: Any, out: List[bytes]) -> None:
+    """Run compiled operations, appending encoded elements to out."""
+    for op in ops:
+        kind = op[0]
+        if kind == _CONST:
+            out.append(op[1])
+        elif kind == _SLOT:
+            value = getattr(device, op[3])
+            if op[4] is not None:
+                value = value[op[4]]
+            element = _encode_element(op[2], value)
+            out.append(op[1] + _varint(len(element)) + element)
+        else:
+            children: List[bytes] = []
+            _encode(op[3], device, children)
+            body = op[2] + b''.join(children)
+            out.append(op[1] + _varint(len(body)) + body)
+
+
+def _render(schema: Dict[str, Any], device: Any) -> Dict[str, Any]:
+    """Resolve all slots of a schema into a new dictionary."""
+    result: Dict[str, Any] = {}
+    for name, value in schema.items():
+        if isinstance(value, Slot):
+            result[name] = value.get(device)
+        elif isinstance(value, dict):
+            result[name] = _render(value, device)
+        else:
+            result[name] = value
+    return result
+
+
+class PropertyTemplate:
+    """
+    A property schema compiled into pre-encoded wire bytes.
+
+    A schema is a nested dictionary like the ones passed to
+    ``build_property_tree``, where any value may be a ``Slot``. All constant
+    parts are encoded once at compile time; encoding a device then only
+    encodes its slot values and the lengths of the nodes containing them.
+    Templates are immutable and meant to be shared by all devices of the
+    same class and model.
+    """
+
+    def __init__(self, schema: Dict[str, Any], field_number: int = 1):
+        """
+        Compile a schema.
+
+        Args:
+            schema: Nested property dictionary with constant values and Slots
+            field_number: Field number of the repeated PropertyElement field
+                          the encoded tree is embedded in (1 for getProperty
+                          responses)
+        """
+        self.schema = copy.deepcopy(schema)
+        self.names = frozenset(schema)
+        self.slots = self._collect_slots(self.schema)
+        self._ops = _compile(self.schema, _varint((field_number << 3) | 2))
+
+    @staticmethod
+    def _collect_slots(schema: Dict[str, Any]) -> Tuple[str, ...]:
+        attrs: List[str] = []
+        for value in schema.values():
+            if isinstance(value, Slot):
+                attrs.append(value.attr)
+            elif isinstance(value, dict):
+                attrs.extend(PropertyTemplate._collect_slots(value))
+        return tuple(attrs)
+
+    def encode(self, device: Any) -> bytes:
+        """
+        Encode the property tree of a device.
+
+        Produces the same bytes as ``encode_property_tree(self.render(device))``.
+
+        Args:
+            device: Object providing the slot attributes
+
+        Returns:
+            Encoded repeated PropertyElement entries
+        """
+        out: List[bytes] = []
+        _encode(self._ops, device, out)
+        return b''.join(out)
+
+    def render(self, device: Any) -> Dict[str, Any]:
+        """
+        Build the property dictionary of a device.
+
+        Args:
+            device: Object providing the slot attributes
+
+        Returns:
+            New nested dictionary (no sub-dictionary is shared with the schema)
+        """
+        return _render(self.schema, device)
+
+    def __repr__(self) -> str:
+        return f"PropertyTemplate(properties={len(self.names)}, slots={self.slots})"
+
+
+# Compiled templates shared across devices, keyed by the caller
+_TEMPLATE_CACHE: Dict[Any, PropertyTemplate] = {}
+
+
+def get_template(key: Any, schema: Union[Dict[str, Any], Any]) -> PropertyTemplate:
+    """
+    Get a shared compiled template, compiling it on first use.
+
+    Args:
+        key: Hashable identity of the schema (e.g. device class and model)
+        schema: Schema dictionary, or a callable returning it, used on a cache miss
+
+    Returns:
+        The shared PropertyTemplate
+    """
+    template = _TEMPLATE_CACHE.get(key)
+    if template is None:
+        template = PropertyTemplate(schema() if callable(schema) else schema)
+        # Concurrent first uses may compile twice; both results are equivalent
+        template = _TEMPLATE_CACHE.setdefault(key, template)
+    return template
@@ -2,8 +2,10 @@
 Property tree utilities for building and manipulating vDC property structures
 """
 
+import struct
 from typing import Any, Dict, List, Union
 from .genericVDC_pb2 import PropertyElement as PBPropertyElement, PropertyValue as PBPropertyValue
+from .wire import encode_varint as _varint
 
 
 class PropertyValue:
@@ -156,3 +158,97 @@ def property_tree_to_dict(elements: List[PBPropertyElement]) -> Dict[str, Any]:
             result[elem.name] = None
     
     return result
+
+
+# Wire encoding of property trees
+#
+# PropertyElement: name = 1 (string), value = 2 (PropertyValue), elements = 3 (repeated)
+# PropertyValue:   v_bool = 1, v_uint64 = 2, v_int64 = 3, v_double = 4, v_string = 5, v_bytes = 6
+
+_DOUBLE_PACK = struct.Struct('<d').pack
+_NAME_CACHE: Dict[str, bytes] = {}
+_NAME_CACHE_LIMIT = 4096
+
+
+def _encode_name(name: str) -> bytes:
+    """Encode the name field of a PropertyElement (cached, names repeat a lot)."""
+    encoded = _NAME_CACHE.get(name)
+    if encoded is None:
+        data = name.encode('utf-8')
+        encoded = b'\x0a' + _varint(len(data)) + data
+        if len(_NAME_CACHE) < _NAME_CACHE_LIMIT:
+            _NAME_CACHE[name] = encoded
+    return encoded
+
+
+def encode_property_value(value: Any) -> bytes:
+    """
+    Encode a Python value as PropertyValue wire bytes.
+    
+    Follows the same type rules as PropertyValue.from_python.
+    
+    Args:
+        value: Python value (bool, int, float, str, bytes)
+        
+    Returns:
+        Serialized PropertyValue
+    """
+    if value is True:
+        return b'\x08\x01'
+    if value is False:
+        return b'\x08\x00'
+    if isinstance(value, int):
+        if value < 0:
+            if value < -(1 << 63):
+                raise ValueError(f"Value out of range for int64: {value}")
+            return b'\x18' + _varint(value + (1 << 64))
+        if value >= (1 << 64):
+            raise ValueError(f"Value out of range for uint64: {value}")
+        return b'\x10' + _varint(value)
+    if isinstance(value, float):
+        return b'\x21' + _DOUBLE_PACK(value)
+    if isinstance(value, str):
+        data = value.encode('utf-8')
+        return b'\x2a' + _varint(len(data)) + data
+    if isinstance(value, bytes):
+        return b'\x32' + _varint(len(value)) + value
+    raise TypeError(f"Unsupported property value type: {type(value)}")
+
+
+def _encode_element(name: str, value: Any) -> bytes:
+    """Encode one PropertyElement (without its own tag and length)."""
+    if isinstance(value, dict):
+        children = [b'\x1a' + _varint(len(child)) + child
+                    for child in (_encode_element(k, v) for k, v in value.items())]
+        return _encode_name(name) + b''.join(children)
+    if value is None:
+        return _encode_name(name)
+    encoded = encode_property_value(value)
+    return _encode_name(name) + b'\x12' + _varint(len(encoded)) + encoded
+
+
+def encode_property_tree(data: Dict[str, Any], field_number: int = 1) -> bytes:
+    """
+    Encode a nested dictionary directly into repeated PropertyElement wire bytes.
+    
+    This is the wire-level equivalent of ``build_property_tree`` followed by
+    serialization, without creating the intermediate protobuf objects. The
+    result is a sequence of length-delimited entries for field ``field_number``
+    and can be spliced into an enclosing message as an already-encoded
+    repeated field.
+    
+    Args:
+        data: Dictionary representing the property tree (same shape as for
+              build_property_tree)
+        field_number: Field number of the repeated PropertyElement field in
+                      the enclosing message
+              
+    Returns:
+        Encoded repeated field entries
+    """
+    tag = _varint((field_number << 3) | 2)
+    parts = []
+    for name, value in data.items():
+        element = _encode_element(name, value)
+        parts.append(tag + _varint(len(element)) + element)
+    return b''.join(parts)
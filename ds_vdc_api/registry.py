@@ -0,0 +1,214 @@
+"""
+Device registry - copy-on-write device map with lock-free readers
+"""
+
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+from .vdc_device import VdcDevice
+
+
+class RegistrySnapshot(Mapping):
+    """
+    Immutable view of the registry at one version.
+
+    A snapshot never changes after it was published, so it can be iterated
+    and looked up from any thread while writers publish newer versions.
+    """
+
+    __slots__ = ("_devices", "version")
+
+    def __init__(self, devices: Dict[str, VdcDevice], version: int):
+        self._devices = devices
+        self.version = version
+
+    def __getitem__(self, dsuid: str) -> VdcDevice:
+        return self._devices[dsuid]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._devices)
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __contains__(self, dsuid: object) -> bool:
+        return dsuid in self._devices
+
+    def get(self, dsuid: str, default: Optional[VdcDevice] = None) -> Optional[VdcDevice]:
+        return self._devices.get(dsuid, default)
+
+
+class RegistryBatch:
+    """Changes collected by DeviceRegistry.batch() and published together."""
+
+    def __init__(self) -> None:
+        self.added: List[VdcDevice] = []
+        self.removed: List[str] = []
+
+    def add(self, device: VdcDevice) -> None:
+        """Queue a device to be added (or replaced)."""
+        self.added.append(device)
+
+    def remove(self, dsuid: str) -> None:
+        """Queue a device to be removed."""
+        self.removed.append(dsuid)
+
+
+class DeviceRegistry(Mapping):
+    """
+    Device map keyed by dSUID with copy-on-write updates.
+
+    Readers never lock: every read goes to the current snapshot, which is a
+    plain dict that is never mutated once published. Writers serialize on a
+    lock, copy the dict, apply their changes and publish the new snapshot
+    with a single reference assignment. Publishing is one atomic store both
+    with the GIL and under free-threaded CPython, and version and contents
+    are swapped together, so a reader can never observe a torn state.
+
+    Each write copies the whole map, so bulk changes should be grouped with
+    ``update`` or ``batch`` to publish them as one version.
+
+    Iterating the registry iterates the snapshot current at the start of
+    the iteration. Code doing several lookups that must agree should call
+    ``snapshot()`` once and use the result.
+    """
+
+    def __init__(self, devices: Iterable[VdcDevice] = ()):
+        """
+        Initialize a registry.
+
+        Args:
+            devices: Initial devices
+        """
+        self._write_lock = threading.Lock()
+        self._snapshot = RegistrySnapshot({device.dsuid: device for device in devices}, 0)
+
+    def snapshot(self) -> RegistrySnapshot:
+        """
+        Get the current immutable snapshot.
+
+        Returns:
+            Snapshot of all devices with its version
+        """
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Version number, incremented by every published change."""
+        return self._snapshot.version
+
+    def __getitem__(self, dsuid: str) -> VdcDevice:
+        return self._snapshot[dsuid]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, dsuid: object) -> bool:
+        return dsuid in self._snapshot
+
+    def get(self, dsuid: str, default: Optional[VdcDevice] = None) -> Optional[VdcDevice]:
+        return self._snapshot.get(dsuid, default)
+
+    def add(self, device: VdcDevice) -> int:
+        """
+        Add or replace a device.
+
+        Args:
+            device: Device to add
+
+        Returns:
+            Version of the published snapshot
+        """
+        return self.update(add=(device,))
+
+    def remove(self, dsuid: str, expected: Optional[VdcDevice] = None) -> Optional[VdcDevice]:
+        """
+        Remove a device.
+
+        Args:
+            dsuid: dSUID of the device to remove
+            expected: Only remove the entry if it is this device object
+
+        Returns:
+            The removed device, or None if nothing was removed
+        """
+        with self._write_lock:
+            current = self._snapshot
+            device = current.get(dsuid)
+            if device is None or (expected is not None and device is not expected):
+                return None
+            devices = dict(current._devices)
+            del devices[dsuid]
+            self._snapshot = RegistrySnapshot(devices, current.version + 1)
+        return device
+
+    def update(self, add: Iterable[VdcDevice] = (), remove: Iterable[str] = ()) -> int:
+        """
+        Apply several changes as one published version.
+
+        Removals are applied before additions.
+
+        Args:
+            add: Devices to add or replace
+            remove: dSUIDs of devices to remove (unknown dSUIDs are ignored)
+
+        Returns:
+            Version of the current snapshot (unchanged if there was nothing to do)
+        """
+        add = list(add)
+        remove = list(remove)
+        with self._write_lock:
+            current = self._snapshot
+            if not add and not any(dsuid in current for dsuid in remove):
+                return current.version
+            devices = dict(current._devices)
+            for dsuid in remove:
+                devices.pop(dsuid, None)
+            for device in add:
+                devices[device.dsuid] = device
+            self._snapshot = RegistrySnapshot(devices, current.version + 1)
+            return current.version + 1
+
+    def batch(self) -> "_BatchContext":
+        """
+        Collect changes and publish them as one version on exit.
+
+        Nothing is published if the block raises.
+
+        Example:
+            with registry.batch() as batch:
+                for device in discovered:
+                    batch.add(device)
+        """
+        return _BatchContext(self)
+
+    def __setitem__(self, dsuid: str, device: VdcDevice) -> None:
+        if dsuid != device.dsuid:
+            raise ValueError(f"Key {dsuid} does not match device dSUID {device.dsuid}")
+        self.add(device)
+
+    def __delitem__(self, dsuid: str) -> None:
+        if self.remove(dsuid) is None:
+            raise KeyError(dsuid)
+
+    def __repr__(self) -> str:
+        snapshot = self._snapshot
+        return f"DeviceRegistry(version={snapshot.version}, devices={len(snapshot)})"
+
+
+class _BatchContext:
+    """Context manager returned by DeviceRegistry.batch()."""
+
+    def __init__(self, registry: DeviceRegistry):
+        self._registry = registry
+        self._batch = RegistryBatch()
+
+    def __enter__(self) -> RegistryBatch:
+        return self._batch
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self._registry.update(self._batch.added, self._batch.removed)
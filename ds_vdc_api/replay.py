@@ -0,0 +1,225 @@
+"""
+Capture replay - drive a vDC host with recorded vdSM traffic and compare responses
+
+Usage:
+    python -m ds_vdc_api.replay capture.bin --port 8444 --speed 1     # real time
+    python -m ds_vdc_api.replay capture.bin --speed 10                # 10x faster
+    python -m ds_vdc_api.replay capture.bin --speed 0                 # unthrottled
+    python -m ds_vdc_api.replay capture.bin --info                    # summarize only
+"""
+
+import argparse
+import logging
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from .capture import CaptureReader, DIRECTION_IN, DIRECTION_OUT
+from .genericVDC_pb2 import Type
+from .message_handler import MessageHandler
+from .metrics import LatencyStats
+from .wire import peek_header, message_type_name
+
+
+logger = logging.getLogger(__name__)
+
+# Response the host sends for a request type; other requests carrying a
+# message_id are answered with a GENERIC_RESPONSE
+_RESPONSE_FOR = {
+    Type.VDSM_REQUEST_HELLO: Type.VDC_RESPONSE_HELLO,
+    Type.VDSM_REQUEST_GET_PROPERTY: Type.VDC_RESPONSE_GET_PROPERTY,
+    Type.VDSM_SEND_PING: Type.VDC_SEND_PONG,
+}
+
+# Messages sent by the host in answer to a request, matched by message_id
+RESPONSE_TYPES = frozenset([Type.GENERIC_RESPONSE, *_RESPONSE_FOR.values()])
+
+_Key = Tuple[int, int]  # (message type, message_id)
+_FRAME_LENGTH = struct.Struct(">H")
+
+
+def summarize(reader: CaptureReader) -> Dict[str, Any]:
+    """
+    Count the frames of a capture by direction and message type.
+
+    Args:
+        reader: Open capture
+
+    Returns:
+        Dictionary with duration (s), frame counts and per-type counts
+    """
+    counts: Dict[int, Counter] = {DIRECTION_IN: Counter(), DIRECTION_OUT: Counter()}
+    last = 0
+    for offset, direction, data in reader.frames():
+        counts[direction][peek_header(data)[0]] += 1
+        last = offset
+    return {
+        "duration": last / 1e9,
+        "inbound": sum(counts[DIRECTION_IN].values()),
+        "outbound": sum(counts[DIRECTION_OUT].values()),
+        "inbound_types": {message_type_name(t): n for t, n in counts[DIRECTION_IN].most_common()},
+        "outbound_types": {message_type_name(t): n for t, n in counts[DIRECTION_OUT].most_common()},
+    }
+
+
+def replay(path: str, host: str = "127.0.0.1", port: int = 8444, speed: float = 1.0,
+           settle: float = 2.0) -> Dict[str, Any]:
+    """
+    Send the inbound frames of a capture to a vDC host and compare its responses.
+
+    The host should be configured with the same vDCs and devices as the one
+    the capture was taken from. Responses (see RESPONSE_TYPES) are matched to
+    the captured ones by message type and message_id, in order, and compared
+    byte for byte. Announcements and pushes are counted, not compared.
+
+    Args:
+        path: Capture file
+        host: Address of the vDC host
+        port: Port of the vDC host
+        speed: Time scale relative to the capture (1.0 real time, 10.0 ten
+               times faster, 0 unthrottled)
+        settle: Seconds to wait for outstanding responses after the last frame
+
+    Returns:
+        Dictionary with counts (sent, received, matched, mismatched, missing,
+        unexpected), duration, a response latency summary and the first
+        mismatches as (type name, message_id) pairs
+    """
+    expected: Dict[_Key, Deque[bytes]] = defaultdict(deque)
+    inbound: List[Tuple[int, bytes]] = []
+    with CaptureReader(path) as reader:
+        for offset, direction, data in reader.frames():
+            if direction == DIRECTION_IN:
+                inbound.append((offset, bytes(data)))
+            else:
+                msg_type, message_id = peek_header(data)
+                if msg_type in RESPONSE_TYPES:
+                    expected[(msg_type, message_id)].append(bytes(data))
+
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    received: Dict[_Key, Deque[Tuple[float, bytes]]] = defaultdict(deque)
+    other: Counter = Counter()
+    state = {"received": 0}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def read_responses() -> None:
+        while not done.is_set():
+            try:
+                data = MessageHandler.receive_frame(sock)
+            except OSError:
+                return
+            if data is None:
+                return
+            now = time.monotonic()
+            msg_type, message_id = peek_header(data)
+            with lock:
+                state["received"] += 1
+                if msg_type in RESPONSE_TYPES:
+                    received[(msg_type, message_id)].append((now, data))
+                else:
+                    other[message_type_name(msg_type)] += 1
+
+    reader_thread = threading.Thread(target=read_responses, name="replay-reader", daemon=True)
+    reader_thread.start()
+
+    sent_at: Dict[_Key, Deque[float]] = defaultdict(deque)
+    started = time.monotonic()
+    for offset, data in inbound:
+        if speed > 0:
+            delay = started + offset / 1e9 / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        msg_type, message_id = peek_header(data)
+        response_type = _RESPONSE_FOR.get(msg_type)
+        if response_type is None and message_id and msg_type != Type.GENERIC_RESPONSE:
+            response_type = Type.GENERIC_RESPONSE
+        if response_type is not None:
+            sent_at[(response_type, message_id)].append(time.monotonic())
+        sock.sendall(_FRAME_LENGTH.pack(len(data)) + data)
+    sending_time = time.monotonic() - started
+
+    # Wait for outstanding responses
+    total_expected = sum(len(frames) for frames in expected.values())
+    deadline = time.monotonic() + settle
+    while time.monotonic() < deadline:
+        with lock:
+            if sum(len(frames) for frames in received.values()) >= total_expected:
+                break
+        time.sleep(0.01)
+    done.set()
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+    reader_thread.join(timeout=1.0)
+
+    latency = LatencyStats(window=max(1024, len(inbound)))
+    result: Dict[str, Any] = {"sent": len(inbound), "received": state["received"], "matched": 0,
+                              "mismatched": 0, "missing": 0, "unexpected": 0,
+                              "duration": sending_time, "mismatches": []}
+    with lock:
+        for key in set(expected) | set(received):
+            wanted = expected.get(key, deque())
+            got = received.get(key, deque())
+            times = sent_at.get(key, deque())
+            while wanted and got:
+                at, data = got.popleft()
+                if times:
+                    latency.record(at - times.popleft())
+                if data == wanted.popleft():
+                    result["matched"] += 1
+                else:
+                    result["mismatched"] += 1
+                    if len(result["mismatches"]) < 20:
+                        result["mismatches"].append((message_type_name(key[0]), key[1]))
+            result["missing"] += len(wanted)
+            result["unexpected"] += len(got)
+        result["other"] = dict(other)
+    result["latency"] = latency.snapshot()
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Replay a captured vdSM session against a vDC host")
+    parser.add_argument("capture", help="capture file written by VdcHost.start_capture")
+    parser.add_argument("--host", default="127.0.0.1", help="vDC host address")
+    parser.add_argument("--port", type=int, default=8444, help="vDC host port")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="time scale (1 = real time, 10 = 10x faster, 0 = unthrottled)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds to wait for outstanding responses")
+    parser.add_argument("--info", action="store_true", help="only summarize the capture")
+    args = parser.parse_args(argv)
+
+    if args.info:
+        with CaptureReader(args.capture) as reader:
+            summary = summarize(reader)
+        print(f"duration: {summary['duration']:.1f}s, "
+              f"inbound: {summary['inbound']} frames, outbound: {summary['outbound']} frames")
+        for direction in ("inbound_types", "outbound_types"):
+            for name, count in summary[direction].items():
+                print(f"  {direction[:-6]:<9} {name:<45} {count:>8}")
+        return 0
+
+    result = replay(args.capture, args.host, args.port, args.speed, args.settle)
+    latency = result["latency"]
+    print(f"sent {result['sent']} frames in {result['duration']:.2f}s, received {result['received']}")
+    print(f"responses: {result['matched']} matched, {result['mismatched']} mismatched, "
+          f"{result['missing']} missing, {result['unexpected']} unexpected")
+    print(f"response latency: p50 {latency['p50'] * 1000:.2f} ms, p99 {latency['p99'] * 1000:.2f} ms, "
+          f"max {latency['max'] * 1000:.2f} ms")
+    for name, message_id in result["mismatches"]:
+        print(f"  mismatch: {name} message_id={message_id}")
+    return 1 if result["mismatched"] or result["missing"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Poll scheduler - one thread polling device backends for a whole host
+"""
+
+import abc
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from .vdc_device import VdcDevice
+
+
+logger = logging.getLogger(__name__)
+
+
+class PollBackend(abc.ABC):
+    """
+    A hardware or network source that can read several values in one go.
+
+    Subclass this for a Modbus connection, an HTTP API endpoint, etc. and
+    implement ``read``. Jobs sharing a backend that fall due together are
+    read in one call, up to ``max_batch`` keys.
+    """
+
+    max_batch = 64
+
+    @abc.abstractmethod
+    def read(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Read the current values of several keys.
+
+        Args:
+            keys: Backend-specific keys (e.g. register addresses)
+
+        Returns:
+            Dictionary mapping each key that could be read to its value;
+            missing keys count as failed polls
+
+        Raises:
+            Exception: Any error fails the whole batch
+        """
+
+
+class PollJob:
+    """
+    A periodic read of one value for one device.
+
+    Jobs are created by PollScheduler.add_job; the attributes below are
+    maintained by the scheduler and can be inspected for diagnostics.
+    """
+
+    __slots__ = ("device", "name", "backend", "key", "read", "on_value",
+                 "interval", "max_interval", "current_interval", "due",
+                 "failures", "stable_polls", "last_value", "has_value", "active")
+
+    def __init__(self, device: VdcDevice, name: Optional[str], interval: float,
+                 max_interval: float, backend: Optional[PollBackend], key: Hashable,
+                 read: Optional[Callable[[], Any]],
+                 on_value: Optional[Callable[[VdcDevice, Any], None]]):
+        self.device = device
+        self.name = name
+        self.backend = backend
+        self.key = key
+        self.read = read
+        self.on_value = on_value
+        self.interval = interval
+        self.max_interval = max_interval
+        self.current_interval = interval
+        self.due = 0.0
+        self.failures = 0
+        self.stable_polls = 0
+        self.last_value: Any = None
+        self.has_value = False
+        self.active = True
+
+    def __repr__(self) -> str:
+        return (f"PollJob(device={self.device.dsuid}, name={self.name}, "
+                f"interval={self.current_interval:.1f}s, failures={self.failures})")
+
+
+class PollScheduler:
+    """
+    Host-level scheduler for device polling.
+
+    A single thread keeps all jobs in a heap ordered by due time, so the
+    cost per tick does not depend on the number of registered jobs.
+
+    - Start times and intervals are jittered so jobs registered together do
+      not hit their backends in lockstep.
+    - Jobs of the same backend due within ``batch_window`` seconds of each
+      other are read with one ``PollBackend.read`` call.
+    - Failing jobs back off exponentially up to ``max_backoff`` seconds.
+    - After ``stable_after`` identical readings a job's interval grows by
+      ``slowdown`` up to its ``max_interval``; any change resets it.
+
+    Reads run on the scheduler thread, so backends should use short I/O
+    timeouts; a hanging read delays every other job.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[PollJob, Any], None]] = None,
+                 jitter: float = 0.1, batch_window: float = 0.25,
+                 max_backoff: float = 300.0, stable_after: int = 3, slowdown: float = 1.5):
+        """
+        Initialize a poll scheduler.
+
+        Args:
+            on_change: Called with (job, value) after a polled value changed
+                       and was applied to the device
+            jitter: Relative random spread applied to every interval (0.1 = +/-10%)
+            batch_window: Seconds a job may be read early to join a batch
+            max_backoff: Upper bound in seconds for the retry interval of failing jobs
+            stable_after: Identical readings before the interval starts growing
+            slowdown: Factor by which the interval grows for stable values
+        """
+        self.on_change = on_change
+        self.jitter = jitter
+        self.batch_window = batch_window
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.slowdown = slowdown
+
+        self._heap: List[Tuple[float, int, PollJob]] = []
+        self._jobs: Dict[str, List[PollJob]] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.stats: Dict[str, int] = {"polls": 0, "batches": 0, "errors": 0, "changes": 0}
+
+    def add_job(self, device: VdcDevice, interval: float, name: Optional[str] = None,
+                backend: Optional[PollBackend] = None, key: Hashable = None,
+                read: Optional[Callable[[], Any]] = None,
+                on_value: Optional[Callable[[VdcDevice, Any], None]] = None,
+                max_interval: Optional[float] = None) -> PollJob:
+        """
+        Register a periodic read for a device.
+
+        Either ``backend`` (with ``key``) or ``read`` must be given. Changed
+        values are applied with ``on_value(device, value)``, or by default with
+        ``device.update_property(name, value)``, which records them without
+        writing them back to the device, and then reported to on_change.
+
+        Args:
+            device: Device the value belongs to
+            interval: Base poll interval in seconds
+            name: Property name of the value (e.g. "output.value")
+            backend: Batchable backend to read from
+            key: Key of the value within the backend (default: name)
+            read: Callable returning the value, for sources that cannot batch
+            on_value: Custom handler applying a changed value to the device
+            max_interval: Longest interval for stable values (default: 4 * interval)
+
+        Returns:
+            The registered job
+
+        Raises:
+            ValueError: If neither or both of backend and read are given
+        """
+        if (backend is None) == (read is None):
+            raise ValueError("Exactly one of backend and read must be given")
+        if interval <= 0:
+            raise ValueError(f"Poll interval must be positive, got {interval}")
+
+        job = PollJob(device, name, interval, max_interval or interval * 4,
+                      backend, name if key is None else key, read, on_value)
+        # Spread the first reads over one interval
+        job.due = time.monotonic() + random.uniform(0, interval)
+
+        with self._cond:
+            self._jobs.setdefault(device.dsuid, []).append(job)
+            heapq.heappush(self._heap, (job.due, next(self._counter), job))
+            self._cond.notify()
+        return job
+
+    def remove_job(self, job: PollJob) -> None:
+        """
+        Stop polling a job.
+
+        Args:
+            job: Job returned by add_job
+        """
+        with self._cond:
+            job.active = False
+            jobs = self._jobs.get(job.device.dsuid)
+            if jobs and job in jobs:
+                jobs.remove(job)
+                if not jobs:
+                    del self._jobs[job.device.dsuid]
+
+    def remove_device(self, dsuid: str) -> None:
+        """
+        Stop all jobs of a device.
+
+        Args:
+            dsuid: dSUID of the device
+        """
+        with self._cond:
+            for job in self._jobs.pop(dsuid, []):
+                job.active = False
+
+    def jobs(self, dsuid: Optional[str] = None) -> List[PollJob]:
+        """
+        List registered jobs.
+
+        Args:
+            dsuid: Only list jobs of this device
+
+        Returns:
+            List of jobs
+        """
+        with self._cond:
+            if dsuid is not None:
+                return list(self._jobs.get(dsuid, []))
+            return [job for jobs in self._jobs.values() for job in jobs]
+
+    def start(self) -> None:
+        """Start the scheduler thread (no-op if already running)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="vdc-poll", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread; registered jobs are kept."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        """Scheduler thread - wait for the next due job and run everything due."""
+        while True:
+            with self._cond:
+                while self._running:
+                    # Drop cancelled jobs lazily instead of searching the heap on removal
+                    while self._heap and not self._heap[0][2].active:
+                        heapq.heappop(self._heap)
+                    if self._heap:
+                        delay = self._heap[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if not self._running:
+                    return
+                due = self._take_due(time.monotonic() + self.batch_window)
+
+            try:
+                self._poll(due)
+            except Exception as e:
+                logger.error(f"Poll scheduler error: {e}", exc_info=True)
+
+            with self._cond:
+                for job in due:
+                    if job.active:
+                        heapq.heappush(self._heap, (job.due, next(self._counter), job))
+
+    def _take_due(self, until: float) -> List[PollJob]:
+        """Pop all active jobs due before ``until`` (caller holds the lock)."""
+        due = []
+        while self._heap and self._heap[0][0] <= until:
+            job = heapq.heappop(self._heap)[2]
+            if job.active:
+                due.append(job)
+        return due
+
+    def _poll(self, jobs: List[PollJob]) -> None:
+        """Read a set of due jobs, one backend call per batch."""
+        batches: Dict[int, List[PollJob]] = {}
+        for job in jobs:
+            if job.backend is None:
+                try:
+                    value = job.read()
+                except Exception as e:
+                    self._failed(job, e)
+                else:
+                    self._succeeded(job, value)
+            else:
+                batches.setdefault(id(job.backend), []).append(job)
+
+        for batch in batches.values():
+            backend = batch[0].backend
+            for start in range(0, len(batch), backend.max_batch):
+                self._read_batch(backend, batch[start:start + backend.max_batch])
+
+    def _read_batch(self, backend: PollBackend, jobs: List[PollJob]) -> None:
+        """Read the keys of several jobs with one backend call."""
+        self.stats["batches"] += 1
+        try:
+            values = backend.read(list(dict.fromkeys(job.key for job in jobs)))
+        except Exception as e:
+            # One log line per failing batch, not per job
+            if any(not job.failures for job in jobs):
+                logger.warning(f"Reading {len(jobs)} values from {type(backend).__name__} failed: {e}")
+            else:
+                logger.debug(f"Reading {len(jobs)} values from {type(backend).__name__} failed again: {e}")
+            for job in jobs:
+                self._failed(job, e, log=False)
+            return
+
+        for job in jobs:
+            if job.key in values:
+                self._succeeded(job, values[job.key])
+            else:
+                self._failed(job, KeyError(job.key))
+
+    def _succeeded(self, job: PollJob, value: Any) -> None:
+        """Apply a polled value and compute the next interval."""
+        self.stats["polls"] += 1
+        if job.failures:
+            logger.info(f"Polling {job.name} of {job.device.name} recovered after {job.failures} failures")
+            job.failures = 0
+            job.current_interval = job.interval
+
+        if job.has_value and value == job.last_value:
+            job.stable_polls += 1
+            if job.stable_polls >= self.stable_after:
+                job.current_interval = min(job.current_interval * self.slowdown, job.max_interval)
+        else:
+            job.stable_polls = 0
+            job.current_interval = job.interval
+            job.last_value = value
+            job.has_value = True
+            self.stats["changes"] += 1
+            try:
+                if job.on_value is not None:
+                    job.on_value(job.device, value)
+                elif job.name is not None:
+                    job.device.update_property(job.name, value)
+                if self.on_change is not None:
+                    self.on_change(job, value)
+            except Exception as e:
+                logger.error(f"Failed to apply polled {job.name} to {job.device.name}: {e}")
+
+        job.due = time.monotonic() + self._jittered(job.current_interval)
+
+    def _failed(self, job: PollJob, error: Exception, log: bool = True) -> None:
+        """Back off after a failed read."""
+        self.stats["errors"] += 1
+        job.failures += 1
+        job.current_interval = min(job.interval * (2 ** min(job.failures, 16)), self.max_backoff)
+        if log:
+            if job.failures == 1:
+                logger.warning(f"Polling {job.name} of {job.device.name} failed: {error}")
+            else:
+                logger.debug(f"Polling {job.name} of {job.device.name} failed {job.failures} times: {error}")
+        job.due = time.monotonic() + self._jittered(job.current_interval)
+
+    def _jittered(self, interval: float) -> float:
+        """Apply the random spread to an interval."""
+        return interval * (1.0 + random.uniform(-self.jitter, self.jitter))
@@ -0,0 +1,434 @@
+"""
+Sensor inputs - array-backed sensor and binary input values with push rules
+"""
+
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from .property_template import Slot
+
+if TYPE_CHECKING:
+    from .vdc_device import VdcDevice
+    from .vdc_host import VdcHost
+
+
+logger = logging.getLogger(__name__)
+
+# Sensor types (see ds-basics, "Sensor types")
+SENSOR_TEMPERATURE = 1
+SENSOR_HUMIDITY = 2
+SENSOR_ILLUMINATION = 3
+SENSOR_SUPPLY_VOLTAGE = 4
+SENSOR_ACTIVE_POWER = 14
+SENSOR_ELECTRIC_CURRENT = 15
+SENSOR_ENERGY_METER = 16
+SENSOR_APPARENT_POWER = 17
+SENSOR_AIR_PRESSURE = 18
+SENSOR_CO2 = 22
+
+# Sensor usage
+USAGE_UNDEFINED = 0
+USAGE_ROOM = 1
+USAGE_OUTDOOR = 2
+
+# Error codes of sensor and binary input states
+ERROR_OK = 0
+ERROR_NO_DATA = 4  # no sample within the alive timeout (reported like a lost bus connection)
+
+
+class SensorSpec(NamedTuple):
+    """Invariable description of one sensor input and its push rules."""
+
+    sensor_id: str
+    sensor_type: int
+    usage: int = USAGE_UNDEFINED
+    min: float = 0.0
+    max: float = 100.0
+    resolution: float = 0.1
+    deadband: float = 0.0           # smallest change that is pushed (0: any change)
+    min_push_interval: float = 2.0  # seconds between two pushes of the sensor
+    alive_timeout: float = 0.0      # seconds without samples before an error is pushed (0: never)
+
+
+class BinaryInputSpec(NamedTuple):
+    """Invariable description of one binary input and its push rules."""
+
+    input_id: str
+    sensor_function: int = 0
+    usage: int = USAGE_UNDEFINED
+    min_push_interval: float = 0.0
+    alive_timeout: float = 0.0
+
+
+InputSpec = Union[SensorSpec, BinaryInputSpec]
+
+
+class SensorStore:
+    """
+    Current values of a device's sensor (or binary) inputs and their push state.
+
+    Values, sample times and the last pushed values live in ``array('d')``
+    buffers indexed by input index, so recording a sample is a few array
+    writes and one comparison. A sample that differs from the last pushed
+    value by at least the deadband marks the input dirty; while it is dirty,
+    later samples only update the value, and the pipeline pushes the latest
+    one once the minimum push interval since the previous push has passed.
+    Binary inputs push every change.
+    """
+
+    def __init__(self, specs: Iterable[InputSpec]):
+        """
+        Initialize a sensor store.
+
+        Args:
+            specs: Input descriptions in input index order
+        """
+        self.specs: Tuple[InputSpec, ...] = tuple(specs)
+        count = len(self.specs)
+        self.binary = bool(self.specs) and isinstance(self.specs[0], BinaryInputSpec)
+        now = time.monotonic()
+
+        self.values = array('d', [0.0] * count)
+        self.errors = array('b', [ERROR_OK] * count)
+        self.sampled = array('d', [now] * count)  # time of the last sample (creation until then)
+        self.pushed = array('d', [math.nan] * count)  # value last pushed (NaN: never)
+        self.pushed_at = array('d', [-math.inf] * count)
+        self.deadband = array('d', [0.5 if self.binary else spec.deadband for spec in self.specs])
+        self.min_interval = array('d', [spec.min_push_interval for spec in self.specs])
+        self.alive_timeout = array('d', [spec.alive_timeout for spec in self.specs])
+        self.watched = any(self.alive_timeout)
+        self.dirty = bytearray(count)  # 1: value to push
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def sample(self, index: int, value: float, now: float) -> bool:
+        """
+        Record a sample.
+
+        Args:
+            index: Input index
+            value: Sampled value
+            now: Sample time (time.monotonic())
+
+        Returns:
+            True if the input just became dirty and needs to be scheduled for a push
+        """
+        self.values[index] = value
+        self.sampled[index] = now
+        if self.errors[index]:
+            # Recovered: push the value, replacing a pending error report
+            self.errors[index] = ERROR_OK
+        elif self.dirty[index]:
+            return False
+        else:
+            change = abs(value - self.pushed[index])
+            # NaN (never pushed) compares False, so the first sample always goes out
+            if change < self.deadband[index] or change == 0.0:
+                return False
+        if self.dirty[index]:
+            return False
+        self.dirty[index] = 1
+        return True
+
+    def take_due(self, now: float) -> Tuple[List[int], float]:
+        """
+        Collect the dirty inputs whose minimum push interval has passed.
+
+        Their values count as pushed from now on.
+
+        Args:
+            now: Current time (time.monotonic())
+
+        Returns:
+            Indices to push, and the time the next remaining dirty input is due (inf if none)
+        """
+        due: List[int] = []
+        next_due = math.inf
+        dirty = self.dirty
+        for index in range(len(dirty)):
+            if not dirty[index]:
+                continue
+            ready_at = self.pushed_at[index] + self.min_interval[index]
+            if ready_at > now:
+                next_due = min(next_due, ready_at)
+                continue
+            dirty[index] = 0
+            self.pushed[index] = self.values[index]
+            self.pushed_at[index] = now
+            due.append(index)
+        return due, next_due
+
+    def expire(self, now: float) -> bool:
+        """
+        Flag inputs without a sample within their alive timeout.
+
+        Args:
+            now: Current time (time.monotonic())
+
+        Returns:
+            True if an input was newly flagged (and is now dirty)
+        """
+        flagged = False
+        timeouts = self.alive_timeout
+        for index in range(len(timeouts)):
+            timeout = timeouts[index]
+            if timeout and not self.errors[index] and now - self.sampled[index] > timeout:
+                self.errors[index] = ERROR_NO_DATA
+                self.pushed_at[index] = -math.inf  # report the failure without delay
+                self.dirty[index] = 1
+                flagged = True
+        return flagged
+
+    def states(self, indices: Iterable[int], now: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Build the state properties (sensorStates or binaryInputStates entries) of some inputs.
+
+        Args:
+            indices: Input indices
+            now: Current time, for the age of the values
+
+        Returns:
+            Dictionary keyed by input index
+        """
+        states: Dict[str, Dict[str, Any]] = {}
+        for index in indices:
+            error = self.errors[index]
+            if error:
+                states[str(index)] = {"value": None, "error": error}
+                continue
+            value = self.values[index]
+            states[str(index)] = {"value": value != 0.0 if self.binary else value,
+                                  "age": round(now - self.sampled[index], 3), "error": ERROR_OK}
+        return states
+
+
+def sensor_schema(sensors: Tuple[SensorSpec, ...], binary_inputs: Tuple[BinaryInputSpec, ...]) -> Dict[str, Any]:
+    """
+    Property schema of the sensor and binary input descriptions, settings and states.
+
+    Args:
+        sensors: Sensor descriptions of a device class
+        binary_inputs: Binary input descriptions of a device class
+
+    Returns:
+        Schema dictionary with Slots for the current values
+    """
+    schema: Dict[str, Any] = {}
+    if sensors:
+        schema["sensorDescriptions"] = {str(index): {
+            "name": spec.sensor_id, "dsIndex": index, "sensorType": spec.sensor_type,
+            "sensorUsage": spec.usage, "min": spec.min, "max": spec.max, "resolution": spec.resolution,
+            "aliveSignInterval": spec.alive_timeout,
+        } for index, spec in enumerate(sensors)}
+        schema["sensorSettings"] = {str(index): {"minPushInterval": spec.min_push_interval}
+                                    for index, spec in enumerate(sensors)}
+        schema["sensorStates"] = {str(index): {"value": Slot("sensor_values", index),
+                                               "error": Slot("sensor_errors", index)}
+                                  for index in range(len(sensors))}
+    if binary_inputs:
+        schema["binaryInputDescriptions"] = {str(index): {
+            "name": spec.input_id, "dsIndex": index, "inputType": 1, "inputUsage": spec.usage,
+            "sensorFunction": spec.sensor_function, "aliveSignInterval": spec.alive_timeout,
+        } for index, spec in enumerate(binary_inputs)}
+        schema["binaryInputSettings"] = {str(index): {"minPushInterval": spec.min_push_interval}
+                                         for index, spec in enumerate(binary_inputs)}
+        schema["binaryInputStates"] = {str(index): {"value": Slot("binary_input_values", index),
+                                                    "error": Slot("binary_input_errors", index)}
+                                       for index in range(len(binary_inputs))}
+    return schema
+
+
+class SensorPipeline:
+    """
+    Turn sensor samples into batched push notifications.
+
+    Drivers hand samples to ``ingest`` from any thread. Samples within the
+    deadband of the last pushed value are absorbed right there; the others
+    mark the input dirty and schedule the device. Every ``flush_interval``
+    the ``vdc-sensors`` thread pushes, for each scheduled device, all its
+    inputs whose minimum push interval has passed in one pushNotification
+    with the latest values. Every ``alive_check_interval`` it also flags
+    inputs that have not been sampled within their alive timeout and pushes
+    their error state.
+    """
+
+    def __init__(self, host: "VdcHost", flush_interval: float = 0.05, alive_check_interval: float = 1.0):
+        """
+        Initialize the pipeline (call start to run it).
+
+        Args:
+            host: Host pushing the notifications
+            flush_interval: Seconds between two batches of pushes
+            alive_check_interval: Seconds between two alive timeout checks
+        """
+        self.host = host
+        self.flush_interval = flush_interval
+        self.alive_check_interval = alive_check_interval
+        # Counted without a lock; samples handed over from several threads may be undercounted
+        self.stats: Dict[str, int] = {"samples": 0, "scheduled": 0, "pushes": 0, "values": 0, "expired": 0}
+
+        self._due: Dict["VdcDevice", None] = {}  # insertion-ordered set of scheduled devices
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the flush thread (no-op if already running)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vdc-sensors", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Flush what is due and stop the flush thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def ingest(self, device: "VdcDevice", index: int, value: float, now: Optional[float] = None) -> None:
+        """
+        Hand over a sensor sample.
+
+        Args:
+            device: Device the sensor belongs to
+            index: Sensor index (position in the device's SENSORS)
+            value: Sampled value
+            now: Sample time (default: time.monotonic())
+        """
+        self.stats["samples"] += 1
+        if device.sensors.sample(index, value, time.monotonic() if now is None else now):
+            with self._lock:
+                self._due[device] = None
+            self.stats["scheduled"] += 1
+
+    def ingest_binary(self, device: "VdcDevice", index: int, value: bool, now: Optional[float] = None) -> None:
+        """
+        Hand over the state of a binary input.
+
+        Args:
+            device: Device the input belongs to
+            index: Input index (position in the device's BINARY_INPUTS)
+            value: Current input state
+            now: Sample time (default: time.monotonic())
+        """
+        self.stats["samples"] += 1
+        if device.binary_inputs.sample(index, 1.0 if value else 0.0, time.monotonic() if now is None else now):
+            with self._lock:
+                self._due[device] = None
+            self.stats["scheduled"] += 1
+
+    def ingest_many(self, samples: Iterable[Tuple["VdcDevice", int, float]]) -> None:
+        """
+        Hand over a batch of sensor samples taken at the same time.
+
+        Args:
+            samples: (device, sensor index, value) tuples
+        """
+        now = time.monotonic()
+        scheduled = []
+        count = 0
+        for device, index, value in samples:
+            count += 1
+            if device.sensors.sample(index, value, now):
+                scheduled.append(device)
+        self.stats["samples"] += count
+        if scheduled:
+            with self._lock:
+                for device in scheduled:
+                    self._due[device] = None
+            self.stats["scheduled"] += len(scheduled)
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """
+        Push all dirty inputs whose minimum push interval has passed.
+
+        Called by the flush thread; may be called directly, e.g. in tests.
+
+        Args:
+            now: Current time (default: time.monotonic())
+
+        Returns:
+            Number of pushNotifications sent
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            due, self._due = self._due, {}
+        pushes = 0
+        values = 0
+        later = []
+        for device in due:
+            properties: Dict[str, Any] = {}
+            pending = math.inf
+            for store, name in ((device.sensors, "sensorStates"), (device.binary_inputs, "binaryInputStates")):
+                if store is None:
+                    continue
+                indices, next_due = store.take_due(now)
+                pending = min(pending, next_due)
+                if indices:
+                    properties[name] = store.states(indices, now)
+                    values += len(indices)
+            if properties:
+                self.host.push_property(device.dsuid, properties,
+                                        coalesce_key=(device.dsuid, "sensors", _state_keys(properties)))
+                pushes += 1
+            if pending != math.inf:
+                later.append(device)
+        if later:
+            with self._lock:
+                for device in later:
+                    self._due[device] = None
+        self.stats["pushes"] += pushes
+        self.stats["values"] += values
+        return pushes
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Flag inputs of all served devices that missed their alive timeout.
+
+        Args:
+            now: Current time (default: time.monotonic())
+
+        Returns:
+            Number of devices with newly flagged inputs (pushed with the next flush)
+        """
+        if now is None:
+            now = time.monotonic()
+        flagged = []
+        for device in self.host.devices.snapshot().values():
+            for store in (device.sensors, device.binary_inputs):
+                if store is not None and store.watched and store.expire(now):
+                    flagged.append(device)
+        if flagged:
+            with self._lock:
+                for device in flagged:
+                    self._due[device] = None
+            self.stats["expired"] += len(flagged)
+        return len(flagged)
+
+    def _run(self) -> None:
+        """Flush thread."""
+        next_check = time.monotonic() + self.alive_check_interval
+        while not self._stop.wait(self.flush_interval):
+            now = time.monotonic()
+            try:
+                if now >= next_check:
+                    self.expire(now)
+                    next_check = now + self.alive_check_interval
+                self.flush(now)
+            except Exception as e:
+                logger.error(f"Sensor push failed: {e}", exc_info=True)
+        self.flush()
+
+
+def _state_keys(properties: Dict[str, Dict[str, Any]]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Identify the inputs in a push, so only pushes of the same inputs coalesce."""
+    return tuple((name, tuple(states)) for name, states in properties.items())
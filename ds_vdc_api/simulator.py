@@ -0,0 +1,824 @@
+"""
+vdSM simulator - scriptable vdSM client for soak and scale testing of vDC hosts
+
+Usage:
+    python -m ds_vdc_api.simulator --port 8444 --script scenario.json
+    python -m ds_vdc_api.simulator --port 8444 --random --duration 86400 --rate 50
+    python -m ds_vdc_api.simulator --local-devices 10000 --random --duration 600 \\
+        --drop-rate 0.001 --storm-every 300 --storm-size 20
+
+A script is a JSON list of steps, e.g.
+    [{"action": "get_property", "devices": "all"},
+     {"action": "call_scene", "scene": 5, "devices": 10, "repeat": 100, "delay": 0.01},
+     {"action": "slow_reads", "delay": 0.005},
+     {"action": "storm", "count": 10},
+     {"action": "sleep", "seconds": 5}]
+"""
+
+import argparse
+import json
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+from .genericVDC_pb2 import Message, Type, ResultCode
+from .message_handler import MessageHandler
+from .metrics import LatencyStats
+from .property_tree import build_property_tree
+from .wire import peek_header, message_type_name
+from .transport import Transport
+from . import fast_codec
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VDSM_DSUID = "5D000000000000000000000000000000F1"
+
+# dSUIDs per notification when addressing many devices (keeps frames below 16 KiB)
+MAX_NOTIFICATION_DEVICES = 256
+
+# Timed phases of a session
+PHASES = ("connect", "hello", "announce", "reconnect", "request", "ping")
+
+# Action weights of the randomized scenario
+DEFAULT_WEIGHTS = {
+    "get_property": 5.0,
+    "call_scene": 3.0,
+    "set_output_value": 3.0,
+    "identify": 0.2,
+    "ping": 0.5,
+}
+
+_RESPONSE_TYPES = frozenset([
+    Type.GENERIC_RESPONSE,
+    Type.VDC_RESPONSE_HELLO,
+    Type.VDC_RESPONSE_GET_PROPERTY,
+    Type.VDC_SEND_PONG,
+])
+
+
+class _Pending:
+    """A request waiting for its response."""
+
+    __slots__ = ("event", "response")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response: Optional[Message] = None
+
+
+class _Session:
+    """State of one connection to the vDC host."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.pending: Dict[int, _Pending] = {}
+        self.closed = threading.Event()
+        self.host_dsuid = ""
+        self.hello_sent = 0.0
+        self.reader: Optional[threading.Thread] = None
+        self.pinger: Optional[threading.Thread] = None
+
+
+class VdsmSimulator:
+    """
+    A vdSM stand-in that connects to a vDC host over TCP.
+
+    It performs the hello handshake, acknowledges announcements, pings on
+    schedule and sends requests and notifications to the announced devices.
+    Faults can be injected: slow reads (``read_delay``), abrupt connection
+    drops and reconnect storms. Durations of each phase are collected in
+    ``timings`` and counters in ``stats``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8444, dsuid: str = DEFAULT_VDSM_DSUID,
+                 api_version: int = 3, ping_interval: Optional[float] = 30.0,
+                 request_timeout: float = 10.0, read_delay: float = 0.0, seed: Optional[int] = None,
+                 transport: Optional[Transport] = None):
+        """
+        Initialize the simulator.
+
+        Args:
+            host: Address of the vDC host
+            port: Port of the vDC host
+            dsuid: dSUID of the simulated vdSM
+            api_version: API version sent with hello
+            ping_interval: Seconds between pings to the host (None disables pinging)
+            request_timeout: Seconds to wait for a response
+            read_delay: Seconds to sleep before reading each frame (slow reader fault)
+            seed: Seed for the randomized scenario and device selection
+            transport: Connect through this transport (e.g. the host's
+                       MemoryTransport or UnixTransport) instead of TCP to host:port
+        """
+        self.host = host
+        self.port = port
+        self.dsuid = dsuid
+        self.api_version = api_version
+        self.ping_interval = ping_interval
+        self.request_timeout = request_timeout
+        self.read_delay = read_delay
+        self.random = random.Random(seed)
+        self.transport = transport
+
+        self.timings = {phase: LatencyStats(window=4096) for phase in PHASES}
+        self.stats = {
+            "requests": 0,
+            "responses": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "notifications": 0,
+            "announcements": 0,
+            "vanishes": 0,
+            "pushes": 0,
+            "drops": 0,
+            "reconnects": 0,
+            "disconnects": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+        # Announced devices of the current session: device dSUID -> vDC dSUID
+        self.devices: Dict[str, str] = {}
+        self.vdcs: List[str] = []
+        self._device_list: Optional[List[str]] = None
+        self._announced = threading.Condition()
+        self._last_announcement = 0.0
+        self._settled_devices = 0  # device count after the last completed wait_announced
+
+        self._session: Optional[_Session] = None
+        self._next_id = 1
+        self._id_lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    @property
+    def connected(self) -> bool:
+        session = self._session
+        return session is not None and not session.closed.is_set()
+
+    # -- connection ---------------------------------------------------------
+
+    def connect(self) -> None:
+        """
+        Connect to the host and perform the hello handshake.
+
+        Announcements are acknowledged in the background; use
+        ``wait_announced`` to wait for them.
+
+        Raises:
+            ConnectionError: If the host is unreachable or rejects the hello
+            TimeoutError: If the hello response does not arrive in time
+        """
+        started = time.monotonic()
+        if self.transport is not None:
+            sock = self.transport.connect(self.request_timeout)
+        else:
+            sock = socket.create_connection((self.host, self.port), timeout=self.request_timeout)
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected = time.monotonic()
+        self.timings["connect"].record(connected - started)
+
+        session = _Session(sock)
+        with self._announced:
+            self.devices = {}
+            self.vdcs = []
+            self._device_list = None
+        self._session = session
+        session.reader = threading.Thread(target=self._read_loop, args=(session,),
+                                          name="vdsm-reader", daemon=True)
+        session.reader.start()
+
+        msg = Message()
+        msg.type = Type.VDSM_REQUEST_HELLO
+        msg.vdsm_request_hello.dSUID = self.dsuid
+        msg.vdsm_request_hello.api_version = self.api_version
+        session.hello_sent = time.monotonic()
+        try:
+            response = self.request(msg, phase="hello")
+        except (ConnectionError, TimeoutError):
+            self._close_session(session)
+            raise
+        if response.type != Type.VDC_RESPONSE_HELLO:
+            self._close_session(session)
+            raise ConnectionError(f"Hello rejected: {message_type_name(response.type)}")
+        session.host_dsuid = response.vdc_response_hello.dSUID
+        logger.info(f"Connected to vDC host {session.host_dsuid} at {self.host}:{self.port}")
+
+        if self.ping_interval:
+            session.pinger = threading.Thread(target=self._ping_loop, args=(session,),
+                                              name="vdsm-ping", daemon=True)
+            session.pinger.start()
+
+    def wait_announced(self, expected: Optional[int] = None, quiet: float = 1.0,
+                       timeout: Optional[float] = None) -> int:
+        """
+        Wait until the host has announced its devices.
+
+        Args:
+            expected: Number of devices after which to stop waiting
+            quiet: Seconds without announcements after which announcing is
+                   considered finished, even if fewer than expected arrived
+            timeout: Maximum seconds to wait (None: no limit)
+
+        Returns:
+            Number of announced devices
+        """
+        session = self._session
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._announced:
+            while not (session is None or session.closed.is_set()):
+                if expected is not None and len(self.devices) >= expected:
+                    break
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                last = max(self._last_announcement, session.hello_sent)
+                if now - last >= quiet:
+                    break
+                wait = quiet if deadline is None else min(quiet, deadline - now)
+                self._announced.wait(wait)
+            count = len(self.devices)
+            self._settled_devices = count
+            if session is not None and count:
+                self.timings["announce"].record(self._last_announcement - session.hello_sent)
+        return count
+
+    def close(self, bye: bool = True) -> None:
+        """
+        Close the connection.
+
+        Args:
+            bye: Send a bye message first
+        """
+        session = self._session
+        if session is None:
+            return
+        if bye and not session.closed.is_set():
+            msg = Message()
+            msg.type = Type.VDSM_SEND_BYE
+            msg.vdsm_send_bye.dSUID = self.dsuid
+            try:
+                self._send(session, MessageHandler.encode_frame(msg))
+            except ConnectionError:
+                pass
+        self._close_session(session)
+
+    def _close_session(self, session: _Session) -> None:
+        if self._session is session:
+            self._session = None
+        session.closed.set()
+        try:
+            session.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        session.sock.close()
+        for thread in (session.reader, session.pinger):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+
+    # -- faults -------------------------------------------------------------
+
+    def drop(self) -> None:
+        """Drop the connection without a bye, like a crashed or unplugged vdSM."""
+        session = self._session
+        if session is None:
+            return
+        self._count("drops")
+        self._close_session(session)
+
+    def reconnect(self, wait: bool = True, expected: Optional[int] = None) -> None:
+        """
+        Drop the connection (if any) and connect again.
+
+        Args:
+            wait: Wait for the announcements; the reconnect timing then covers
+                  connect, hello and announcing
+            expected: Number of devices to wait for (default: as many as the
+                      last completed wait_announced saw)
+        """
+        started = time.monotonic()
+        if expected is None:
+            expected = self._settled_devices or None
+        if self._session is not None:
+            self.drop()
+        self._count("reconnects")
+        self.connect()
+        if wait:
+            self.wait_announced(expected)
+        self.timings["reconnect"].record(time.monotonic() - started)
+
+    def reconnect_storm(self, count: int, interval: float = 0.0) -> None:
+        """
+        Reconnect repeatedly without waiting for the announcements to finish.
+
+        The last reconnect waits for the announcements, so the host is in a
+        settled state afterwards.
+
+        Args:
+            count: Number of reconnects
+            interval: Seconds between reconnects
+        """
+        logger.info(f"Reconnect storm: {count} reconnects")
+        for index in range(count):
+            self.reconnect(wait=index == count - 1)
+            if interval:
+                time.sleep(interval)
+
+    # -- messages -----------------------------------------------------------
+
+    def _send(self, session: _Session, frame: bytes) -> None:
+        if session.closed.is_set():
+            raise ConnectionError("Not connected")
+        try:
+            with session.send_lock:
+                session.sock.sendall(frame)
+        except OSError as e:
+            raise ConnectionError(f"Send failed: {e}") from e
+
+    def request(self, msg: Message, phase: str = "request") -> Message:
+        """
+        Send a request and wait for its response.
+
+        A message_id is assigned to the message.
+
+        Args:
+            msg: Request message
+            phase: Timing the round trip is recorded in
+
+        Returns:
+            Response message
+
+        Raises:
+            ConnectionError: If not connected or the connection is lost
+            TimeoutError: If no response arrives within request_timeout
+        """
+        session = self._session
+        if session is None:
+            raise ConnectionError("Not connected")
+        with self._id_lock:
+            message_id = self._next_id
+            self._next_id = message_id + 1 if message_id < 0x7FFFFFFF else 1
+        msg.message_id = message_id
+        pending = _Pending()
+        session.pending[message_id] = pending
+        self._count("requests")
+
+        started = time.monotonic()
+        try:
+            self._send(session, MessageHandler.encode_frame(msg))
+            if not pending.event.wait(self.request_timeout):
+                self._count("timeouts")
+                raise TimeoutError(f"No response to {message_type_name(msg.type)} {message_id}")
+        finally:
+            session.pending.pop(message_id, None)
+
+        response = pending.response
+        if response is None:
+            raise ConnectionError("Connection lost")
+        self.timings[phase].record(time.monotonic() - started)
+        self._count("responses")
+        if response.type == Type.GENERIC_RESPONSE and response.generic_response.code != ResultCode.ERR_OK:
+            self._count("errors")
+        return response
+
+    def notify(self, msg: Message) -> None:
+        """
+        Send a notification (no response expected).
+
+        Args:
+            msg: Notification message
+
+        Raises:
+            ConnectionError: If not connected
+        """
+        session = self._session
+        if session is None:
+            raise ConnectionError("Not connected")
+        self._send(session, MessageHandler.encode_frame(msg))
+        self._count("notifications")
+
+    def ping(self) -> Message:
+        """Ping the vDC host and wait for the pong."""
+        session = self._session
+        msg = Message()
+        msg.type = Type.VDSM_SEND_PING
+        msg.vdsm_send_ping.dSUID = session.host_dsuid if session is not None else ""
+        return self.request(msg, phase="ping")
+
+    def get_property(self, dsuid: str, names: Optional[Iterable[str]] = None) -> Message:
+        """Request properties of a device (all properties if names is None)."""
+        msg = Message()
+        msg.type = Type.VDSM_REQUEST_GET_PROPERTY
+        msg.vdsm_request_get_property.dSUID = dsuid
+        for name in names or ():
+            msg.vdsm_request_get_property.query.add().name = name
+        return self.request(msg)
+
+    def set_property(self, dsuid: str, properties: Dict[str, Any]) -> Message:
+        """Set properties of a device."""
+        msg = Message()
+        msg.type = Type.VDSM_REQUEST_SET_PROPERTY
+        msg.vdsm_request_set_property.dSUID = dsuid
+        msg.vdsm_request_set_property.properties.extend(build_property_tree(properties))
+        return self.request(msg)
+
+    def call_scene(self, dsuids: Sequence[str], scene: int, force: bool = False) -> None:
+        """Call a scene on devices."""
+        msg = Message()
+        msg.type = Type.VDSM_NOTIFICATION_CALL_SCENE
+        msg.vdsm_send_call_scene.dSUID.extend(dsuids)
+        msg.vdsm_send_call_scene.scene = scene
+        msg.vdsm_send_call_scene.force = force
+        self.notify(msg)
+
+    def set_output_value(self, dsuids: Sequence[str], value: float, channel_id: str = "",
+                         apply_now: bool = True) -> None:
+        """Set an output channel value on devices."""
+        msg = Message()
+        msg.type = Type.VDSM_NOTIFICATION_SET_OUTPUT_CHANNEL_VALUE
+        notification = msg.vdsm_send_output_channel_value
+        notification.dSUID.extend(dsuids)
+        notification.value = value
+        notification.apply_now = apply_now
+        if channel_id:
+            notification.channelId = channel_id
+        self.notify(msg)
+
+    def identify(self, dsuids: Sequence[str]) -> None:
+        """Ask devices to identify themselves."""
+        msg = Message()
+        msg.type = Type.VDSM_NOTIFICATION_IDENTIFY
+        msg.vdsm_send_identify.dSUID.extend(dsuids)
+        self.notify(msg)
+
+    # -- background threads -------------------------------------------------
+
+    def _read_loop(self, session: _Session) -> None:
+        """Reader thread - acknowledges announcements and completes pending requests."""
+        sock = session.sock
+        while not session.closed.is_set():
+            if self.read_delay:
+                time.sleep(self.read_delay)
+            try:
+                data = MessageHandler.receive_frame(sock)
+            except (OSError, ValueError):
+                data = None
+            if data is None:
+                break
+
+            msg_type, message_id = peek_header(data)
+            if msg_type == Type.VDC_SEND_ANNOUNCE_DEVICE:
+                dsuid, vdc_dsuid = fast_codec.decode_announce_device(data)
+                self._announce(session, message_id, dsuid, vdc_dsuid)
+            elif msg_type == Type.VDC_SEND_ANNOUNCE_VDC:
+                self._announce(session, message_id, None, fast_codec.decode_announce_vdc(data))
+            elif msg_type == Type.VDC_SEND_VANISH:
+                dsuid = fast_codec.decode_vanish(data)
+                with self._announced:
+                    if self.devices.pop(dsuid, None) is not None:
+                        self._device_list = None
+                self._count("vanishes")
+            elif msg_type == Type.VDC_SEND_PUSH_PROPERTY:
+                self._count("pushes")
+            elif msg_type in _RESPONSE_TYPES:
+                pending = session.pending.get(message_id)
+                if pending is not None:
+                    pending.response = fast_codec.decode(data)
+                    pending.event.set()
+            else:
+                logger.debug(f"Ignoring {message_type_name(msg_type)} from host")
+
+        if not session.closed.is_set():
+            logger.warning("Connection closed by the vDC host")
+            self._count("disconnects")
+            if self._session is session:
+                self._session = None
+            session.closed.set()
+            session.sock.close()
+        for pending in list(session.pending.values()):
+            pending.event.set()
+
+    def _announce(self, session: _Session, message_id: int, dsuid: Optional[str], vdc_dsuid: str) -> None:
+        """Record an announcement and acknowledge it."""
+        try:
+            self._send(session, fast_codec.encode_generic_response(message_id, ResultCode.ERR_OK))
+        except ConnectionError:
+            return
+        with self._announced:
+            if dsuid is None:
+                self.vdcs.append(vdc_dsuid)
+            else:
+                self.devices[dsuid] = vdc_dsuid
+                self._device_list = None
+            self._last_announcement = time.monotonic()
+            self._announced.notify_all()
+        self._count("announcements")
+
+    def _ping_loop(self, session: _Session) -> None:
+        """Pinger thread - pings the host every ping_interval seconds."""
+        while not session.closed.wait(self.ping_interval):
+            if self._session is not session:
+                return
+            try:
+                self.ping()
+            except TimeoutError:
+                logger.warning("Ping timed out")
+            except ConnectionError:
+                return
+
+    # -- scenarios ----------------------------------------------------------
+
+    def pick_devices(self, spec: Union[None, str, int, Sequence[str]] = None) -> List[str]:
+        """
+        Select target devices.
+
+        Args:
+            spec: None for one random device, "all", a number of random
+                  devices or a list of dSUIDs
+
+        Returns:
+            List of device dSUIDs (empty if no device is announced)
+        """
+        if spec is not None and not isinstance(spec, (str, int)):
+            return list(spec)
+        with self._announced:
+            if self._device_list is None:
+                self._device_list = list(self.devices)
+            devices = self._device_list
+        if not devices:
+            return []
+        if spec == "all":
+            return list(devices)
+        count = 1 if spec is None else int(spec)
+        if count == 1:
+            return [self.random.choice(devices)]
+        return self.random.sample(devices, min(count, len(devices)))
+
+    def run_action(self, action: str, **params: Any) -> None:
+        """
+        Run one scenario action.
+
+        Args:
+            action: get_property, set_property, call_scene, set_output_value,
+                    identify, ping, drop, reconnect, storm, slow_reads, sleep
+                    or wait_announced
+            **params: Action parameters; "devices" selects targets (see pick_devices)
+
+        Raises:
+            ValueError: If the action is unknown
+        """
+        if action == "ping":
+            self.ping()
+        elif action == "drop":
+            self.drop()
+        elif action == "reconnect":
+            self.reconnect(expected=params.get("expected"))
+        elif action == "storm":
+            self.reconnect_storm(params.get("count", 10), params.get("interval", 0.0))
+        elif action == "slow_reads":
+            self.read_delay = params.get("delay", 0.0)
+        elif action == "sleep":
+            time.sleep(params.get("seconds", 1.0))
+        elif action == "wait_announced":
+            self.wait_announced(params.get("expected"), params.get("quiet", 1.0), params.get("timeout"))
+        elif action in ("get_property", "set_property"):
+            for dsuid in self.pick_devices(params.get("devices")):
+                if action == "get_property":
+                    self.get_property(dsuid, params.get("names"))
+                else:
+                    self.set_property(dsuid, params.get("properties", {}))
+        elif action in ("call_scene", "set_output_value", "identify"):
+            targets = self.pick_devices(params.get("devices"))
+            scene = params.get("scene")
+            if scene is None:
+                scene = self.random.choice((0, 5, 17, 18, 19))
+            value = params.get("value")
+            if value is None:
+                value = self.random.uniform(0.0, 100.0)
+            # Split large target sets so every notification fits into one frame
+            for start in range(0, len(targets), MAX_NOTIFICATION_DEVICES):
+                dsuids = targets[start:start + MAX_NOTIFICATION_DEVICES]
+                if action == "call_scene":
+                    self.call_scene(dsuids, scene, params.get("force", False))
+                elif action == "set_output_value":
+                    self.set_output_value(dsuids, value, params.get("channel_id", ""),
+                                          params.get("apply_now", True))
+                else:
+                    self.identify(dsuids)
+        else:
+            raise ValueError(f"Unknown scenario action: {action}")
+
+    def run_script(self, steps: Iterable[Dict[str, Any]]) -> None:
+        """
+        Run a scripted scenario.
+
+        Each step is a dictionary with an "action" (see run_action), its
+        parameters and optionally "repeat" (default 1) and "delay" (seconds
+        after each repetition).
+
+        Args:
+            steps: Scenario steps
+        """
+        for step in steps:
+            params = dict(step)
+            action = params.pop("action")
+            repeat = params.pop("repeat", 1)
+            delay = params.pop("delay", 0.0)
+            for _ in range(repeat):
+                self.run_action(action, **params)
+                if delay:
+                    time.sleep(delay)
+
+    def run_random(self, duration: float, rate: float = 10.0, weights: Optional[Dict[str, float]] = None,
+                   drop_rate: float = 0.0, storm_every: Optional[float] = None, storm_size: int = 10,
+                   report_interval: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run a randomized scenario, e.g. as a soak test.
+
+        Actions are chosen by weight and paced to ``rate`` per second. Lost
+        connections are re-established with backoff and counted, so the run
+        continues through host restarts.
+
+        Args:
+            duration: Seconds to run
+            rate: Actions per second
+            weights: Action weights (default DEFAULT_WEIGHTS)
+            drop_rate: Probability of dropping the connection before an action
+            storm_every: Seconds between reconnect storms (None: no storms)
+            storm_size: Reconnects per storm
+            report_interval: Seconds between progress reports logged at INFO level
+
+        Returns:
+            Final report (see report)
+        """
+        weights = weights or DEFAULT_WEIGHTS
+        actions = list(weights)
+        cumulative = [float(weights[action]) for action in actions]
+        for index in range(1, len(cumulative)):
+            cumulative[index] += cumulative[index - 1]
+
+        started = time.monotonic()
+        end = started + duration
+        next_action = started
+        next_storm = started + storm_every if storm_every else None
+        next_report = started + report_interval if report_interval else None
+        backoff = 0.5
+
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            if next_report is not None and now >= next_report:
+                logger.info(format_report(self.report()))
+                next_report = now + report_interval
+
+            try:
+                if not self.connected:
+                    self.reconnect()
+                    backoff = 0.5
+                if next_storm is not None and now >= next_storm:
+                    self.reconnect_storm(storm_size)
+                    next_storm = time.monotonic() + storm_every
+                if drop_rate and self.random.random() < drop_rate:
+                    self.reconnect()
+                action = self.random.choices(actions, cum_weights=cumulative)[0]
+                self.run_action(action)
+            except TimeoutError as e:
+                logger.warning(f"{e}")
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Connection problem: {e}, retrying in {backoff:.1f}s")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+
+            next_action += 1.0 / rate
+            delay = next_action - time.monotonic()
+            if delay > 0:
+                time.sleep(max(0.0, min(delay, end - time.monotonic())))
+            elif delay < -1.0:
+                # Fell behind (slow host); do not try to catch up in a burst
+                next_action = time.monotonic()
+
+        return self.report()
+
+    # -- reporting ----------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get counters and per-phase timings.
+
+        Returns:
+            Dictionary with elapsed (s), devices, stats and timings (phase ->
+            LatencyStats snapshot)
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            "elapsed": time.monotonic() - self._started,
+            "devices": len(self.devices),
+            "stats": stats,
+            "timings": {phase: timing.snapshot() for phase, timing in self.timings.items()},
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Format a simulator report as text.
+
+    Args:
+        report: Result of VdsmSimulator.report
+
+    Returns:
+        Multi-line summary
+    """
+    stats = report["stats"]
+    lines = [
+        f"after {report['elapsed']:.0f}s: {report['devices']} devices, "
+        + ", ".join(f"{name} {value}" for name, value in stats.items())
+    ]
+    for phase, timing in report["timings"].items():
+        if timing["count"]:
+            lines.append(f"  {phase:<10} n={timing['count']:<8} mean {timing['mean'] * 1000:9.2f} ms  "
+                         f"p50 {timing['p50'] * 1000:9.2f} ms  p99 {timing['p99'] * 1000:9.2f} ms  "
+                         f"max {timing['max'] * 1000:9.2f} ms")
+    return "\n".join(lines)
+
+
+def _start_local_host(port: int, devices: int):
+    """Start an in-process VdcHost with plain devices for self-contained runs."""
+    from .vdc_host import VdcHost
+    from .vdc_device import VdcDevice
+
+    host = VdcHost("AA000000000000000000000000000000AA", "BB000000000000000000000000000000BB", port=port)
+    host.add_devices(VdcDevice(f"{index:032X}01", f"Device {index}") for index in range(devices))
+    host.start(blocking=False)
+    return host
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Simulate a vdSM against a vDC host")
+    parser.add_argument("--host", default="127.0.0.1", help="vDC host address")
+    parser.add_argument("--port", type=int, default=8444, help="vDC host port")
+    parser.add_argument("--dsuid", default=DEFAULT_VDSM_DSUID, help="dSUID of the simulated vdSM")
+    parser.add_argument("--local-devices", type=int, default=0,
+                        help="start an in-process vDC host with this many devices")
+    parser.add_argument("--expect", type=int, help="number of devices to wait for after connecting")
+    parser.add_argument("--script", help="JSON scenario file")
+    parser.add_argument("--random", action="store_true", help="run a randomized scenario")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to run the random scenario")
+    parser.add_argument("--rate", type=float, default=10.0, help="random actions per second")
+    parser.add_argument("--ping-interval", type=float, default=30.0, help="seconds between pings (0: off)")
+    parser.add_argument("--slow-reads", type=float, default=0.0, help="seconds to sleep before each read")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="probability of dropping the connection before a random action")
+    parser.add_argument("--storm-every", type=float, help="seconds between reconnect storms")
+    parser.add_argument("--storm-size", type=int, default=10, help="reconnects per storm")
+    parser.add_argument("--report-interval", type=float, default=60.0, help="seconds between progress reports")
+    parser.add_argument("--seed", type=int, help="random seed")
+    args = parser.parse_args(argv)
+
+    host = _start_local_host(args.port, args.local_devices) if args.local_devices else None
+    expected = args.expect if args.expect is not None else (args.local_devices or None)
+    simulator = VdsmSimulator(args.host, args.port, args.dsuid,
+                              ping_interval=args.ping_interval or None,
+                              read_delay=args.slow_reads, seed=args.seed)
+    try:
+        for attempt in range(50):
+            try:
+                simulator.connect()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.1)
+        else:
+            simulator.connect()
+        count = simulator.wait_announced(expected)
+        print(f"{count} devices announced")
+
+        if args.script:
+            with open(args.script) as f:
+                simulator.run_script(json.load(f))
+        if args.random:
+            simulator.run_random(args.duration, args.rate, drop_rate=args.drop_rate,
+                                 storm_every=args.storm_every, storm_size=args.storm_size,
+                                 report_interval=args.report_interval)
+        print(format_report(simulator.report()))
+    except KeyboardInterrupt:
+        print(format_report(simulator.report()))
+    finally:
+        simulator.close()
+        if host is not None:
+            host.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
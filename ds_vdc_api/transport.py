@@ -0,0 +1,410 @@
+"""
+Transports - listeners and connections carrying the framed vDC session
+"""
+
+import abc
+import collections
+import os
+import queue
+import socket
+import threading
+from typing import Any, Deque, Optional, Tuple
+
+
+class Transport(abc.ABC):
+    """
+    Where a VdcHost listens for its vdSM.
+
+    A transport hands out connected, socket-like objects; the host runs the
+    same framing and session handling on all of them. Connections must
+    provide ``recv``, ``send``, ``sendall``, ``settimeout``, ``shutdown``
+    and ``close`` with socket semantics. Connections that are not real
+    sockets cannot be passed to ``select`` and take a timeout argument in
+    ``send`` instead (see MemoryConnection).
+    """
+
+    @abc.abstractmethod
+    def listen(self) -> None:
+        """Start accepting connections."""
+
+    @abc.abstractmethod
+    def accept(self) -> Tuple[Any, Any]:
+        """
+        Wait for the next connection.
+
+        Returns:
+            (connection, peer address)
+
+        Raises:
+            OSError: Once the transport is closed
+        """
+
+    @abc.abstractmethod
+    def connect(self, timeout: Optional[float] = None) -> Any:
+        """
+        Open a client connection to this transport (for vdSM simulators and tests).
+
+        Args:
+            timeout: Connect timeout in seconds
+
+        Returns:
+            Connected client end, in blocking mode
+        """
+
+    def configure(self, conn: Any, keepalive_idle: Optional[float] = None, keepalive_count: int = 3) -> None:
+        """
+        Apply transport-specific options to an accepted connection.
+
+        Args:
+            conn: Accepted connection
+            keepalive_idle: Seconds without traffic before the kernel probes the peer, or None
+            keepalive_count: Number of unanswered probes after which the peer is dead
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Stop accepting connections; a blocked accept raises OSError."""
+
+    @property
+    @abc.abstractmethod
+    def address(self) -> str:
+        """Human-readable listening address."""
+
+
+class TcpTransport(Transport):
+    """TCP listener (the vDC API default, port 8444 on all interfaces)."""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8444):
+        """
+        Initialize the transport.
+
+        Args:
+            host: Address to bind to
+            port: Port to bind to (0 picks a free port, see ``port`` after listen)
+        """
+        self.host = host
+        self._port = port
+        self.sock: Optional[socket.socket] = None
+
+    @property
+    def port(self) -> int:
+        """Bound port (the configured one before listen)."""
+        sock = self.sock
+        if sock is not None:
+            try:
+                return sock.getsockname()[1]
+            except OSError:
+                pass
+        return self._port
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def listen(self) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self._port))
+        sock.listen(1)
+        self.sock = sock
+
+    def accept(self) -> Tuple[socket.socket, Any]:
+        if self.sock is None:
+            raise OSError("Transport is not listening")
+        return self.sock.accept()
+
+    def connect(self, timeout: Optional[float] = None) -> socket.socket:
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        sock = socket.create_connection((host, self.port), timeout=timeout)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def configure(self, conn: socket.socket, keepalive_idle: Optional[float] = None,
+                  keepalive_count: int = 3) -> None:
+        """Disable Nagle and enable TCP keepalive probing."""
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        if keepalive_idle:
+            # Kernel-level probing as a second line of defence for half-open connections
+            idle = max(1, int(keepalive_idle))
+            interval = max(1, int(keepalive_idle / keepalive_count))
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+            elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+            if hasattr(socket, "TCP_KEEPINTVL"):
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+            if hasattr(socket, "TCP_KEEPCNT"):
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, keepalive_count)
+
+    def close(self) -> None:
+        sock = self.sock
+        if sock is not None:
+            self.sock = None
+            sock.close()
+
+
+class UnixTransport(Transport):
+    """Unix domain socket listener for a vdSM bridge on the same machine."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the transport.
+
+        Args:
+            path: Socket file path; a stale file is replaced on listen and removed on close
+        """
+        self.path = path
+        self.sock: Optional[socket.socket] = None
+
+    @property
+    def address(self) -> str:
+        return f"unix:{self.path}"
+
+    def listen(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.listen(1)
+        self.sock = sock
+
+    def accept(self) -> Tuple[socket.socket, Any]:
+        if self.sock is None:
+            raise OSError("Transport is not listening")
+        conn, _ = self.sock.accept()
+        return conn, self.address
+
+    def connect(self, timeout: Optional[float] = None) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(self.path)
+        sock.settimeout(None)
+        return sock
+
+    def close(self) -> None:
+        sock = self.sock
+        if sock is None:
+            return
+        self.sock = None
+        sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class _Pipe:
+    """
+    Bounded one-way byte stream between two MemoryConnections.
+
+    A single reader waits on the ``readable`` lock, which a writer releases
+    (after dropping the state lock, so the reader does not wake into it)
+    only when the reader announced itself as waiting; a bare lock hand-off
+    is cheaper than a Condition round trip. Writers blocked on a full pipe
+    (rare) wait on the ``writable`` condition.
+    """
+
+    __slots__ = ("chunks", "size", "capacity", "closed", "lock", "readable", "reader_waiting",
+                 "writable", "writers_waiting")
+
+    def __init__(self, capacity: int):
+        self.chunks: Deque[memoryview] = collections.deque()
+        self.size = 0
+        self.capacity = capacity
+        self.closed = False
+        self.lock = threading.Lock()
+        self.readable = threading.Lock()
+        self.readable.acquire()
+        self.reader_waiting = False
+        self.writable = threading.Condition(self.lock)
+        self.writers_waiting = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            wake = self.reader_waiting
+            self.reader_waiting = False
+            self.writable.notify_all()
+        if wake:
+            self.readable.release()
+
+
+class MemoryConnection:
+    """
+    One end of an in-process connection.
+
+    Behaves like a blocking stream socket: ``recv`` returns at most the
+    requested number of bytes and b'' once the peer closed, ``settimeout``
+    bounds ``recv``, and the peer's ``send`` blocks while ``capacity``
+    bytes are unread, so backpressure and stall detection work as over TCP.
+    Data is handed over by reference; there is no kernel involvement. Each
+    end supports one reading thread.
+    """
+
+    def __init__(self, rx: _Pipe, tx: _Pipe, name: str = "memory"):
+        self._rx = rx
+        self._tx = tx
+        self._timeout: Optional[float] = None
+        self.name = name
+
+    @classmethod
+    def pair(cls, capacity: int = 1 << 20) -> Tuple["MemoryConnection", "MemoryConnection"]:
+        """
+        Create two connected ends.
+
+        Args:
+            capacity: Unread bytes after which a sender blocks, per direction
+
+        Returns:
+            (client end, server end)
+        """
+        up, down = _Pipe(capacity), _Pipe(capacity)
+        return cls(down, up, "memory-client"), cls(up, down, "memory-server")
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self._timeout = timeout
+
+    def gettimeout(self) -> Optional[float]:
+        return self._timeout
+
+    def setsockopt(self, *args: Any) -> None:
+        """Socket options have no meaning in memory; accepted and ignored."""
+
+    def recv(self, size: int) -> bytes:
+        pipe = self._rx
+        while True:
+            with pipe.lock:
+                if pipe.chunks:
+                    chunk = pipe.chunks[0]
+                    if len(chunk) <= size:
+                        pipe.chunks.popleft()
+                    else:
+                        pipe.chunks[0] = chunk[size:]
+                        chunk = chunk[:size]
+                    pipe.size -= len(chunk)
+                    if pipe.writers_waiting:
+                        pipe.writable.notify_all()
+                    return chunk.tobytes()
+                if pipe.closed:
+                    return b''
+                pipe.reader_waiting = True
+            timeout = self._timeout
+            if not pipe.readable.acquire(True, -1 if timeout is None else timeout):
+                with pipe.lock:
+                    if pipe.reader_waiting:
+                        pipe.reader_waiting = False
+                        raise socket.timeout("timed out")
+                # A writer is releasing the lock just as the wait timed out
+                pipe.readable.acquire()
+
+    def send(self, data: bytes, timeout: Optional[float] = None) -> int:
+        """
+        Queue data for the peer, waiting for room if the peer lags behind.
+
+        Args:
+            data: Bytes to send
+            timeout: Seconds to wait for room (None: no limit)
+
+        Returns:
+            Number of bytes queued (0 if the timeout expired)
+
+        Raises:
+            BrokenPipeError: If the connection is closed
+        """
+        pipe = self._tx
+        size = len(data)
+        with pipe.lock:
+            if pipe.size >= pipe.capacity and not pipe.closed:
+                pipe.writers_waiting += 1
+                try:
+                    pipe.writable.wait_for(lambda: pipe.size < pipe.capacity or pipe.closed, timeout)
+                finally:
+                    pipe.writers_waiting -= 1
+            if pipe.closed:
+                raise BrokenPipeError("connection closed")
+            if pipe.size >= pipe.capacity:
+                return 0
+            if isinstance(data, memoryview) and isinstance(data.obj, bytes):
+                view = data  # immutable backing buffer: hand over without copying
+            else:
+                view = memoryview(bytes(data))
+            pipe.chunks.append(view)
+            pipe.size += size
+            wake = pipe.reader_waiting
+            pipe.reader_waiting = False
+        if wake:
+            pipe.readable.release()
+        return size
+
+    def sendall(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            sent = self.send(view, self._timeout)
+            if not sent:
+                raise socket.timeout("timed out")
+            view = view[sent:]
+
+    def shutdown(self, how: int = socket.SHUT_RDWR) -> None:
+        if how in (socket.SHUT_RD, socket.SHUT_RDWR):
+            self._rx.close()
+        if how in (socket.SHUT_WR, socket.SHUT_RDWR):
+            self._tx.close()
+
+    def close(self) -> None:
+        self._rx.close()
+        self._tx.close()
+
+    def __repr__(self) -> str:
+        return f"MemoryConnection({self.name})"
+
+
+class MemoryTransport(Transport):
+    """
+    In-process transport: ``connect()`` returns the client end of a new
+    MemoryConnection pair whose server end the host accepts. Useful for
+    tests and for benchmarking protocol and handler cost without sockets.
+    """
+
+    def __init__(self, capacity: int = 1 << 20):
+        """
+        Initialize the transport.
+
+        Args:
+            capacity: Per-direction buffer of each connection in bytes
+        """
+        self.capacity = capacity
+        self._pending: "queue.Queue[Optional[MemoryConnection]]" = queue.Queue()
+        self._closed = threading.Event()
+        self._connections = 0
+
+    @property
+    def address(self) -> str:
+        return f"memory:{id(self):x}"
+
+    def listen(self) -> None:
+        # Connections queued before the host got here are kept
+        self._closed.clear()
+
+    def accept(self) -> Tuple[MemoryConnection, str]:
+        while not self._closed.is_set():
+            conn = self._pending.get()
+            if conn is not None:
+                return conn, conn.name
+            # None wakes an accept blocked in close(); one left over from an earlier close is skipped
+        raise OSError("Transport closed")
+
+    def connect(self, timeout: Optional[float] = None) -> MemoryConnection:
+        if self._closed.is_set():
+            raise ConnectionRefusedError("Transport closed")
+        self._connections += 1
+        client, server = MemoryConnection.pair(self.capacity)
+        server.name = f"memory-{self._connections}"
+        self._pending.put(server)
+        return client
+
+    def close(self) -> None:
+        self._closed.set()
+        self._pending.put(None)
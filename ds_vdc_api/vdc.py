@@ -0,0 +1,280 @@
+"""
+Virtual Device Connector - one technology bridge with its own device registry
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from . import fast_codec
+from .lanes import LANE_BULK
+from .metrics import LatencyStats
+from .outbound_queue import OutboundQueue
+from .registry import DeviceRegistry
+from .vdc_device import VdcDevice
+
+if TYPE_CHECKING:
+    from .vdc_host import VdcHost
+
+
+logger = logging.getLogger(__name__)
+
+
+class Vdc:
+    """
+    A vDC served by a VdcHost.
+
+    Each vDC owns its device registry, its property set and its cached
+    announce frames, and keeps its own metrics. A host serving several vDCs
+    (e.g. one per bus technology) announces them in parallel, so a vDC with
+    many devices does not delay the announcement of the others.
+    """
+
+    def __init__(self, dsuid: str, name: str = "Virtual Device Connector",
+                 model: str = "DS-pyVDC-API",
+                 model_uid: str = "com.github.karlkiel.ds-pyvdc-api"):
+        """
+        Initialize a vDC.
+
+        Args:
+            dsuid: 34-character hexadecimal dSUID of the vDC
+            name: Human-readable vDC name
+            model: Model name
+            model_uid: Unique model identifier
+        """
+        if len(dsuid) != 34:
+            raise ValueError(f"vDC dSUID must be 34 hex characters, got {len(dsuid)}")
+
+        self.dsuid = dsuid
+        self.name = name
+        self.model = model
+        self.model_uid = model_uid
+        self.host: Optional["VdcHost"] = None
+
+        # Device registry (copy-on-write, safe to iterate from any thread)
+        self.devices = DeviceRegistry()
+
+        # Pre-serialized announce frames; the joined burst is tagged with the
+        # registry version it was built from and is stale once that changes
+        self._announce_frames: Dict[str, bytes] = {}
+        self._announce_burst: Optional[Tuple[int, List[bytes]]] = None
+
+        # Per-vDC metrics
+        self.handler_latency = LatencyStats()
+        self.announce_latency = LatencyStats()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "notifications": 0, "errors": 0,
+                                      "announcements": 0}
+
+    def add_device(self, device: VdcDevice) -> None:
+        """
+        Add a virtual device to this vDC.
+
+        If the vDC is served by a host with an active session, the device is
+        announced immediately.
+
+        Args:
+            device: VdcDevice instance to add
+
+        Raises:
+            ValueError: If the host already serves a device with this dSUID in another vDC
+        """
+        host = self.host
+        if host is not None:
+            other = host.devices.get(device.dsuid)
+            if other is not None and other.vdc_dsuid != self.dsuid:
+                raise ValueError(f"Device {device.dsuid} already belongs to vDC {other.vdc_dsuid}")
+
+        device.vdc_dsuid = self.dsuid
+        self._announce_frames.pop(device.dsuid, None)
+        self.devices.add(device)
+        logger.info("Added device: %s (%s) to vDC %s", device.name, device.dsuid, self.name)
+
+        if host is not None:
+            host._device_added(self, device)
+
+    def remove_device(self, dsuid: str) -> None:
+        """
+        Remove a virtual device from this vDC.
+
+        Args:
+            dsuid: dSUID of device to remove
+        """
+        device = self.devices.get(dsuid)
+        if device is None:
+            return
+
+        host = self.host
+        if host is not None:
+            host._device_removed(self, device)
+
+        if self.devices.remove(dsuid, expected=device) is None:
+            return
+        self._announce_frames.pop(dsuid, None)
+        logger.info("Removed device: %s (%s) from vDC %s", device.name, dsuid, self.name)
+
+    def add_devices(self, devices: Iterable[VdcDevice]) -> int:
+        """
+        Add many virtual devices to this vDC at once.
+
+        The registries are updated once for the whole batch and, if a session
+        is active, the announcements are queued as one chunked burst, so adding
+        n devices costs O(n) instead of n separate add_device calls.
+
+        Args:
+            devices: VdcDevice instances to add (later duplicates replace earlier ones)
+
+        Returns:
+            Number of devices added
+
+        Raises:
+            ValueError: If the host already serves one of the dSUIDs in another vDC;
+                        nothing is added in that case
+        """
+        devices = list({device.dsuid: device for device in devices}.values())
+        if not devices:
+            return 0
+        host = self.host
+        if host is not None:
+            served = host.devices.snapshot()
+            for device in devices:
+                other = served.get(device.dsuid)
+                if other is not None and other.vdc_dsuid != self.dsuid:
+                    raise ValueError(f"Device {device.dsuid} already belongs to vDC {other.vdc_dsuid}")
+
+        frames = self._announce_frames
+        for device in devices:
+            device.vdc_dsuid = self.dsuid
+            frames.pop(device.dsuid, None)
+        self.devices.update(add=devices)
+        logger.info("Added %d devices to vDC %s", len(devices), self.name)
+
+        if host is not None:
+            host._devices_added(self, devices)
+        return len(devices)
+
+    def remove_devices(self, dsuids: Iterable[str]) -> int:
+        """
+        Remove many virtual devices from this vDC at once.
+
+        Vanish messages are queued as one chunked burst and the registries
+        are updated once. Unknown dSUIDs are ignored.
+
+        Args:
+            dsuids: dSUIDs of the devices to remove
+
+        Returns:
+            Number of devices removed
+        """
+        snapshot = self.devices.snapshot()
+        devices = list({dsuid: snapshot[dsuid] for dsuid in dsuids if dsuid in snapshot}.values())
+        if not devices:
+            return 0
+
+        host = self.host
+        if host is not None:
+            host._devices_removed(self, devices)
+
+        self.devices.update(remove=[device.dsuid for device in devices])
+        frames = self._announce_frames
+        for device in devices:
+            frames.pop(device.dsuid, None)
+        logger.info("Removed %d devices from vDC %s", len(devices), self.name)
+        return len(devices)
+
+    def get_properties(self) -> Dict[str, Any]:
+        """
+        Get the property dictionary of this vDC.
+
+        Returns:
+            Nested dictionary of properties
+        """
+        return {
+            "dSUID": self.dsuid,
+            "type": "vDC",
+            "name": self.name,
+            "model": self.model,
+            "modelUID": self.model_uid,
+        }
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of the metrics of this vDC.
+
+        Handler latency is the time spent in device callbacks and property
+        handlers for this vDC's devices; announce latency is the time to queue
+        the full announce burst of a session.
+
+        Returns:
+            Dictionary with device count, counters and latency summaries
+        """
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self.stats)
+        stats["devices"] = len(self.devices)
+        stats["handler_latency"] = self.handler_latency.snapshot()
+        stats["announce_latency"] = self.announce_latency.snapshot()
+        return stats
+
+    def record(self, kind: str, seconds: float) -> None:
+        """
+        Account one handled request or notification.
+
+        Args:
+            kind: Counter to increment ("requests", "notifications" or "errors")
+            seconds: Time spent handling it
+        """
+        with self._stats_lock:
+            self.stats[kind] += 1
+        self.handler_latency.record(seconds)
+
+    def get_announce_burst(self, chunk_size: int) -> List[bytes]:
+        """
+        Get the framed vDC and device announcements, joined into chunks.
+
+        Args:
+            chunk_size: Number of frames joined into one chunk
+
+        Returns:
+            List of byte chunks, the first one starting with the vDC announcement
+        """
+        snapshot = self.devices.snapshot()
+        cached = self._announce_burst
+        if cached is not None and cached[0] == snapshot.version:
+            return cached[1]
+
+        frames = [fast_codec.encode_announce_vdc(self.dsuid)]
+        frames.extend(self.get_announce_frame(device) for device in snapshot.values())
+        burst = [b''.join(frames[i:i + chunk_size]) for i in range(0, len(frames), chunk_size)]
+
+        # Publishing the (version, burst) pair is a single store, like the registry swap
+        self._announce_burst = (snapshot.version, burst)
+        return burst
+
+    def get_announce_frame(self, device: VdcDevice) -> bytes:
+        """Get the cached framed announcement for a device, building it on first use."""
+        frame = self._announce_frames.get(device.dsuid)
+        if frame is None:
+            frame = fast_codec.encode_announce_device(device.dsuid, self.dsuid)
+            self._announce_frames[device.dsuid] = frame
+        return frame
+
+    def announce(self, outbound: OutboundQueue, chunk_size: int) -> bool:
+        """
+        Queue the announcements of this vDC and all its devices.
+
+        Args:
+            outbound: OutboundQueue of the session
+            chunk_size: Number of frames per queue entry
+
+        Returns:
+            False if the session closed before the burst was queued
+        """
+        started = time.monotonic()
+        for chunk in self.get_announce_burst(chunk_size):
+            if not outbound.put(chunk, lane=LANE_BULK, block=True):
+                return False
+        self.announce_latency.record(time.monotonic() - started)
+        with self._stats_lock:
+            self.stats["announcements"] += 1
+        return True
@@ -2,9 +2,36 @@
 Virtual Device representation for vDC API
 """
 
-from typing import Dict, Any, Optional, List
-from .genericVDC_pb2 import PropertyElement as PBPropertyElement
-from .property_tree import build_property_tree
+import logging
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Optional, List, Mapping, Sequence, Tuple
+from .channels import ChannelSpec, ChannelStore, DEFAULT_CHANNELS
+from .genericVDC_pb2 import PropertyElement as PBPropertyElement, ResultCode
+from .property_paths import PropertyPathError, PropertyPathTrie, PropertySetter, PropertyWrite, get_path_trie
+from .property_tree import build_property_tree, encode_property_tree
+from .property_template import PropertyTemplate, Slot, get_template
+from .sensors import BinaryInputSpec, SensorSpec, SensorStore, sensor_schema
+
+
+logger = logging.getLogger(__name__)
+
+# Device classes that expose the output state
+OUTPUT_DEVICE_CLASSES = frozenset(["Light", "Shade", "Heating", "Cooling"])
+
+# Marker for absent dictionary entries
+_MISSING = object()
+
+# Property paths whose values are channel values (channel index by path)
+_CHANNEL_PATHS = {"output.value": 0, "outputValue": 0}
+
+# Default output values of common scene numbers (see VdcDevice.call_scene)
+DEFAULT_SCENE_VALUES = {
+    0: 0.0,     # Off
+    5: 100.0,   # On/Full
+    14: 25.0,   # Scene 1 (25%)
+    13: 50.0,   # Scene 2 (50%)
+    12: 75.0,   # Scene 3 (75%)
+}
 
 
 class VdcDevice:
@@ -13,8 +40,40 @@ class VdcDevice:
     
     Each device has a unique dSUID and a set of properties that describe
     its capabilities, configuration, and current state.
+    
+    Subclasses describe additional properties (outputDescription,
+    channelDescriptions, buttonInputDescriptions, ...) declaratively in
+    ``PROPERTY_SCHEMA``: constants and ``Slot("attribute")`` placeholders for
+    dynamic values. The schema is compiled once per device class and model
+    into a shared PropertyTemplate, so answering getProperty only encodes a
+    device's dynamic values. Writable paths are declared in
+    ``PROPERTY_SETTERS`` and compiled once per class into a trie that
+    validates setProperty requests.
     """
     
+    # Declarative class-level properties, merged into every device's tree
+    PROPERTY_SCHEMA: Dict[str, Any] = {}
+    
+    # Paths the vdSM may write, merged with the entries of base classes
+    PROPERTY_SETTERS: Dict[str, PropertySetter] = {
+        "name": PropertySetter(str, attr="name"),
+        "output.value": PropertySetter(float, method="_stage_output_value", read="output_value"),
+        "outputValue": PropertySetter(float, method="_stage_output_value", read="output_value"),
+    }
+    
+    # Output channels in channel index order; index 0 is the default channel
+    CHANNELS: Tuple[ChannelSpec, ...] = DEFAULT_CHANNELS
+    
+    # Sensor and binary inputs in input index order; samples are handed to
+    # the host's SensorPipeline (see VdcHost.enable_sensor_pipeline)
+    SENSORS: Tuple[SensorSpec, ...] = ()
+    BINARY_INPUTS: Tuple[BinaryInputSpec, ...] = ()
+    
+    # Minimum seconds between two output commands when the host debounces
+    # them (see VdcHost.enable_output_debouncing); commands arriving sooner
+    # wait and coalesce to the latest value
+    MIN_COMMAND_INTERVAL: float = 0.0
+    
     def __init__(self, dsuid: str, name: str, model: str = "Generic Device",
                  model_uid: str = "vdc:generic", device_class: str = "Light"):
         """
@@ -41,11 +100,44 @@ class VdcDevice:
         self.vdc_dsuid: Optional[str] = None
         
         # Device state
+        self.channels = ChannelStore(self.CHANNELS)
         self.output_value = 0.0
         self.output_mode = 0
+        self.sensors: Optional[SensorStore] = SensorStore(self.SENSORS) if self.SENSORS else None
+        self.binary_inputs: Optional[SensorStore] = SensorStore(self.BINARY_INPUTS) if self.BINARY_INPUTS else None
         
-        # Custom properties storage
+        # Custom properties storage and their encoding, built on first use
         self._custom_properties: Dict[str, Any] = {}
+        self._custom_encoded: Optional[bytes] = None
+    
+    @property
+    def output_value(self) -> float:
+        """Current value of the default channel (channel index 0)."""
+        return self.channels.values[0]
+    
+    @output_value.setter
+    def output_value(self, value: float) -> None:
+        self.channels.values[0] = value
+    
+    @property
+    def sensor_values(self) -> Sequence[float]:
+        """Current values of the sensors (by sensor index)."""
+        return self.sensors.values if self.sensors is not None else ()
+    
+    @property
+    def sensor_errors(self) -> Sequence[int]:
+        """Error codes of the sensors (by sensor index)."""
+        return self.sensors.errors if self.sensors is not None else ()
+    
+    @property
+    def binary_input_values(self) -> Sequence[bool]:
+        """Current states of the binary inputs (by input index)."""
+        return [value != 0.0 for value in self.binary_inputs.values] if self.binary_inputs is not None else ()
+    
+    @property
+    def binary_input_errors(self) -> Sequence[int]:
+        """Error codes of the binary inputs (by input index)."""
+        return self.binary_inputs.errors if self.binary_inputs is not None else ()
     
     def get_basic_properties(self) -> Dict[str, Any]:
         """
@@ -68,44 +160,425 @@ class VdcDevice:
         
         return props
     
-    def get_property_tree(self, query: Optional[List[PBPropertyElement]] = None) -> List[PBPropertyElement]:
+    def get_properties(self, query: Optional[List[PBPropertyElement]] = None) -> Dict[str, Any]:
         """
-        Get property tree for this device, optionally filtered by query.
+        Get the property dictionary for this device, optionally filtered by query.
+        
+        The host encodes this dictionary directly into the getProperty response.
         
         Args:
             query: Optional list of PropertyElement objects specifying which properties to return
                    If None, returns all basic properties
         
         Returns:
-            List of PropertyElement objects
+            Nested dictionary of properties
         """
         # For simplicity, return all basic properties
         # A full implementation would filter based on query
+        if self._uses_template():
+            properties = self.property_template().render(self)
+            properties.update(self._custom_properties)
+            return properties
+        
         properties = self.get_basic_properties()
         
         # Add output state if applicable
-        if self.device_class in ["Light", "Shade", "Heating", "Cooling"]:
+        if self.device_class in OUTPUT_DEVICE_CLASSES:
             properties["output"] = {
                 "value": self.output_value,
                 "mode": self.output_mode
             }
         
-        return build_property_tree(properties)
+        return properties
+    
+    def encode_properties(self, query: Optional[List[PBPropertyElement]] = None) -> bytes:
+        """
+        Encode the property tree of this device as getProperty response elements.
+        
+        Uses the shared compiled template unless the subclass builds its
+        properties itself (overridden get_basic_properties/get_properties) or
+        a custom property shadows a template property.
+        
+        Args:
+            query: Optional list of PropertyElement objects specifying which properties to return
+        
+        Returns:
+            Encoded repeated PropertyElement entries (field 1)
+        """
+        if self._uses_template():
+            template = self.property_template()
+            custom = self._custom_properties
+            if not custom:
+                return template.encode(self)
+            if template.names.isdisjoint(custom):
+                encoded = self._custom_encoded
+                if encoded is None:
+                    encoded = self._custom_encoded = encode_property_tree(custom)
+                return template.encode(self) + encoded
+        return encode_property_tree(self.get_properties(query))
+    
+    def property_schema(self) -> Dict[str, Any]:
+        """
+        Get the property schema of this device.
+        
+        The schema must only depend on the class, device class, model and
+        model UID, which together identify the shared template.
+        
+        Returns:
+            Nested dictionary of constants and Slots
+        """
+        schema: Dict[str, Any] = {
+            "dSUID": Slot("dsuid"),
+            "name": Slot("name"),
+            "model": self.model,
+            "modelUID": self.model_uid,
+            "type": "vdSD",
+            "deviceClass": self.device_class,
+        }
+        if self.SENSORS or self.BINARY_INPUTS:
+            schema.update(sensor_schema(self.SENSORS, self.BINARY_INPUTS))
+        schema.update(self.PROPERTY_SCHEMA)
+        if self.device_class in OUTPUT_DEVICE_CLASSES:
+            schema["output"] = {"value": Slot("output_value"), "mode": Slot("output_mode")}
+        return schema
+    
+    def property_template(self) -> PropertyTemplate:
+        """
+        Get the compiled property template shared by all devices of this class and model.
+        
+        Returns:
+            PropertyTemplate for this device
+        """
+        key = (type(self), self.device_class, self.model, self.model_uid)
+        return get_template(key, self.property_schema)
+    
+    def _uses_template(self) -> bool:
+        """Check whether the properties come from the template, not from overridden builders."""
+        cls = type(self)
+        return (cls.get_basic_properties is VdcDevice.get_basic_properties
+                and cls.get_properties is VdcDevice.get_properties)
+    
+    def get_property_tree(self, query: Optional[List[PBPropertyElement]] = None) -> List[PBPropertyElement]:
+        """
+        Get property tree for this device, optionally filtered by query.
+        
+        Args:
+            query: Optional list of PropertyElement objects specifying which properties to return
+                   If None, returns all basic properties
+        
+        Returns:
+            List of PropertyElement objects
+        """
+        return build_property_tree(self.get_properties(query))
+    
+    @classmethod
+    def property_paths(cls) -> PropertyPathTrie:
+        """Get the compiled trie of writable property paths of this class."""
+        return get_path_trie(cls)
     
     def set_property(self, name: str, value: Any) -> None:
         """
         Set a property value on this device.
         
+        Paths declared in PROPERTY_SETTERS are validated and written through
+        their setter; any other name is stored as a custom property. An
+        output value is committed with apply_channels, so it reaches
+        write_channels.
+        
         Args:
-            name: Property name
+            name: Property path, e.g. "name" or "buttonInputSettings[0].group"
             value: New property value
+            
+        Raises:
+            PropertyPathError: If the value is invalid for a declared path
         """
-        if name == "name":
-            self.name = value
-        elif name in ["output.value", "outputValue"]:
-            self.output_value = float(value)
-        else:
+        try:
+            writes = self.property_paths().plan_path(name, value, self)
+        except PropertyPathError as e:
+            if e.code != ResultCode.ERR_NOT_FOUND:
+                raise
             self._custom_properties[name] = value
+            self._custom_encoded = None
+            return
+        for write in writes:
+            write.apply(self)
+        self._settle_channels()
+    
+    def update_property(self, name: str, value: Any) -> None:
+        """
+        Record a property value read from the device, without writing it back.
+        
+        Output values become the current channel value directly (clamped to
+        the channel range), without write_channels and without touching
+        values staged by the vdSM. Any other name is set with set_property.
+        
+        Args:
+            name: Property path, e.g. "output.value"
+            value: Value read from the hardware
+            
+        Raises:
+            PropertyPathError: If the value is invalid for a declared path
+        """
+        index = _CHANNEL_PATHS.get(name)
+        if index is None:
+            self.set_property(name, value)
+            return
+        value = self.property_paths().plan_path(name, value, self)[0].value
+        spec = self.channels.specs[index]
+        self.channels.commit({index: min(spec.max, max(spec.min, value))})
+    
+    def _stage_output_value(self, value: float) -> None:
+        """Setter of output.value/outputValue: stage the default channel for the next commit."""
+        self.channels.stage(0, value)
+    
+    def _settle_channels(self) -> None:
+        """Commit channel values staged by set_property."""
+        if self.channels.pending:
+            self.apply_channels()
+    
+    @property
+    def custom_properties(self) -> Mapping[str, Any]:
+        """Read-only view of the custom properties (names without a declared setter)."""
+        return MappingProxyType(self._custom_properties)
+    
+    def get_property_value(self, name: str) -> Any:
+        """
+        Get the current value of a property as set_property writes it.
+        
+        Declared paths are read back through their setter, any other name
+        from the custom properties.
+        
+        Args:
+            name: Property path, e.g. "outputValue" or "buttonInputSettings[0].group"
+            
+        Returns:
+            The current value
+            
+        Raises:
+            KeyError: If the property has no current value
+        """
+        try:
+            setter, indexes = self.property_paths().lookup(name)
+        except PropertyPathError:
+            return self._custom_properties[name]
+        try:
+            return setter.current(self, indexes)
+        except (LookupError, AttributeError):
+            raise KeyError(name) from None
+    
+    def remove_property(self, name: str) -> bool:
+        """
+        Remove a custom property.
+        
+        Args:
+            name: Property name
+            
+        Returns:
+            True if the property existed
+        """
+        if self._custom_properties.pop(name, _MISSING) is _MISSING:
+            return False
+        self._custom_encoded = None
+        return True
+    
+    def invalidate_properties(self) -> None:
+        """
+        Drop the cached encoding of the custom properties.
+        
+        set_property and write_properties do this themselves; call it after
+        changing the custom properties in any other way.
+        """
+        self._custom_encoded = None
+    
+    def write_properties(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply a setProperty request from the vdSM as one transaction.
+        
+        Every path is resolved and validated before anything is written, so
+        a request with an unknown path or a badly typed value changes nothing.
+        The validated changes are then handed to commit_properties once; only
+        if it succeeds are they written to the device, the cached encoding
+        dropped and persist_properties called, once for the whole request.
+        Output values in the request are committed together with one
+        apply_channels call. If writing the request or its output values
+        fails, the paths already written are restored (see
+        _apply_properties), the values they replaced are handed to
+        commit_properties again so the backend matches the device, and the
+        error propagates.
+        Custom properties the device already has may be overwritten as they
+        are. Subclasses that override set_property get one call per
+        top-level property instead, after the declared paths among them were
+        validated and the request was committed.
+        
+        Args:
+            properties: Nested property dictionary
+            
+        Returns:
+            Dictionary of the written values by property path (empty if the request was empty)
+            
+        Raises:
+            PropertyPathError: If a path is unknown or a value invalid
+        """
+        writes, custom_writes, changes = self._plan_properties(properties)
+        if changes:
+            previous = self._previous_properties(writes, custom_writes)
+            self.commit_properties(changes)
+            rollback = None
+            try:
+                rollback = self._apply_properties(properties, writes, custom_writes)
+                self.apply_channels()
+            except Exception:
+                if rollback is not None:
+                    rollback()
+                try:
+                    if previous:
+                        self.commit_properties(previous)
+                except Exception as e:
+                    logger.error(f"Could not restore the backend of {self.name}: {e}")
+                raise
+            self.persist_properties(changes)
+        return changes
+    
+    def _plan_properties(self, properties: Dict[str, Any]
+                         ) -> Tuple[Optional[List[PropertyWrite]], Dict[str, Any], Dict[str, Any]]:
+        """Validate a request; returns (writes or None for set_property overrides, custom writes, changes)."""
+        paths = self.property_paths()
+        if type(self).set_property is not VdcDevice.set_property:
+            paths.plan({name: value for name, value in properties.items() if name in paths}, self)
+            return None, {}, dict(properties)
+        
+        custom = self._custom_properties
+        custom_writes = {}
+        if custom:
+            tree = {}
+            for name, value in properties.items():
+                if name in custom and name not in paths:
+                    custom_writes[name] = value
+                else:
+                    tree[name] = value
+            properties = tree
+        
+        writes = paths.plan(properties, self)
+        changes = {write.path: write.value for write in writes}
+        changes.update(custom_writes)
+        return writes, custom_writes, changes
+    
+    def _previous_properties(self, writes: Optional[List[PropertyWrite]],
+                             custom_writes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Current values of the paths a validated request replaces, by path.
+        
+        Handed to commit_properties if the request fails after it was
+        committed. Paths that cannot be read back (method setters without
+        ``read``, keys the request adds) and set_property overrides are
+        left out.
+        """
+        previous: Dict[str, Any] = {}
+        if writes is None:
+            return previous
+        for write in writes:
+            try:
+                previous[write.path] = write.setter.current(self, write.indexes)
+            except (LookupError, AttributeError):
+                pass
+        for name in custom_writes:
+            previous[name] = self._custom_properties[name]
+        return previous
+    
+    def _apply_properties(self, properties: Dict[str, Any], writes: Optional[List[PropertyWrite]],
+                          custom_writes: Dict[str, Any]) -> Callable[[], None]:
+        """
+        Write a validated and committed request to the device, all or nothing.
+        
+        The current value of each path is read back through its setter
+        before it is written. If a write raises, the paths written before it
+        are restored through their setters, channel values staged by the
+        request are dropped and the error propagates. Paths that cannot be
+        read back (method setters without ``read``) and set_property
+        overrides are not restored.
+        
+        Returns:
+            Callable restoring the device, for a request that fails after this
+        """
+        if writes is None:
+            for name, value in properties.items():
+                self.set_property(name, value)
+            return lambda: None
+        
+        staged = self.channels.pending
+        custom = self._custom_properties
+        previous_custom = {name: custom[name] for name in custom_writes}
+        undo: List[Tuple[PropertyWrite, Any]] = []
+        
+        def rollback() -> None:
+            for write, previous in reversed(undo):
+                try:
+                    self._restore_write(write, previous)
+                except Exception as e:
+                    logger.error(f"Could not restore {write.path} on {self.name}: {e}")
+            if not staged:
+                self.channels.discard()
+            custom.update(previous_custom)
+            self._custom_encoded = None
+        
+        try:
+            for write in writes:
+                try:
+                    previous = write.setter.current(self, write.indexes)
+                except (LookupError, AttributeError):
+                    previous = _MISSING
+                undo.append((write, previous))
+                write.apply(self)
+        except Exception:
+            rollback()
+            raise
+        custom.update(custom_writes)
+        self._custom_encoded = None
+        return rollback
+    
+    def _restore_write(self, write: PropertyWrite, previous: Any) -> None:
+        """Undo one write of a failed request (previous is _MISSING if it could not be read back)."""
+        setter = write.setter
+        if previous is not _MISSING:
+            setter.apply(self, write.indexes, previous)
+        elif setter.attr is not None and write.indexes:
+            # The write added a key to a mapping
+            container = getattr(self, setter.attr)
+            for index in write.indexes[:-1]:
+                container = container[index]
+            if isinstance(container, dict):
+                container.pop(write.indexes[-1], None)
+    
+    def commit_properties(self, changes: Dict[str, Any]) -> None:
+        """
+        Write changed properties to the device backend.
+        
+        Override this method to push configuration to the hardware. It is
+        called once per setProperty request with all validated values,
+        before any of them becomes current; if it raises, the request
+        changes nothing and is answered with an error. If the request fails
+        after this (e.g. in write_channels), it is called a second time with
+        the values the request replaced.
+        
+        Args:
+            changes: Dictionary mapping property path (e.g. "name",
+                     "buttonInputSettings.0.group") to new value
+        """
+        # Default implementation has no backend to write to
+        pass
+    
+    def persist_properties(self, changes: Dict[str, Any]) -> None:
+        """
+        Save the device configuration after a setProperty request.
+        
+        Override this method to store the configuration. It is called once
+        per request, after all values were committed and written.
+        
+        Args:
+            changes: Dictionary mapping property path to new value
+        """
+        # Default implementation keeps the properties in memory only
+        pass
     
     def call_scene(self, scene: int, force: bool = False) -> None:
         """
@@ -118,16 +591,9 @@ class VdcDevice:
             force: Force execution even if device has local priority
         """
         # Default implementation - map common scene numbers to output values
-        scene_map = {
-            0: 0.0,     # Off
-            5: 100.0,   # On/Full
-            14: 25.0,   # Scene 1 (25%)
-            13: 50.0,   # Scene 2 (50%)
-            12: 75.0,   # Scene 3 (75%)
-        }
-        
-        if scene in scene_map:
-            self.output_value = scene_map[scene]
+        value = DEFAULT_SCENE_VALUES.get(scene)
+        if value is not None:
+            self.set_output_value(value)
     
     def set_output_value(self, value: float, apply_now: bool = True) -> None:
         """
@@ -137,8 +603,53 @@ class VdcDevice:
             value: Output value (typically 0.0-100.0)
             apply_now: Apply immediately (True) or stage for later (False)
         """
+        self.set_channel_value(0, value, apply_now)
+    
+    def set_channel_value(self, index: int, value: float, apply_now: bool = True) -> None:
+        """
+        Set the value of an output channel.
+        
+        Values sent with apply_now=False are staged and written together with
+        the next applied value, in a single write_channels call.
+        
+        Args:
+            index: Channel index (see CHANNELS)
+            value: New channel value, clamped to the channel range
+            apply_now: Apply all staged values now (True) or stage this one (False)
+        """
+        self.channels.stage(index, value)
         if apply_now:
-            self.output_value = value
+            self.apply_channels()
+    
+    def apply_channels(self) -> Dict[int, float]:
+        """
+        Commit all staged channel values with one write_channels call.
+        
+        The values become current only after write_channels succeeded; if it
+        raises, the staged values are dropped and the error propagates.
+        
+        Returns:
+            Dictionary of the committed channel values by index (empty if nothing was staged)
+        """
+        changes = self.channels.take_staged()
+        if changes:
+            self.write_channels(changes)
+            self.channels.commit(changes)
+        return changes
+    
+    def write_channels(self, changes: Dict[int, float]) -> None:
+        """
+        Write changed channel values to the hardware.
+        
+        Override this method to implement the device backend. It is called
+        once per commit with all changed channels, e.g. brightness, hue and
+        saturation of a color change together.
+        
+        Args:
+            changes: Dictionary mapping channel index to new value
+        """
+        # Default implementation has no hardware to write to
+        pass
     
     def dim_channel(self, mode: int, channel: int = 0) -> None:
         """
@@ -148,12 +659,19 @@ class VdcDevice:
             mode: Dim mode (0=stop, 1=up, -1=down)
             channel: Channel number (default: 0)
         """
+        value = self._dim_step(mode)
+        if value is not None:
+            self.set_output_value(value)
+    
+    def _dim_step(self, mode: int) -> Optional[float]:
+        """Next output value of the default dim_channel, or None to stop."""
         # Simple implementation - adjust by 10% per call
         if mode == 1:  # Dim up
-            self.output_value = min(100.0, self.output_value + 10.0)
-        elif mode == -1:  # Dim down
-            self.output_value = max(0.0, self.output_value - 10.0)
+            return min(100.0, self.output_value + 10.0)
+        if mode == -1:  # Dim down
+            return max(0.0, self.output_value - 10.0)
         # mode == 0: stop dimming (no action needed)
+        return None
     
     def identify(self) -> None:
         """
@@ -2,15 +2,36 @@
 VDC Host implementation - manages vDC sessions and devices
 """
 
+import asyncio
+import concurrent.futures
 import socket
 import logging
 import threading
 import time
-from typing import Dict, Optional, List, Callable
+from typing import Any, Dict, Hashable, Iterable, Optional, List, Callable, Union
 from .genericVDC_pb2 import Message, Type, ResultCode, GenericResponse
 from .message_handler import MessageHandler
+from .outbound_queue import OutboundQueue
+from .lanes import InboundLanes, LANE_BULK, LANE_CONTROL, LANE_NAMES, LANE_REQUEST, lane_for_type
+from .metrics import LatencyStats
+from .message_pool import MessagePool
+from .async_device import AsyncCommandRunner, AsyncVdcDevice, KIND_PROPERTIES
+from .capture import CaptureWriter, DIRECTION_IN
+from .debounce import KIND_DIM, KIND_IDENTIFY, KIND_OUTPUT, KIND_SCENE, OutputDebouncer
+from .discovery import ServiceAdvertiser
+from .transport import TcpTransport, Transport
+from .device_config import ConfigDiff, ConfigSource, DeviceSpec, diff_config, load_config
+from .log_utils import LogThrottle
+from .scheduler import PollJob, PollScheduler
+from .sensors import SensorPipeline
+from .wire import InboundFrame, message_type_name
+from . import fast_codec
+from .vdc import Vdc
 from .vdc_device import VdcDevice
-from .property_tree import build_property_tree, property_tree_to_dict
+from .workers import WorkerDevice, WorkerGroup
+from .registry import DeviceRegistry
+from .property_tree import property_tree_to_dict
+from .property_paths import PropertyPathError
 
 
 logger = logging.getLogger(__name__)
@@ -25,83 +46,779 @@ class VdcHost:
     - Session management (hello handshake, ping/pong)
     - Device announcements
     - Message routing and handling
+    
+    A host serves one or more vDCs (see Vdc), each with its own device
+    registry, announce state and metrics. ``self.devices`` indexes the
+    devices of all vDCs for message routing.
+    
+    Each session uses three priority lanes (control, request, bulk) for both
+    directions. Ping and bye are handled directly on the reader thread and
+    pongs bypass queued traffic, so liveness holds while requests, device
+    callbacks or announce bursts are still being processed. Inbound requests
+    and notifications are handled in arrival order.
+    
+    A session whose vdSM has silently disappeared is detected by TCP
+    keepalive and by an idle timeout derived from the expected ping cadence.
+    A new connection always replaces the current session.
     """
     
-    def __init__(self, dsuid: str, vdc_dsuid: str, port: int = 8444):
+    # Number of announce frames joined into one outbound queue entry
+    ANNOUNCE_CHUNK = 64
+    
+    def __init__(self, dsuid: str, vdc_dsuid: Optional[str] = None, port: int = 8444,
+                 outbound_high_water: int = OutboundQueue.DEFAULT_HIGH_WATER,
+                 outbound_max_frames: int = OutboundQueue.DEFAULT_MAX_FRAMES,
+                 send_timeout: float = OutboundQueue.DEFAULT_SEND_TIMEOUT,
+                 inbound_max_items: int = 1024,
+                 ping_interval: Optional[float] = 30.0, missed_pings: int = 3,
+                 message_pool: bool = False, transport: Optional[Transport] = None):
         """
         Initialize a vDC Host.
         
         Args:
             dsuid: 34-character hexadecimal dSUID for the vDC host
-            vdc_dsuid: 34-character hexadecimal dSUID for the vDC itself
+            vdc_dsuid: 34-character hexadecimal dSUID of a default vDC, or None
+                       to add all vDCs with add_vdc
             port: TCP port to listen on (default: 8444)
+            outbound_high_water: Outbound queue depth above which push
+                                 notifications collapse to the latest value
+            outbound_max_frames: Hard limit on queued outbound frames
+            send_timeout: Seconds a write may block before the vdSM is
+                          considered stalled and the session is closed
+            inbound_max_items: Maximum queued inbound requests/notifications
+                               before the reader stops reading
+            ping_interval: Expected seconds between vdSM pings, or None to
+                           disable the idle timeout
+            missed_pings: Number of missed pings after which the session is
+                          considered dead
+            message_pool: Reuse Message objects for parsing and responses
+                          (see MessagePool for the lifetime rules handlers
+                          must follow)
+            transport: Where to listen for the vdSM (default: TCP on all
+                       interfaces at ``port``; see ds_vdc_api.transport)
         """
         if len(dsuid) != 34:
             raise ValueError(f"Host dSUID must be 34 hex characters, got {len(dsuid)}")
-        if len(vdc_dsuid) != 34:
-            raise ValueError(f"vDC dSUID must be 34 hex characters, got {len(vdc_dsuid)}")
         
         self.dsuid = dsuid
         self.vdc_dsuid = vdc_dsuid
         self.port = port
         self.api_version = 3
         
-        # Device registry
-        self.devices: Dict[str, VdcDevice] = {}
+        # vDCs served by this host, and a copy-on-write index of the devices
+        # of all vDCs that the session threads read without locking
+        self.vdcs: Dict[str, Vdc] = {}
+        self.devices = DeviceRegistry()
         
         # Session state
         self.vdsm_dsuid: Optional[str] = None
         self.session_active = False
         self.next_message_id = 1
         
-        # TCP server
-        self.server_socket: Optional[socket.socket] = None
+        # Listener and current vdSM connection
+        self.transport = transport if transport is not None else TcpTransport("0.0.0.0", port)
         self.client_socket: Optional[socket.socket] = None
         self.running = False
+        self._session_thread: Optional[threading.Thread] = None
+        
+        # Dead-peer detection
+        self.ping_interval = ping_interval
+        self.missed_pings = missed_pings
+        
+        # Optional per-session message pool
+        self.use_message_pool = message_pool
+        self._pool: Optional[MessagePool] = None
         
         # Message handler
         self.message_handler = MessageHandler()
         
-    def add_device(self, device: VdcDevice) -> None:
+        # Outbound buffering (one queue per session)
+        self.outbound_high_water = outbound_high_water
+        self.outbound_max_frames = outbound_max_frames
+        self.send_timeout = send_timeout
+        self.outbound: Optional[OutboundQueue] = None
+        self._closed_session_stats: Dict[str, int] = {}
+        
+        # Priority lanes and their latency metrics (kept across sessions)
+        self.inbound_max_items = inbound_max_items
+        self.inbound_latency = [LatencyStats() for _ in LANE_NAMES]
+        self.outbound_latency = [LatencyStats() for _ in LANE_NAMES]
+        
+        # Optional pre-parse filter: called with (message type, message_id) of
+        # each received frame; returning False drops the frame unparsed
+        self.frame_filter: Optional[Callable[[int, int], bool]] = None
+        self.frame_stats: Dict[str, int] = {"received": 0, "filtered": 0, "malformed": 0, "shed": 0}
+        
+        # Pings are answered by the fast codec without a protobuf parse,
+        # unless a subclass customizes _handle_ping
+        self._fast_ping = type(self)._handle_ping is VdcHost._handle_ping
+        
+        # Optional capture of the raw session traffic (see start_capture)
+        self.capture: Optional[CaptureWriter] = None
+        
+        # Optional mDNS advertisement, started with the server (see enable_discovery)
+        self.discovery: Optional[ServiceAdvertiser] = None
+        
+        # Optional coalescing of device commands (see enable_output_debouncing)
+        self.output_debouncer: Optional[OutputDebouncer] = None
+        
+        # Event loop awaiting AsyncVdcDevice hooks (see enable_async_commands)
+        self.async_runner: Optional[AsyncCommandRunner] = None
+        
+        # Batched pushes of sensor samples (see enable_sensor_pipeline)
+        self.sensor_pipeline: Optional[SensorPipeline] = None
+        
+        # Device drivers running in supervised worker processes (see add_worker_group)
+        self.worker_groups: List[WorkerGroup] = []
+        
+        # Optional listener for applied setProperty requests: called once per
+        # request with (device, changes by property path) after it was committed
+        self.on_properties_changed: Optional[Callable[[VdcDevice, Dict[str, Any]], None]] = None
+        
+        # Rate limits for log lines emitted per notification (see log_utils)
+        self.log_throttle = LogThrottle(logger)
+        
+        # Shared polling of device backends; changed values are pushed to the vdSM
+        self.scheduler = PollScheduler(on_change=self._on_polled_change)
+        
+        if vdc_dsuid is not None:
+            self.add_vdc(Vdc(vdc_dsuid))
+        
+    @property
+    def server_socket(self) -> Optional[socket.socket]:
+        """Listening socket of a TCP or Unix socket transport, None otherwise."""
+        return getattr(self.transport, "sock", None)
+    
+    @property
+    def idle_timeout(self) -> Optional[float]:
+        """Seconds without any traffic after which a session is torn down (None: never)."""
+        if not self.ping_interval:
+            return None
+        return self.ping_interval * self.missed_pings
+    
+    @property
+    def lane_latency(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Latency summary per priority lane.
+        
+        Inbound latency is the time from receiving a message until its handler
+        finished; outbound latency is the time from queueing a frame until it
+        was written to the socket.
+        
+        Returns:
+            {"inbound": {lane: stats}, "outbound": {lane: stats}}
+        """
+        return {
+            "inbound": {name: self.inbound_latency[lane].snapshot()
+                        for lane, name in enumerate(LANE_NAMES)},
+            "outbound": {name: self.outbound_latency[lane].snapshot()
+                         for lane, name in enumerate(LANE_NAMES)},
+        }
+        
+    @property
+    def backpressure_stats(self) -> Dict[str, int]:
+        """
+        Outbound queue counters accumulated over all sessions.
+        
+        Returns:
+            Dictionary with enqueued, sent, coalesced, dropped, stalls, ... counts
+        """
+        stats = dict(self._closed_session_stats)
+        if self.outbound is not None:
+            self._merge_queue_stats(stats, self.outbound.stats)
+        return stats
+    
+    @property
+    def vdc_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Metrics of each vDC (see Vdc.metrics).
+        
+        Returns:
+            Dictionary mapping vDC dSUID to its metrics
+        """
+        return {dsuid: vdc.metrics for dsuid, vdc in list(self.vdcs.items())}
+    
+    @staticmethod
+    def _merge_queue_stats(target: Dict[str, int], stats: Dict[str, int]) -> None:
+        """Add outbound queue counters into target (max_depth is a maximum, not a sum)."""
+        for name, value in stats.items():
+            if name == "max_depth":
+                target[name] = max(target.get(name, 0), value)
+            else:
+                target[name] = target.get(name, 0) + value
+    
+    def push_property(self, dsuid: str, properties: Dict[str, Any],
+                      coalesce_key: Optional[Hashable] = None) -> bool:
+        """
+        Push changed property values of a device to the vdSM.
+        
+        Pushes are subject to backpressure: while the vdSM is slow, repeated
+        pushes of the same properties of a device collapse to the latest value.
+        
+        Args:
+            dsuid: dSUID of the device whose properties changed
+            properties: Nested dictionary of changed properties
+            coalesce_key: Identifies pushes that may replace each other
+                          (default: the dSUID and the top-level property names)
+            
+        Returns:
+            True if the push was queued, False if no session is active or it was dropped
+        """
+        if not self.session_active:
+            return False
+        
+        frame = fast_codec.encode_push_property(dsuid, properties)
+        if coalesce_key is None:
+            coalesce_key = (dsuid, tuple(sorted(properties)))
+        return self._send_frame(frame, LANE_BULK, coalesce_key=coalesce_key)
+    
+    def _send_message(self, msg: Message, coalesce_key: Optional[Hashable] = None,
+                      block: bool = False) -> bool:
         """
-        Add a virtual device to this vDC host.
+        Queue a message for the connected vdSM in the lane of its type.
         
         Args:
-            device: VdcDevice instance to add
+            msg: Message to send
+            coalesce_key: Set for state updates that may collapse under backpressure
+            block: Wait for queue space (bulk producers only, never the session threads)
+            
+        Returns:
+            True if queued, False if there is no session or the frame was dropped
+        """
+        try:
+            frame = self.message_handler.encode_frame(msg)
+            lane = lane_for_type(msg.type)
+        finally:
+            # The frame is serialized, so a pooled message can be reused
+            self._release_message(msg)
+        return self._send_frame(frame, lane, coalesce_key, block)
+    
+    def _send_frame(self, frame: bytes, lane: int, coalesce_key: Optional[Hashable] = None,
+                    block: bool = False) -> bool:
         """
-        device.vdc_dsuid = self.vdc_dsuid
-        self.devices[device.dsuid] = device
-        logger.info(f"Added device: {device.name} ({device.dsuid})")
+        Queue an already framed message for the connected vdSM.
+        
+        Args:
+            frame: Length-prefixed serialized message
+            lane: Priority lane of the message
+            coalesce_key: Set for state updates that may collapse under backpressure
+            block: Wait for queue space (bulk producers only, never the session threads)
+            
+        Returns:
+            True if queued, False if there is no session or the frame was dropped
+        """
+        outbound = self.outbound
+        if outbound is None:
+            return False
+        return outbound.put(frame, coalesce_key, lane, block)
+    
+    def _new_message(self, msg_type: int) -> Message:
+        """
+        Create an outgoing message, taken from the session pool if enabled.
+        
+        Pooled messages are only valid until they are passed to _send_message
+        (or _release_message); do not keep references to them.
+        
+        Args:
+            msg_type: Message Type
+            
+        Returns:
+            Message with the type set
+        """
+        pool = self._pool
+        if pool is not None:
+            return pool.acquire(msg_type)
+        msg = Message()
+        msg.type = msg_type
+        return msg
+    
+    def _release_message(self, msg: Message) -> None:
+        """Return a message to the session pool if it was leased from it."""
+        pool = self._pool
+        if pool is not None and pool.owns(msg):
+            pool.release(msg)
+
+    def add_vdc(self, vdc: Vdc) -> None:
+        """
+        Serve a vDC from this host.
+        
+        If a session is active, the vDC and its devices are announced immediately.
+        
+        Args:
+            vdc: Vdc instance to add
+            
+        Raises:
+            ValueError: If the vDC is already served by another host, or one of
+                        its devices belongs to another vDC of this host
+        """
+        if vdc.host is not None and vdc.host is not self:
+            raise ValueError(f"vDC {vdc.dsuid} is already served by another host")
+        devices = vdc.devices.snapshot()
+        for dsuid in devices:
+            other = self.devices.get(dsuid)
+            if other is not None and other.vdc_dsuid != vdc.dsuid:
+                raise ValueError(f"Device {dsuid} already belongs to vDC {other.vdc_dsuid}")
+        
+        vdc.host = self
+        self.vdcs[vdc.dsuid] = vdc
+        self.devices.update(add=devices.values())
+        logger.info("Added vDC: %s (%s) with %d devices", vdc.name, vdc.dsuid, len(vdc.devices))
         
-        # If session is active, announce the device immediately
         if self.session_active and self.client_socket:
-            self._announce_device(device)
+            threading.Thread(target=self._announce_vdc, args=(vdc,),
+                             name=f"vdc-announce-{vdc.dsuid[-6:]}", daemon=True).start()
+    
+    def remove_vdc(self, dsuid: str) -> None:
+        """
+        Stop serving a vDC, vanishing its devices if a session is active.
+        
+        Args:
+            dsuid: dSUID of the vDC to remove
+        """
+        vdc = self.vdcs.pop(dsuid, None)
+        if vdc is None:
+            return
+        
+        self._devices_removed(vdc, list(vdc.devices.snapshot().values()))
+        vdc.host = None
+        logger.info("Removed vDC: %s (%s)", vdc.name, dsuid)
+    
+    def get_vdc(self, dsuid: Optional[str] = None) -> Vdc:
+        """
+        Look up a vDC served by this host.
+        
+        Args:
+            dsuid: dSUID of the vDC, or None for the default vDC
+            
+        Returns:
+            The Vdc instance
+            
+        Raises:
+            KeyError: If there is no such vDC
+        """
+        if dsuid is None:
+            dsuid = self.vdc_dsuid
+            if dsuid is None:
+                raise KeyError("No default vDC configured; pass the vDC dSUID")
+        return self.vdcs[dsuid]
+    
+    def add_device(self, device: VdcDevice, vdc_dsuid: Optional[str] = None) -> None:
+        """
+        Add a virtual device to a vDC of this host.
+        
+        Args:
+            device: VdcDevice instance to add
+            vdc_dsuid: dSUID of the vDC to add the device to (default: the default vDC)
+        """
+        self.get_vdc(vdc_dsuid).add_device(device)
     
     def remove_device(self, dsuid: str) -> None:
         """
-        Remove a virtual device from this vDC host.
+        Remove a virtual device from whichever vDC of this host it belongs to.
         
         Args:
             dsuid: dSUID of device to remove
         """
-        if dsuid in self.devices:
-            device = self.devices[dsuid]
+        device = self.devices.get(dsuid)
+        if device is not None:
+            vdc = self.vdcs.get(device.vdc_dsuid)
+            if vdc is not None:
+                vdc.remove_device(dsuid)
+    
+    def add_devices(self, devices: Iterable[VdcDevice], vdc_dsuid: Optional[str] = None) -> int:
+        """
+        Add many virtual devices to a vDC of this host with one registry update
+        and one announce burst.
+        
+        Args:
+            devices: VdcDevice instances to add
+            vdc_dsuid: dSUID of the vDC to add the devices to (default: the default vDC)
+            
+        Returns:
+            Number of devices added
+        """
+        return self.get_vdc(vdc_dsuid).add_devices(devices)
+    
+    def remove_devices(self, dsuids: Iterable[str]) -> int:
+        """
+        Remove many virtual devices, whichever vDCs of this host they belong to,
+        with one registry update and one vanish burst per vDC.
+        
+        Args:
+            dsuids: dSUIDs of the devices to remove (unknown dSUIDs are ignored)
+            
+        Returns:
+            Number of devices removed
+        """
+        served = self.devices.snapshot()
+        by_vdc: Dict[str, List[str]] = {}
+        for dsuid in dsuids:
+            device = served.get(dsuid)
+            if device is not None:
+                by_vdc.setdefault(device.vdc_dsuid, []).append(dsuid)
+        
+        removed = 0
+        for vdc_dsuid, members in by_vdc.items():
+            vdc = self.vdcs.get(vdc_dsuid)
+            if vdc is not None:
+                removed += vdc.remove_devices(members)
+        return removed
+    
+    def _device_added(self, vdc: Vdc, device: VdcDevice) -> None:
+        """Index a device added to one of our vDCs and announce it if a session is active."""
+        self.devices.add(device)
+        
+        # If session is active, announce the device immediately
+        if self.session_active and self.client_socket:
+            self._announce_device(vdc, device)
+    
+    def _device_removed(self, vdc: Vdc, device: VdcDevice) -> None:
+        """Vanish a device leaving one of our vDCs if a session is active and drop it from the index."""
+        if self.session_active and self.client_socket:
+            self._send_vanish(device)
+        
+        if self.devices.remove(device.dsuid, expected=device) is not None:
+            self.scheduler.remove_device(device.dsuid)
+    
+    def reload_config(self, config: ConfigSource,
+                      factory: Callable[[DeviceSpec], VdcDevice] = DeviceSpec.build) -> ConfigDiff:
+        """
+        Bring the served devices in line with a declarative configuration.
+        
+        The configuration is diffed against the live registry and only the
+        differences are applied: new devices are announced, devices missing
+        from the configuration vanish, devices whose model, class or vDC
+        changed are vanished and announced again as new instances, and name
+        or custom property changes are written to the existing device and
+        pushed. Untouched devices keep their state, polling jobs and cached
+        frames, so the cost follows the number of changes.
+        
+        Args:
+            config: Path of a JSON file, a dictionary with a "devices" list, or
+                    an iterable of DeviceSpec instances or dictionaries
+            factory: Creates the device for an added or replaced spec
             
-            # Send vanish message if session active
-            if self.session_active and self.client_socket:
-                self._send_vanish(device)
+        Returns:
+            The applied ConfigDiff
             
-            del self.devices[dsuid]
-            logger.info(f"Removed device: {device.name} ({dsuid})")
+        Raises:
+            ValueError: If the configuration is invalid
+            KeyError: If a spec names a vDC this host does not serve; nothing
+                      is changed in that case
+        """
+        specs = load_config(config)
+        diff = diff_config(self.devices.snapshot(), specs, self.vdc_dsuid)
+        if not diff:
+            logger.info(f"Configuration reload: no changes ({diff.unchanged} devices)")
+            return diff
+        
+        new_specs = diff.added + diff.replaced
+        for spec in new_specs:
+            self.get_vdc(spec.vdc_dsuid)  # unknown vDC: fail before changing anything
+        created: Dict[str, List[VdcDevice]] = {}
+        for spec in new_specs:
+            created.setdefault(spec.vdc_dsuid, []).append(factory(spec))
+        
+        self.remove_devices(diff.removed + [spec.dsuid for spec in diff.replaced])
+        for vdc_dsuid, devices in created.items():
+            self.vdcs[vdc_dsuid].add_devices(devices)
+        
+        for device, changes, dropped in diff.changed:
+            for name in dropped:
+                device.remove_property(name)
+            for name, value in changes.items():
+                device.set_property(name, value)
+            if changes:
+                self.push_property(device.dsuid, changes)
+        
+        logger.info(f"Configuration reload: {len(diff.added)} added, {len(diff.removed)} removed, "
+                    f"{len(diff.replaced)} replaced, {len(diff.changed)} changed, {diff.unchanged} unchanged")
+        return diff
+    
+    def _devices_added(self, vdc: Vdc, devices: List[VdcDevice]) -> None:
+        """Index devices added to one of our vDCs in bulk and announce them as one burst."""
+        self.devices.update(add=devices)
+        
+        if self.session_active and self.client_socket:
+            frames = [vdc.get_announce_frame(device) for device in devices]
+            if self._queue_burst(frames):
+                logger.info("Announced %d devices of vDC %s", len(devices), vdc.name)
+            else:
+                logger.error("Failed to announce %d devices of vDC %s: session closed", len(devices), vdc.name)
+    
+    def _devices_removed(self, vdc: Vdc, devices: List[VdcDevice]) -> None:
+        """Vanish devices leaving one of our vDCs as one burst and drop them from the index."""
+        if not devices:
+            return
+        if self.session_active and self.client_socket:
+            frames = [fast_codec.encode_vanish(device.dsuid) for device in devices]
+            if self._queue_burst(frames):
+                logger.info("Sent vanish for %d devices of vDC %s", len(devices), vdc.name)
+            else:
+                logger.error("Failed to vanish %d devices of vDC %s: session closed", len(devices), vdc.name)
+        
+        # Only drop index entries still pointing at these instances; a device
+        # re-added to another vDC in the meantime keeps its entry
+        served = self.devices.snapshot()
+        gone = [device.dsuid for device in devices if served.get(device.dsuid) is device]
+        self.devices.update(remove=gone)
+        for dsuid in gone:
+            self.scheduler.remove_device(dsuid)
+    
+    def _queue_burst(self, frames: List[bytes]) -> bool:
+        """Queue framed messages on the bulk lane, joined into ANNOUNCE_CHUNK-sized entries."""
+        outbound = self.outbound
+        if outbound is None or not self.session_active:
+            return False
+        
+        chunk = self.ANNOUNCE_CHUNK
+        for i in range(0, len(frames), chunk):
+            if not outbound.put(b''.join(frames[i:i + chunk]), lane=LANE_BULK, block=True):
+                return False
+        return True
+    
+    def _on_polled_change(self, job: PollJob, value: Any) -> None:
+        """Push a changed polled value to the vdSM, nesting dotted property names."""
+        if job.name is None or not self.session_active:
+            return
+        
+        path = job.name.split(".")
+        properties: Dict[str, Any] = {path[-1]: value}
+        for name in reversed(path[:-1]):
+            properties = {name: properties}
+        self.push_property(job.device.dsuid, properties)
+    
+    def start_capture(self, path: str) -> CaptureWriter:
+        """
+        Start recording all session traffic to an append-only capture file.
+        
+        Every frame read from the vdSM and every block of frames written to it
+        is recorded with its direction and a timestamp; replay it with
+        ``python -m ds_vdc_api.replay``.
+        
+        Args:
+            path: Capture file path (appended to if it exists)
+            
+        Returns:
+            The active CaptureWriter
+        """
+        self.stop_capture()
+        capture = CaptureWriter(path)
+        self.capture = capture
+        outbound = self.outbound
+        if outbound is not None:
+            outbound.capture = capture
+        logger.info(f"Capturing session traffic to {path}")
+        return capture
+    
+    def stop_capture(self) -> None:
+        """Stop recording session traffic and close the capture file."""
+        capture = self.capture
+        if capture is None:
+            return
+        self.capture = None
+        outbound = self.outbound
+        if outbound is not None:
+            outbound.capture = None
+        capture.close()
+        logger.info(f"Captured {capture.records} records ({capture.bytes} bytes) to {capture.path}")
+    
+    def enable_sensor_pipeline(self, flush_interval: float = 0.05,
+                               alive_check_interval: float = 1.0) -> SensorPipeline:
+        """
+        Push sensor and binary input samples according to their rules.
+        
+        Drivers hand samples to ``host.sensor_pipeline.ingest`` (or
+        ``ingest_binary``/``ingest_many``). Each SensorSpec's deadband,
+        minimum push interval and alive timeout decide which samples reach
+        the vdSM: samples within the deadband are absorbed on ingest, bursts
+        are reduced to the latest value per minimum push interval, and
+        inputs silent for longer than their alive timeout are reported with
+        an error. Every ``flush_interval`` the due inputs of a device go out
+        in one pushNotification.
+        
+        Args:
+            flush_interval: Seconds between two batches of pushes
+            alive_check_interval: Seconds between two alive timeout checks
+            
+        Returns:
+            The SensorPipeline
+        """
+        if self.sensor_pipeline is not None:
+            self.sensor_pipeline.stop()
+        pipeline = SensorPipeline(self, flush_interval, alive_check_interval)
+        self.sensor_pipeline = pipeline
+        if self.running:
+            pipeline.start()
+        return pipeline
+    
+    def add_worker_group(self, device_type: type, config: ConfigSource, name: Optional[str] = None,
+                         restart_delay: float = 1.0, hang_timeout: float = 10.0) -> WorkerGroup:
+        """
+        Run the drivers of a group of devices in a supervised worker process.
+        
+        The host serves a WorkerDevice stand-in for each configured device:
+        it is announced like any other device, forwards commands to the
+        worker as compact records, and answers getProperty with the channel,
+        sensor and binary input values the worker publishes in shared memory,
+        without a round trip.
+        A crashing or hanging worker is restarted while the vdSM session
+        stays up. See WorkerGroup.
+        
+        Args:
+            device_type: VdcDevice subclass implementing the drivers; must be
+                         importable by the worker process
+            config: Device specs, in any form accepted by reload_config
+            name: Group name used for the process and thread names
+            restart_delay: Seconds before restarting a worker that died
+            hang_timeout: Seconds without a worker heartbeat before it is killed
+            
+        Returns:
+            The WorkerGroup; its devices are the host-side stand-ins
+            
+        Raises:
+            KeyError: If a spec names a vDC this host does not serve
+        """
+        group = WorkerGroup(device_type, config, name, restart_delay, hang_timeout)
+        by_vdc: Dict[Optional[str], List[VdcDevice]] = {}
+        for spec, device in zip(group.specs, group.devices):
+            by_vdc.setdefault(spec.vdc_dsuid, []).append(device)
+        for vdc_dsuid in by_vdc:
+            self.get_vdc(vdc_dsuid)
+        
+        self.worker_groups.append(group)
+        if self.running:
+            group.start()
+        for vdc_dsuid, devices in by_vdc.items():
+            self.get_vdc(vdc_dsuid).add_devices(devices)
+        return group
+    
+    def remove_worker_group(self, group: WorkerGroup) -> None:
+        """
+        Remove the devices of a worker group and stop its worker process.
+        
+        Args:
+            group: Group returned by add_worker_group
+        """
+        self.remove_devices(device.dsuid for device in group.devices)
+        if group in self.worker_groups:
+            self.worker_groups.remove(group)
+        group.stop()
+    
+    def enable_discovery(self, name: Optional[str] = None, addresses: Optional[List[str]] = None,
+                         interval: float = 30.0, include_loopback: bool = False) -> ServiceAdvertiser:
+        """
+        Advertise this host via mDNS/DNS-SD while the server is running.
+        
+        Registration runs on a background thread once the server socket is
+        listening, so it does not delay start(); the service follows changes
+        of the local addresses and is unregistered by stop(). Requires the
+        ``discovery`` extra (zeroconf).
+        
+        Args:
+            name: Service instance name (default: derived from the host dSUID)
+            addresses: Fixed addresses to advertise, or None to follow the local interfaces
+            interval: Seconds between checks for changed local addresses
+            include_loopback: Also advertise loopback addresses
+            
+        Returns:
+            The ServiceAdvertiser (its stats include the registration time)
+            
+        Raises:
+            ImportError: If zeroconf is not installed
+        """
+        if self.discovery is not None:
+            self.discovery.stop()
+        self.discovery = ServiceAdvertiser(self, name, addresses, interval, include_loopback)
+        if self.running and self.server_socket is not None:
+            self.discovery.start()
+        return self.discovery
+    
+    def enable_output_debouncing(self, workers: int = 4) -> OutputDebouncer:
+        """
+        Run device commands on worker threads and coalesce bursts per device.
+        
+        Scene calls, output values, dim commands and identify requests are
+        queued per device and executed in arrival order, off the dispatch
+        thread. While a device is busy (or within its MIN_COMMAND_INTERVAL),
+        newer applied output values and dim commands for the same channel
+        replace the pending one, so slow backends get the latest value
+        instead of falling behind. See OutputDebouncer.metrics for the
+        coalesced counts and actuation latency.
+        
+        Args:
+            workers: Worker threads; each device is run by one at a time
+            
+        Returns:
+            The OutputDebouncer
+        """
+        if self.output_debouncer is not None:
+            self.output_debouncer.stop()
+        debouncer = OutputDebouncer(workers, on_done=self._command_done)
+        self.output_debouncer = debouncer
+        if self.running:
+            debouncer.start()
+        return debouncer
+    
+    def enable_async_commands(self, timeout: float = 10.0, executor_workers: int = 8) -> AsyncCommandRunner:
+        """
+        Run device commands on an asyncio event loop.
+        
+        The coroutine hooks of AsyncVdcDevice instances are awaited on the
+        ``vdc-async`` thread, and setProperty requests for them are answered
+        when their write_properties coroutine completes. Commands of
+        synchronous devices are adapted by running them on a thread pool from
+        the same loop (unless output debouncing is enabled, which keeps
+        handling them), so one host can mix both. Per device, commands run
+        one at a time in arrival order, each bounded by the device's
+        COMMAND_TIMEOUT or the default timeout, and a newer applied output
+        value or dim command for a channel cancels the previous one.
+        
+        Hosts serving AsyncVdcDevice instances enable this with the defaults
+        on their first command if it was not enabled before.
+        
+        Args:
+            timeout: Default seconds a command may take
+            executor_workers: Threads running the commands of synchronous devices
+            
+        Returns:
+            The AsyncCommandRunner
+        """
+        if self.async_runner is not None:
+            self.async_runner.stop()
+        runner = AsyncCommandRunner(timeout, executor_workers, on_done=self._command_done)
+        self.async_runner = runner
+        if self.running:
+            runner.start()
+        return runner
     
     def start(self, blocking: bool = True) -> None:
         """
         Start the vDC host server.
         
+        The transport is listening when this returns (or blocks), so a
+        vdSM or simulator can connect right away.
+        
         Args:
             blocking: If True, blocks until server stops. If False, runs in background thread.
         """
         self.running = True
+        logger.info(f"Using protobuf backend: {fast_codec.protobuf_backend()}")
+        self.scheduler.start()
+        if self.output_debouncer is not None:
+            self.output_debouncer.start()
+        if self.async_runner is not None:
+            self.async_runner.start()
+        for group in self.worker_groups:
+            group.start()
+        if self.sensor_pipeline is not None:
+            self.sensor_pipeline.start()
+        
+        transport = self.transport
+        transport.listen()
+        logger.info(f"vDC Host listening on {transport.address}")
+        if self.discovery is not None:
+            self.discovery.start()
         
         if blocking:
             self._run_server()
@@ -112,67 +829,214 @@ class VdcHost:
     def stop(self) -> None:
         """Stop the vDC host server."""
         self.running = False
-        if self.server_socket:
-            self.server_socket.close()
-        if self.client_socket:
-            self.client_socket.close()
+        self.scheduler.stop()
+        self.transport.close()
+        self._close_session()
+        self.stop_capture()
+        if self.output_debouncer is not None:
+            self.output_debouncer.stop()
+        if self.async_runner is not None:
+            self.async_runner.stop()
+        if self.sensor_pipeline is not None:
+            self.sensor_pipeline.stop()
+        for group in self.worker_groups:
+            group.stop()
+        if self.discovery is not None:
+            self.discovery.stop()
         logger.info("vDC Host stopped")
     
     def _run_server(self) -> None:
         """Main server loop - accepts connections and handles messages."""
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind(('0.0.0.0', self.port))
-        self.server_socket.listen(1)
-        
-        logger.info(f"vDC Host listening on port {self.port}")
-        
+        transport = self.transport
         while self.running:
             try:
                 # Accept connection
-                self.client_socket, address = self.server_socket.accept()
+                client_socket, address = transport.accept()
                 logger.info(f"Connection from {address}")
                 
-                # Handle this client
-                self._handle_client()
+                # A new connection replaces the current session - the old peer
+                # is most likely gone without having closed its connection
+                self._close_session()
+                
+                self._configure_session_socket(client_socket)
+                self.client_socket = client_socket
+                self._session_thread = threading.Thread(target=self._handle_client, args=(client_socket,),
+                                                        name="vdc-session", daemon=True)
+                self._session_thread.start()
                 
             except Exception as e:
                 if self.running:
                     logger.error(f"Server error: {e}", exc_info=True)
+        
+        self._close_session()
     
-    def _handle_client(self) -> None:
+    def _close_session(self) -> None:
+        """Tear down the current session, if any, and wait for its threads to finish."""
+        client_socket = self.client_socket
+        if client_socket:
+            logger.info("Closing previous vdSM session")
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._session_thread and self._session_thread is not threading.current_thread():
+            self._session_thread.join(timeout=5.0)
+        self._session_thread = None
+    
+    def _configure_session_socket(self, sock: socket.socket) -> None:
+        """Apply the transport's connection options (TCP keepalive) and the idle timeout."""
+        self.transport.configure(sock, self.ping_interval, self.missed_pings)
+        sock.settimeout(self.idle_timeout)
+    
+    def _handle_client(self, client_socket: socket.socket) -> None:
         """Handle a vdSM client connection."""
+        outbound = OutboundQueue(client_socket, self.outbound_high_water,
+                                 self.outbound_max_frames, self.send_timeout,
+                                 self.outbound_latency)
+        outbound.capture = self.capture
+        outbound.start()
+        self.outbound = outbound
+        pool = MessagePool() if self.use_message_pool else None
+        self._pool = pool
+        
+        inbound = InboundLanes(self.inbound_max_items, self.inbound_latency)
+        dispatcher = threading.Thread(target=self._dispatch_loop, args=(inbound,),
+                                      name="vdc-dispatch", daemon=True)
+        dispatcher.start()
+        
         try:
             self.session_active = False
             self.vdsm_dsuid = None
             
             while self.running:
                 # Receive message
-                msg = self.message_handler.receive_message(self.client_socket)
-                if msg is None:
+                data = self.message_handler.receive_frame(client_socket)
+                if data is None:
                     break
                 
-                logger.debug(f"Received message type: {Type.Name(msg.type)}")
+                capture = self.capture
+                if capture is not None:
+                    capture.record_frame(DIRECTION_IN, data)
                 
-                # Process message
-                response = self._process_message(msg)
+                # Only the header is decoded here; the payload is parsed by
+                # whichever thread handles the message
+                self.frame_stats["received"] += 1
+                try:
+                    frame = InboundFrame(data)
+                except ValueError as e:
+                    self.frame_stats["malformed"] += 1
+                    logger.warning(f"Dropping malformed frame: {e}")
+                    continue
+                
+                if self.frame_filter is not None and not self.frame_filter(frame.type, frame.message_id):
+                    self.frame_stats["filtered"] += 1
+                    continue
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Received message type: %s", message_type_name(frame.type))
                 
-                # Send response if needed
-                if response:
-                    self.message_handler.send_message(self.client_socket, response)
-                    logger.debug(f"Sent response type: {Type.Name(response.type)}")
+                lane = lane_for_type(frame.type)
+                if lane == LANE_CONTROL:
+                    # Liveness traffic never waits behind requests or device callbacks
+                    received = time.monotonic()
+                    self._dispatch(frame)
+                    inbound.latency[LANE_CONTROL].record(time.monotonic() - received)
+                elif not inbound.offer(lane, frame):
+                    if inbound.closed:
+                        break
+                    self._shed(frame, outbound)
+        
+        except socket.timeout:
+            logger.warning(f"No traffic from vdSM for {self.idle_timeout}s, closing dead session")
+        
+        except ConnectionResetError:
+            logger.info("Connection reset by vdSM")
         
         except Exception as e:
-            logger.error(f"Client handler error: {e}", exc_info=True)
+            if not outbound.stalled and self.client_socket is client_socket:
+                logger.error(f"Client handler error: {e}", exc_info=True)
         
         finally:
-            self.session_active = False
-            if self.client_socket:
-                self.client_socket.close()
+            # A replacement session may already be running if this thread
+            # outlived _close_session's join; leave its state alone
+            current = self.outbound is outbound
+            if current:
+                self.session_active = False
+            inbound.close()
+            dispatcher.join(timeout=1.0)
+            if current and self.outbound is outbound:
+                self.outbound = None
+            if self._pool is pool:
+                self._pool = None
+            outbound.close(flush_timeout=0.5)
+            self._merge_queue_stats(self._closed_session_stats, outbound.stats)
+            client_socket.close()
+            if self.client_socket is client_socket:
                 self.client_socket = None
             logger.info("Client disconnected")
     
-    def _process_message(self, msg: Message) -> Optional[Message]:
+    def _shed(self, frame: InboundFrame, outbound: OutboundQueue) -> None:
+        """
+        Refuse a frame received while the inbound backlog is full.
+        
+        The reader keeps reading instead of waiting for the dispatcher, so
+        pings are still answered: requests are answered as busy and
+        notifications are dropped.
+        """
+        self.frame_stats["shed"] += 1
+        self.log_throttle.log("shed", logging.WARNING, "Inbound backlog full, refusing %s",
+                              message_type_name(frame.type))
+        if frame.message_id:
+            outbound.put(self._error_frame(frame.message_id, ResultCode.ERR_SERVICE_NOT_AVAILABLE, "busy"),
+                          None, LANE_REQUEST)
+    
+    def _dispatch_loop(self, inbound: InboundLanes) -> None:
+        """Dispatcher thread - handles queued requests and notifications in arrival order."""
+        while True:
+            item = inbound.get()
+            if item is None:
+                return
+            lane, received, frame = item
+            self._dispatch(frame)
+            inbound.latency[lane].record(time.monotonic() - received)
+    
+    def _dispatch(self, frame: InboundFrame) -> None:
+        """Parse one frame, process it and queue its response, if any."""
+        if frame.type == Type.VDSM_SEND_PING and self._fast_ping:
+            try:
+                if fast_codec.PURE_PYTHON_BACKEND:
+                    message_id, dsuid = fast_codec.decode_ping(frame.data)
+                else:
+                    ping = frame.parse()
+                    message_id, dsuid = ping.message_id, ping.vdsm_send_ping.dSUID
+                self._send_frame(fast_codec.encode_pong(message_id, dsuid), LANE_CONTROL)
+            except Exception as e:
+                logger.error(f"Error handling ping: {e}")
+            return
+        
+        pool = self._pool
+        msg = pool.acquire() if pool is not None else Message()
+        try:
+            frame.parse(msg)
+            response = self._process_message(msg)
+        except Exception as e:
+            logger.error(f"Error handling {message_type_name(frame.type)}: {e}", exc_info=True)
+            if lane_for_type(frame.type) != LANE_REQUEST:
+                return
+            response = self._error_frame(frame.message_id, ResultCode.ERR_SERVICE_NOT_AVAILABLE, str(e))
+        finally:
+            self._release_message(msg)
+        
+        if isinstance(response, bytes):
+            # Pre-encoded frames returned by handlers are always responses
+            self._send_frame(response, LANE_REQUEST)
+        elif response:
+            response_type = response.type
+            self._send_message(response)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sent response type: %s", message_type_name(response_type))
+    
+    def _process_message(self, msg: Message) -> Optional[Union[Message, bytes]]:
         """
         Process an incoming message and return response.
         
@@ -180,7 +1044,7 @@ class VdcHost:
             msg: Received Message
             
         Returns:
-            Response Message, or None if no response needed
+            Response Message or pre-encoded response frame, or None if no response needed
         """
         if msg.type == Type.VDSM_REQUEST_HELLO:
             return self._handle_hello(msg)
@@ -206,13 +1070,16 @@ class VdcHost:
             self._handle_undo_scene(msg)
         elif msg.type == Type.VDSM_REQUEST_GENERIC_REQUEST:
             return self._handle_generic_request(msg)
+        elif msg.type == Type.GENERIC_RESPONSE:
+            self._handle_generic_response(msg)
         else:
-            logger.warning(f"Unhandled message type: {Type.Name(msg.type)}")
-            return self._create_error_response(msg.message_id, ResultCode.ERR_NOT_IMPLEMENTED)
+            self.log_throttle.log("unhandled", logging.WARNING, "Unhandled message type: %s",
+                                  message_type_name(msg.type))
+            return self._error_frame(msg.message_id, ResultCode.ERR_NOT_IMPLEMENTED)
         
         return None
     
-    def _handle_hello(self, msg: Message) -> Message:
+    def _handle_hello(self, msg: Message) -> None:
         """Handle hello request from vdSM."""
         self.vdsm_dsuid = msg.vdsm_request_hello.dSUID
         api_version = msg.vdsm_request_hello.api_version
@@ -224,81 +1091,75 @@ class VdcHost:
             logger.warning(f"API version {api_version} may not be fully supported")
         
         # Send hello response
-        response = Message()
-        response.type = Type.VDC_RESPONSE_HELLO
+        response = self._new_message(Type.VDC_RESPONSE_HELLO)
         response.message_id = msg.message_id
         response.vdc_response_hello.dSUID = self.dsuid
         
         self.session_active = True
         
-        # After hello, announce vDC and devices
-        # These are sent after the hello response
-        threading.Thread(target=self._announce_all, daemon=True).start()
+        # Queue the hello response before any announcement so it is sent first,
+        # then announce vDC and devices in the bulk lane
+        self._send_message(response)
+        threading.Thread(target=self._announce_all, name="vdc-announce", daemon=True).start()
         
-        return response
+        return None
     
     def _announce_all(self) -> None:
-        """Announce vDC and all devices after session is established."""
-        time.sleep(0.1)  # Small delay to ensure hello response is sent first
-        
+        """Announce all vDCs and their devices after session is established."""
         if not self.client_socket or not self.session_active:
             return
         
-        # Announce the vDC itself
-        msg = Message()
-        msg.type = Type.VDC_SEND_ANNOUNCE_VDC
-        msg.message_id = 0  # Unsolicited
-        msg.vdc_send_announce_vdc.dSUID = self.vdc_dsuid
-        
-        try:
-            self.message_handler.send_message(self.client_socket, msg)
-            logger.info(f"Announced vDC: {self.vdc_dsuid}")
-        except Exception as e:
-            logger.error(f"Failed to announce vDC: {e}")
+        # Each vDC queues its burst from its own thread; the bursts interleave
+        # chunk by chunk in the bulk lane, so a vDC with many devices does not
+        # hold back the announcement of the others
+        vdcs = list(self.vdcs.values())
+        if len(vdcs) == 1:
+            self._announce_vdc(vdcs[0])
+            return
+        threads = [threading.Thread(target=self._announce_vdc, args=(vdc,),
+                                    name=f"vdc-announce-{vdc.dsuid[-6:]}", daemon=True)
+                   for vdc in vdcs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    def _announce_vdc(self, vdc: Vdc) -> None:
+        """Announce one vDC and all its devices from cached, pre-serialized frames."""
+        outbound = self.outbound
+        if outbound is None or not self.session_active:
             return
         
-        # Announce all devices
-        for device in self.devices.values():
-            self._announce_device(device)
-            time.sleep(0.05)  # Small delay between announcements
+        # The bulk lane paces the burst, so control and request traffic is not delayed by it
+        if vdc.announce(outbound, self.ANNOUNCE_CHUNK):
+            logger.info("Announced vDC %s (%s) and %d devices", vdc.name, vdc.dsuid, len(vdc.devices))
+        else:
+            logger.error("Failed to announce vDC %s: session closed", vdc.name)
     
-    def _announce_device(self, device: VdcDevice) -> None:
+    def _announce_device(self, vdc: Vdc, device: VdcDevice) -> None:
         """Announce a device to vdSM."""
-        if not self.client_socket or not self.session_active:
+        outbound = self.outbound
+        if outbound is None or not self.session_active:
             return
         
-        msg = Message()
-        msg.type = Type.VDC_SEND_ANNOUNCE_DEVICE
-        msg.message_id = 0  # Unsolicited
-        msg.vdc_send_announce_device.dSUID = device.dsuid
-        msg.vdc_send_announce_device.vdc_dSUID = self.vdc_dsuid
-        
-        try:
-            self.message_handler.send_message(self.client_socket, msg)
-            logger.info(f"Announced device: {device.name} ({device.dsuid})")
-        except Exception as e:
-            logger.error(f"Failed to announce device {device.name}: {e}")
+        if outbound.put(vdc.get_announce_frame(device), lane=LANE_BULK, block=True):
+            logger.info("Announced device: %s (%s)", device.name, device.dsuid)
+        else:
+            logger.error("Failed to announce device %s: session closed", device.name)
     
     def _send_vanish(self, device: VdcDevice) -> None:
         """Send vanish message for a device."""
         if not self.client_socket or not self.session_active:
             return
         
-        msg = Message()
-        msg.type = Type.VDC_SEND_VANISH
-        msg.message_id = 0
-        msg.vdc_send_vanish.dSUID = device.dsuid
-        
-        try:
-            self.message_handler.send_message(self.client_socket, msg)
-            logger.info(f"Sent vanish for device: {device.dsuid}")
-        except Exception as e:
-            logger.error(f"Failed to send vanish: {e}")
+        if self._send_frame(fast_codec.encode_vanish(device.dsuid), LANE_BULK):
+            logger.info("Sent vanish for device: %s", device.dsuid)
+        else:
+            logger.error("Failed to send vanish: session closed")
     
     def _handle_ping(self, msg: Message) -> Message:
         """Handle ping request."""
-        response = Message()
-        response.type = Type.VDC_SEND_PONG
+        response = self._new_message(Type.VDC_SEND_PONG)
         response.message_id = msg.message_id
         response.vdc_send_pong.dSUID = msg.vdsm_send_ping.dSUID
         return response
@@ -308,68 +1169,87 @@ class VdcHost:
         logger.info("Received bye from vdSM")
         self.session_active = False
     
-    def _handle_get_property(self, msg: Message) -> Message:
+    def _handle_get_property(self, msg: Message) -> Union[Message, bytes]:
         """Handle get property request."""
         dsuid = msg.vdsm_request_get_property.dSUID
         query = msg.vdsm_request_get_property.query
         
         # Find the target (device, vDC, or vDC host)
-        if dsuid == self.vdc_dsuid:
+        device = self.devices.get(dsuid)
+        if dsuid in self.vdcs:
             # VDC properties
-            properties = build_property_tree({
-                "dSUID": self.vdc_dsuid,
-                "type": "vDC",
-                "name": "Virtual Device Connector",
-                "model": "DS-pyVDC-API",
-                "modelUID": "com.github.karlkiel.ds-pyvdc-api"
-            })
+            properties = self.vdcs[dsuid].get_properties()
         elif dsuid == self.dsuid:
             # VDC host properties
-            properties = build_property_tree({
+            properties = {
                 "dSUID": self.dsuid,
                 "type": "vDChost",
                 "name": "Python vDC Host",
                 "model": "DS-pyVDC-API Host",
-            })
-        elif dsuid in self.devices:
+            }
+        elif device is not None:
             # Device properties
-            device = self.devices[dsuid]
-            properties = device.get_property_tree(query)
+            started = time.monotonic()
+            if type(device).get_property_tree is not VdcDevice.get_property_tree:
+                # Subclass builds its own PropertyElement tree
+                response = self._property_tree_response(msg.message_id, device.get_property_tree(query))
+                self._record_vdc(device, "requests", started)
+                return response
+            tree = device.encode_properties(query)
+            self._record_vdc(device, "requests", started)
+            return fast_codec.encode_get_property_response(msg.message_id, tree)
         else:
             # Not found
-            return self._create_error_response(msg.message_id, ResultCode.ERR_NOT_FOUND)
+            return self._error_frame(msg.message_id, ResultCode.ERR_NOT_FOUND)
         
-        # Build response
-        response = Message()
-        response.type = Type.VDC_RESPONSE_GET_PROPERTY
-        response.message_id = msg.message_id
+        # Encode the property dictionary straight to the wire
+        return fast_codec.encode_get_property_response(msg.message_id, properties)
+    
+    def _property_tree_response(self, message_id: int, properties: list) -> Message:
+        """Build a getProperty response from a PropertyElement list."""
+        response = self._new_message(Type.VDC_RESPONSE_GET_PROPERTY)
+        response.message_id = message_id
         response.vdc_response_get_property.properties.extend(properties)
         
         return response
     
-    def _handle_set_property(self, msg: Message) -> Message:
+    def _handle_set_property(self, msg: Message) -> Optional[bytes]:
         """Handle set property request."""
         dsuid = msg.vdsm_request_set_property.dSUID
         properties = msg.vdsm_request_set_property.properties
         
         # Find target device
-        if dsuid in self.devices:
-            device = self.devices[dsuid]
-            
+        device = self.devices.get(dsuid)
+        if device is not None:
             # Convert property tree to dict for easier handling
             prop_dict = property_tree_to_dict(properties)
+            if isinstance(device, AsyncVdcDevice):
+                self._write_properties_async(device, msg.message_id, prop_dict)
+                return None
+            if isinstance(device, WorkerDevice):
+                self._write_properties_deferred(device, msg.message_id, prop_dict)
+                return None
             
-            # Apply properties
-            for name, value in prop_dict.items():
-                try:
-                    device.set_property(name, value)
-                except Exception as e:
-                    logger.error(f"Failed to set property {name}: {e}")
-                    return self._create_error_response(msg.message_id, ResultCode.ERR_INVALID_VALUE_TYPE)
+            # Apply properties as one transaction, validated before anything is written
+            started = time.monotonic()
+            try:
+                changes = device.write_properties(prop_dict)
+            except PropertyPathError as e:
+                self.log_throttle.log("set_property", logging.WARNING, "Rejected setProperty for %s: %s",
+                                      device.name, e)
+                self._record_vdc(device, "errors", started)
+                return self._error_frame(msg.message_id, e.code, str(e))
+            except Exception as e:
+                logger.error(f"Failed to set properties on {device.name}: {e}")
+                self._record_vdc(device, "errors", started)
+                return self._error_frame(msg.message_id, ResultCode.ERR_INVALID_VALUE_TYPE)
             
-            return self._create_success_response(msg.message_id)
+            self._record_vdc(device, "requests", started)
+            if changes:
+                self._properties_changed(device, changes)
+            return self._success_frame(msg.message_id)
         else:
-            return self._create_error_response(msg.message_id, ResultCode.ERR_NOT_FOUND)
+            return self._error_frame(msg.message_id, ResultCode.ERR_NOT_FOUND)
     
     def _handle_call_scene(self, msg: Message) -> None:
         """Handle call scene notification."""
@@ -377,23 +1257,53 @@ class VdcHost:
         scene = msg.vdsm_send_call_scene.scene
         force = msg.vdsm_send_call_scene.force if msg.vdsm_send_call_scene.HasField('force') else False
         
+        devices = self.devices.snapshot()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        handled = 0
+        fanout_started = time.monotonic()
         for dsuid in dsuids:
-            if dsuid in self.devices:
-                device = self.devices[dsuid]
-                device.call_scene(scene, force)
-                logger.info(f"Called scene {scene} on device {device.name}")
+            device = devices.get(dsuid)
+            if device is not None:
+                self._run_command(device, KIND_SCENE, None, False, device.call_scene, scene, force)
+                handled += 1
+                if debug:
+                    logger.debug("Called scene %d on device %s", scene, device.name)
+        self.log_throttle.log("call_scene", logging.DEBUG, "Scene %d -> %d devices in %.1f ms",
+                              scene, handled, (time.monotonic() - fanout_started) * 1000)
     
     def _handle_set_output_value(self, msg: Message) -> None:
         """Handle set output channel value notification."""
-        dsuids = msg.vdsm_send_output_channel_value.dSUID
-        value = msg.vdsm_send_output_channel_value.value
-        apply_now = msg.vdsm_send_output_channel_value.apply_now
+        notification = msg.vdsm_send_output_channel_value
+        dsuids = notification.dSUID
+        value = notification.value
+        apply_now = notification.apply_now
+        channel_id = notification.channelId
+        channel_type = notification.channel
         
+        devices = self.devices.snapshot()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        handled = 0
+        fanout_started = time.monotonic()
         for dsuid in dsuids:
-            if dsuid in self.devices:
-                device = self.devices[dsuid]
-                device.set_output_value(value, apply_now)
-                logger.info(f"Set output value {value} on device {device.name}")
+            device = devices.get(dsuid)
+            if device is not None:
+                index = device.channels.index_of(channel_id, channel_type)
+                if index is None:
+                    self.log_throttle.log("unknown_channel", logging.WARNING, "Device %s has no channel %s",
+                                          device.name, channel_id or channel_type)
+                    continue
+                # Default channel keeps going through set_output_value for subclasses overriding it
+                if index == 0:
+                    self._run_command(device, KIND_OUTPUT, 0, apply_now, device.set_output_value, value, apply_now)
+                else:
+                    self._run_command(device, KIND_OUTPUT, index, apply_now,
+                                      device.set_channel_value, index, value, apply_now)
+                handled += 1
+                if debug:
+                    logger.debug("Set channel %s to %s on device %s (apply_now=%s)",
+                                 device.channels.specs[index].channel_id, value, device.name, apply_now)
+        self.log_throttle.log("set_output_value", logging.DEBUG, "Output value %s -> %d devices in %.1f ms",
+                              value, handled, (time.monotonic() - fanout_started) * 1000)
     
     def _handle_dim_channel(self, msg: Message) -> None:
         """Handle dim channel notification."""
@@ -401,21 +1311,37 @@ class VdcHost:
         mode = msg.vdsm_send_dim_channel.mode
         channel = msg.vdsm_send_dim_channel.channel if msg.vdsm_send_dim_channel.HasField('channel') else 0
         
+        devices = self.devices.snapshot()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        handled = 0
+        fanout_started = time.monotonic()
         for dsuid in dsuids:
-            if dsuid in self.devices:
-                device = self.devices[dsuid]
-                device.dim_channel(mode, channel)
-                logger.info(f"Dimming channel {channel} mode {mode} on device {device.name}")
+            device = devices.get(dsuid)
+            if device is not None:
+                self._run_command(device, KIND_DIM, channel, True, device.dim_channel, mode, channel)
+                handled += 1
+                if debug:
+                    logger.debug("Dimming channel %d mode %d on device %s", channel, mode, device.name)
+        self.log_throttle.log("dim_channel", logging.DEBUG, "Dim channel %d mode %d -> %d devices in %.1f ms",
+                              channel, mode, handled, (time.monotonic() - fanout_started) * 1000)
     
     def _handle_identify(self, msg: Message) -> None:
         """Handle identify notification."""
         dsuids = msg.vdsm_send_identify.dSUID
         
+        devices = self.devices.snapshot()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        handled = 0
+        fanout_started = time.monotonic()
         for dsuid in dsuids:
-            if dsuid in self.devices:
-                device = self.devices[dsuid]
-                device.identify()
-                logger.info(f"Identify requested for device {device.name}")
+            device = devices.get(dsuid)
+            if device is not None:
+                self._run_command(device, KIND_IDENTIFY, None, False, device.identify)
+                handled += 1
+                if debug:
+                    logger.debug("Identify requested for device %s", device.name)
+        self.log_throttle.log("identify", logging.DEBUG, "Identify -> %d devices in %.1f ms",
+                              handled, (time.monotonic() - fanout_started) * 1000)
     
     def _handle_save_scene(self, msg: Message) -> None:
         """Handle save scene notification."""
@@ -428,16 +1354,124 @@ class VdcHost:
         # Default implementation does nothing
         logger.info("Undo scene notification received (not implemented)")
     
-    def _handle_generic_request(self, msg: Message) -> Message:
+    def _handle_generic_request(self, msg: Message) -> bytes:
         """Handle generic request (API v2c+)."""
         method_name = msg.vdsm_request_generic_request.methodname
         logger.info(f"Generic request: {method_name} (not implemented)")
-        return self._create_error_response(msg.message_id, ResultCode.ERR_NOT_IMPLEMENTED)
+        return self._error_frame(msg.message_id, ResultCode.ERR_NOT_IMPLEMENTED)
+    
+    def _handle_generic_response(self, msg: Message) -> None:
+        """Handle the vdSM's acknowledgement of an announcement."""
+        code = msg.generic_response.code
+        if code != ResultCode.ERR_OK:
+            self.log_throttle.log("rejected", logging.WARNING, "vdSM rejected message %d: %s %s",
+                                  msg.message_id, ResultCode.Name(code), msg.generic_response.description)
+    
+    def _run_command(self, device: VdcDevice, kind: str, key: Any, coalesce: bool,
+                     func: Callable[..., Any], *args: Any) -> None:
+        """
+        Run a device command.
+        
+        AsyncVdcDevice commands go to the async runner; other commands are
+        queued with the output debouncer or the async runner if enabled,
+        and called right away otherwise.
+        """
+        if isinstance(device, AsyncVdcDevice):
+            (self.async_runner or self.enable_async_commands()).submit(device, kind, key, func, *args,
+                                                                       coalesce=coalesce)
+            return
+        debouncer = self.output_debouncer
+        if debouncer is not None:
+            debouncer.submit(device, kind, key, func, *args, coalesce=coalesce)
+            return
+        runner = self.async_runner
+        if runner is not None:
+            runner.submit(device, kind, key, func, *args, coalesce=coalesce)
+            return
+        started = time.monotonic()
+        func(*args)
+        self._record_vdc(device, "notifications", started)
+    
+    def _command_done(self, device: VdcDevice, started: float) -> None:
+        """Account a command executed by the output debouncer or the async runner."""
+        self._record_vdc(device, "notifications", started)
+    
+    def _write_properties_async(self, device: AsyncVdcDevice, message_id: int,
+                                properties: Dict[str, Any]) -> None:
+        """Run write_properties of an async device and answer the request when it completes."""
+        runner = self.async_runner or self.enable_async_commands()
+        respond = self._set_property_responder(device, message_id)
+        result = runner.submit(device, KIND_PROPERTIES, None, device.write_properties, properties)
+        result.add_done_callback(respond)
+    
+    def _write_properties_deferred(self, device: WorkerDevice, message_id: int,
+                                   properties: Dict[str, Any]) -> None:
+        """Forward a setProperty request to a worker and answer it when the driver's result arrives."""
+        respond = self._set_property_responder(device, message_id)
+        try:
+            result = device.submit_properties(properties)
+        except Exception as e:
+            result = concurrent.futures.Future()
+            result.set_exception(e)
+        result.add_done_callback(respond)
+    
+    def _set_property_responder(self, device: VdcDevice,
+                                message_id: int) -> Callable[[concurrent.futures.Future], None]:
+        """Callback answering a setProperty request with the outcome of a write_properties future."""
+        outbound = self.outbound
+        started = time.monotonic()
+        
+        def respond(result: concurrent.futures.Future) -> None:
+            error = None if result.cancelled() else result.exception()
+            if result.cancelled():
+                frame = self._error_frame(message_id, ResultCode.ERR_SERVICE_NOT_AVAILABLE, "cancelled")
+            elif error is None:
+                frame = self._success_frame(message_id)
+            elif isinstance(error, PropertyPathError):
+                self.log_throttle.log("set_property", logging.WARNING, "Rejected setProperty for %s: %s",
+                                      device.name, error)
+                frame = self._error_frame(message_id, error.code, str(error))
+            elif isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+                frame = self._error_frame(message_id, ResultCode.ERR_SERVICE_NOT_AVAILABLE, "timed out")
+            else:
+                logger.error(f"Failed to set properties on {device.name}: {error}")
+                frame = self._error_frame(message_id, ResultCode.ERR_INVALID_VALUE_TYPE)
+            failed = result.cancelled() or error is not None
+            self._record_vdc(device, "errors" if failed else "requests", started)
+            # Answer on the session the request came from
+            if outbound is not None:
+                outbound.put(frame, None, LANE_REQUEST)
+            if not failed and result.result():
+                self._properties_changed(device, result.result())
+        
+        return respond
+    
+    def _properties_changed(self, device: VdcDevice, changes: Dict[str, Any]) -> None:
+        """Notify on_properties_changed of an applied setProperty request."""
+        listener = self.on_properties_changed
+        if listener is not None:
+            try:
+                listener(device, changes)
+            except Exception as e:
+                logger.error(f"Property change listener failed for {device.name}: {e}")
+    
+    def _record_vdc(self, device: VdcDevice, kind: str, started: float) -> None:
+        """Account a handled request or notification to the metrics of the device's vDC."""
+        vdc = self.vdcs.get(device.vdc_dsuid)
+        if vdc is not None:
+            vdc.record(kind, time.monotonic() - started)
+    
+    def _success_frame(self, message_id: int) -> bytes:
+        """Encode a framed generic success response with the fast codec."""
+        return fast_codec.encode_generic_response(message_id, ResultCode.ERR_OK)
+    
+    def _error_frame(self, message_id: int, error_code: ResultCode, description: str = "") -> bytes:
+        """Encode a framed generic error response with the fast codec."""
+        return fast_codec.encode_generic_response(message_id, error_code, description)
     
     def _create_success_response(self, message_id: int) -> Message:
         """Create a generic success response."""
-        response = Message()
-        response.type = Type.GENERIC_RESPONSE
+        response = self._new_message(Type.GENERIC_RESPONSE)
         response.message_id = message_id
         response.generic_response.code = ResultCode.ERR_OK
         return response
@@ -445,8 +1479,7 @@ class VdcHost:
     def _create_error_response(self, message_id: int, error_code: ResultCode, 
                                description: str = "") -> Message:
         """Create a generic error response."""
-        response = Message()
-        response.type = Type.GENERIC_RESPONSE
+        response = self._new_message(Type.GENERIC_RESPONSE)
         response.message_id = message_id
         response.generic_response.code = error_code
         if description:
@@ -0,0 +1,185 @@
+"""
+Wire-level helpers - inspect protobuf frames without a full parse
+"""
+
+from typing import Optional, Tuple
+from .genericVDC_pb2 import Message, Type
+
+
+# Wire types (protobuf encoding)
+WIRETYPE_VARINT = 0
+WIRETYPE_FIXED64 = 1
+WIRETYPE_LENGTH_DELIMITED = 2
+WIRETYPE_FIXED32 = 5
+
+# Tags of the Message header fields
+_TAG_TYPE = (1 << 3) | WIRETYPE_VARINT          # 0x08
+_TAG_MESSAGE_ID = (2 << 3) | WIRETYPE_VARINT    # 0x10
+
+
+_SMALL_VARINTS = [bytes([value]) for value in range(128)]
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encode a non-negative integer as base-128 varint.
+
+    Args:
+        value: Value to encode (0 to 2**64 - 1)
+
+    Returns:
+        Encoded bytes
+
+    Raises:
+        ValueError: If the value is negative or does not fit into 64 bits
+    """
+    if 0 <= value < 0x80:
+        return _SMALL_VARINTS[value]
+    if value < 0 or value > 0xFFFFFFFFFFFFFFFF:
+        raise ValueError(f"varint out of range: {value}")
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """
+    Decode a base-128 varint.
+
+    Args:
+        data: Buffer to read from
+        pos: Offset of the first varint byte
+
+    Returns:
+        Tuple of (value, offset after the varint)
+
+    Raises:
+        ValueError: If the varint is truncated or longer than 10 bytes
+    """
+    result = 0
+    shift = 0
+    end = len(data)
+    while pos < end:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            break
+    raise ValueError("Truncated or oversized varint")
+
+
+def peek_header(data: bytes) -> Tuple[int, int]:
+    """
+    Read the ``type`` and ``message_id`` fields of a serialized Message.
+
+    Only the top-level fields are scanned, and scanning stops as soon as both
+    header fields were seen. Serializers emit fields in field-number order, so
+    for well-formed frames this reads just the first few bytes.
+
+    Args:
+        data: Serialized Message (without the length header)
+
+    Returns:
+        Tuple of (message type, message_id); message_id is 0 if absent
+
+    Raises:
+        ValueError: If the frame is malformed or has no type field
+    """
+    # Fast path: "08 <type> 10 <id>" with single-byte values, as produced by
+    # protobuf runtimes for the message types of this protocol
+    if len(data) >= 4 and data[0] == _TAG_TYPE and data[1] < 0x80 \
+            and data[2] == _TAG_MESSAGE_ID and data[3] < 0x80:
+        return data[1], data[3]
+
+    msg_type: Optional[int] = None
+    message_id = 0
+    seen_id = False
+    pos = 0
+    end = len(data)
+
+    while pos < end and (msg_type is None or not seen_id):
+        tag, pos = read_varint(data, pos)
+        field_number = tag >> 3
+        wire_type = tag & 0x07
+
+        if wire_type == WIRETYPE_VARINT:
+            value, pos = read_varint(data, pos)
+            if field_number == 1:
+                msg_type = value
+            elif field_number == 2:
+                message_id = value
+                seen_id = True
+        elif wire_type == WIRETYPE_LENGTH_DELIMITED:
+            length, pos = read_varint(data, pos)
+            pos += length
+        elif wire_type == WIRETYPE_FIXED64:
+            pos += 8
+        elif wire_type == WIRETYPE_FIXED32:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+
+    if pos > end:
+        raise ValueError("Truncated field")
+    if msg_type is None:
+        raise ValueError("Message has no type field")
+    return msg_type, message_id
+
+
+def message_type_name(msg_type: int) -> str:
+    """
+    Get the name of a message type, tolerating values unknown to this API version.
+
+    Args:
+        msg_type: Message Type enum value
+
+    Returns:
+        Enum name, or the number as string
+    """
+    try:
+        return Type.Name(msg_type)
+    except ValueError:
+        return str(msg_type)
+
+
+class InboundFrame:
+    """
+    A received frame whose header has been peeked but whose payload is
+    only parsed when a handler needs it.
+    """
+
+    __slots__ = ("data", "type", "message_id")
+
+    def __init__(self, data: bytes):
+        """
+        Peek the header of a received frame.
+
+        Args:
+            data: Serialized Message (without the length header)
+
+        Raises:
+            ValueError: If the header cannot be decoded
+        """
+        self.data = data
+        self.type, self.message_id = peek_header(data)
+
+    def parse(self, msg: Optional[Message] = None) -> Message:
+        """
+        Fully parse the frame.
+
+        Args:
+            msg: Optional empty Message to parse into (e.g. from a MessagePool)
+
+        Returns:
+            Parsed Message
+        """
+        if msg is None:
+            msg = Message()
+        msg.ParseFromString(self.data)
+        return msg
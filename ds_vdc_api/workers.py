@@ -0,0 +1,639 @@
+"""
+Worker processes - device drivers isolated in supervised processes with a shared-memory state table
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import multiprocessing.connection
+import pickle
+import struct
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from .async_device import AsyncVdcDevice
+from .device_config import ConfigSource, DeviceSpec, load_config
+from .property_paths import PropertyPathError, PropertySetter
+from .vdc_device import VdcDevice
+
+
+logger = logging.getLogger(__name__)
+
+# Command record: opcode, device slot, integer argument, float argument, payload size
+_RECORD = struct.Struct("<BIidI")
+
+_OP_SCENE = 1           # int: scene, float: force
+_OP_CHANNEL = 2         # int: channel index, float: value (applied now)
+_OP_CHANNEL_STAGED = 3  # int: channel index, float: value (apply_now=False)
+_OP_DIM = 4             # int: channel, float: mode
+_OP_IDENTIFY = 5
+_OP_PROPERTIES = 6      # int: request ticket, payload: pickled property dictionary
+_OP_STOP = 7
+
+# Worker counters in shared memory
+_HEARTBEAT = 0
+_EXECUTED = 1
+_ERRORS = 2
+
+
+class SharedStateTable:
+    """
+    Current values of a group's devices in shared memory.
+
+    One row of ``width`` doubles per device slot, written only by the worker
+    process and read by the host without any IPC. Each row has a sequence
+    counter that is odd while the row is being written (a seqlock), so a
+    reader never sees half of an update.
+    """
+
+    # Read attempts before a row under a write that never finished is returned as is
+    READ_RETRIES = 100
+
+    def __init__(self, rows: int, width: int, context: Any = multiprocessing):
+        """
+        Allocate the table.
+
+        Args:
+            rows: Number of device slots
+            width: Values per slot
+            context: multiprocessing context allocating the shared memory
+        """
+        self.rows = rows
+        self.width = width
+        self.values = context.RawArray("d", max(1, rows * width))
+        self.seq = context.RawArray("Q", max(1, rows))
+
+    def write(self, row: int, values: Sequence[float]) -> None:
+        """Publish the values of a slot (single writer per row)."""
+        seq = self.seq
+        start = row * self.width
+        seq[row] += 1
+        self.values[start:start + len(values)] = values
+        seq[row] += 1
+
+    def read(self, row: int) -> List[float]:
+        """Read a consistent copy of the values of a slot."""
+        seq = self.seq
+        start = row * self.width
+        end = start + self.width
+        for _ in range(self.READ_RETRIES):
+            before = seq[row]
+            if not before & 1:
+                values = self.values[start:end]
+                if seq[row] == before:
+                    return values
+        return self.values[start:end]
+
+    def repair(self, row: int) -> None:
+        """Close a write left open by a worker that died in the middle of it."""
+        if self.seq[row] & 1:
+            self.seq[row] += 1
+
+
+class WorkerDevice(VdcDevice):
+    """
+    Host-side stand-in for a device whose driver runs in a worker process.
+
+    Commands are forwarded to the worker as compact records; getProperty is
+    answered from the host's copy of the properties, with the channel, sensor
+    and binary input values read from the shared state table. Classes for a
+    driver type are created by worker_proxy_class and carry its CHANNELS,
+    SENSORS, BINARY_INPUTS, PROPERTY_SCHEMA and PROPERTY_SETTERS, so requests
+    are validated before they are forwarded. Slots in the schema can only
+    refer to VdcDevice attributes.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.group: Optional["WorkerGroup"] = None
+        self.slot = 0
+
+    def call_scene(self, scene: int, force: bool = False) -> None:
+        """Forward a scene call to the driver."""
+        self.group.send(self.slot, _OP_SCENE, scene, float(force))
+
+    def set_channel_value(self, index: int, value: float, apply_now: bool = True) -> None:
+        """Forward a channel value to the driver (set_output_value ends up here for channel 0)."""
+        self.group.send(self.slot, _OP_CHANNEL if apply_now else _OP_CHANNEL_STAGED, index, value)
+
+    def dim_channel(self, mode: int, channel: int = 0) -> None:
+        """Forward a dim command to the driver."""
+        self.group.send(self.slot, _OP_DIM, channel, float(mode))
+
+    def identify(self) -> None:
+        """Forward an identify request to the driver."""
+        self.group.send(self.slot, _OP_IDENTIFY, 0, 0.0)
+
+    def write_properties(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate a setProperty request, have the driver apply it and wait for the result.
+
+        The host answers setProperty through submit_properties instead, so
+        its dispatch thread does not wait for the worker.
+
+        Raises:
+            PropertyPathError: If the request is invalid, here or in the driver
+            RuntimeError: If the request was dropped or the driver failed to apply it
+            TimeoutError: If the worker did not answer within the group's property_timeout
+        """
+        return self.submit_properties(properties).result()
+
+    def submit_properties(self, properties: Dict[str, Any]) -> "concurrent.futures.Future[Dict[str, Any]]":
+        """
+        Validate a setProperty request and forward it to the driver without waiting.
+
+        The driver commits and persists the request in the worker, as one
+        transaction of its own. The host copy only changes once the worker
+        reported that the driver applied it; this happens on the group's
+        supervisor thread, which then resolves the returned future.
+
+        Args:
+            properties: Nested property dictionary
+
+        Returns:
+            Future resolved with the written values by property path, or
+            failed with the errors listed for write_properties
+
+        Raises:
+            PropertyPathError: If the request is invalid
+        """
+        writes, custom_writes, changes = self._plan_properties(properties)
+        result: "concurrent.futures.Future[Dict[str, Any]]" = concurrent.futures.Future()
+        if not changes:
+            result.set_result(changes)
+            return result
+
+        def applied(forwarded: concurrent.futures.Future) -> None:
+            error = forwarded.exception()
+            if error is None:
+                try:
+                    self._apply_properties(properties, writes, custom_writes)
+                    # Only commits the host copy; the driver wrote the values
+                    self.apply_channels()
+                except Exception as e:
+                    error = e
+            if error is None:
+                result.set_result(changes)
+            else:
+                result.set_exception(error)
+
+        self.group.write_properties(self.slot, properties).add_done_callback(applied)
+        return result
+
+    def encode_properties(self, query: Optional[List[Any]] = None) -> bytes:
+        """Encode the properties with the values last published by the worker."""
+        _load_state(self, self.group.table.read(self.slot))
+        return super().encode_properties(query)
+
+    def __repr__(self) -> str:
+        return f"WorkerDevice(dsuid={self.dsuid}, name={self.name}, class={self.device_class})"
+
+
+_PROXY_CLASSES: Dict[type, type] = {}
+
+
+def worker_proxy_class(device_type: type) -> type:
+    """
+    Get the WorkerDevice class standing in for a driver class in the host.
+
+    Args:
+        device_type: VdcDevice subclass run in the worker
+
+    Returns:
+        A WorkerDevice subclass with the driver's channels, schema and setters
+    """
+    proxy = _PROXY_CLASSES.get(device_type)
+    if proxy is None:
+        setters: Dict[str, PropertySetter] = {}
+        for klass in reversed(device_type.__mro__):
+            setters.update(getattr(klass, "__dict__", {}).get("PROPERTY_SETTERS", {}))
+        proxy = type(f"{device_type.__name__}Proxy", (WorkerDevice,), {
+            "CHANNELS": device_type.CHANNELS,
+            "SENSORS": device_type.SENSORS,
+            "BINARY_INPUTS": device_type.BINARY_INPUTS,
+            "PROPERTY_SCHEMA": device_type.PROPERTY_SCHEMA,
+            "PROPERTY_SETTERS": setters,
+            "MIN_COMMAND_INTERVAL": device_type.MIN_COMMAND_INTERVAL,
+        })
+        proxy = _PROXY_CLASSES.setdefault(device_type, proxy)
+    return proxy
+
+
+class WorkerGroup:
+    """
+    A group of devices whose drivers run in one supervised worker process.
+
+    The worker builds the drivers from their DeviceSpecs and executes the
+    forwarded commands in arrival order. Commands are queued in the host
+    and sent in batches by the ``vdc-worker-<name>`` thread, so the
+    dispatch thread never waits for the worker. setProperty requests are
+    answered once the driver's result comes back on a reply pipe, on the
+    supervisor thread. After each command, and every half second while idle, the worker
+    publishes the device's channel, sensor and binary input values to the
+    shared state table.
+
+    The supervisor thread restarts the worker when it exits or stops
+    updating its heartbeat for ``hang_timeout`` seconds (a driver call
+    taking that long counts as hung), with exponential backoff. The vdSM
+    session and the host-side devices are not affected; the restarted
+    drivers get the setProperty requests they applied before replayed,
+    start from the last published values, and commands queued meanwhile
+    are delivered to them.
+
+    Driver classes must be importable by the worker (defined at module
+    level), as workers are started with the "spawn" method.
+    """
+
+    def __init__(self, device_type: type, config: ConfigSource, name: Optional[str] = None,
+                 restart_delay: float = 1.0, hang_timeout: float = 10.0, max_pending: int = 10000,
+                 property_timeout: float = 10.0):
+        """
+        Initialize the group (call start to run the worker).
+
+        Args:
+            device_type: VdcDevice subclass implementing the drivers
+            config: Device specs, in any form accepted by load_config
+            name: Group name used for the process and thread names (default: the class name)
+            restart_delay: Seconds before the first restart; doubles for each
+                           worker that dies within a minute, up to 30 s
+            hang_timeout: Seconds without a heartbeat after which the worker is killed
+            max_pending: Commands queued for the worker before new ones are dropped
+            property_timeout: Seconds to wait for the worker's result of a setProperty request
+        """
+        self.device_type = device_type
+        self.specs: List[DeviceSpec] = load_config(config)
+        self.name = name or device_type.__name__
+        self.restart_delay = restart_delay
+        self.hang_timeout = hang_timeout
+        self.max_pending = max_pending
+        self.property_timeout = property_timeout
+        self.stats: Dict[str, int] = {"commands": 0, "dropped": 0, "restarts": 0}
+
+        self._context = multiprocessing.get_context("spawn")
+        self.table = SharedStateTable(len(self.specs), _state_width(device_type), self._context)
+        self._counters = self._context.RawArray("d", 3)
+
+        proxy_type = worker_proxy_class(device_type)
+        self.devices: List[WorkerDevice] = []
+        for slot, spec in enumerate(self.specs):
+            device = spec.build(proxy_type)
+            device.group = self
+            device.slot = slot
+            self.devices.append(device)
+
+        self._pending: Deque[bytes] = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._process: Optional[Any] = None
+        self._conn: Optional[Any] = None
+        self._replies: Optional[Any] = None
+        # ticket -> (result, slot, request, deadline) of setProperty requests the worker has not answered
+        self._requests: Dict[int, Tuple[concurrent.futures.Future, int, Dict[str, Any], float]] = {}
+        self._ticket = 0
+        self._applied: Dict[int, Dict[str, Any]] = {}  # slot -> merged setProperty requests the driver applied
+        self._started_at = 0.0
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def alive(self) -> bool:
+        """Whether the worker process is running."""
+        process = self._process
+        return process is not None and process.is_alive()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Queued, dropped and executed command counts, errors and restarts."""
+        with self._cond:
+            stats: Dict[str, Any] = dict(self.stats)
+            stats["pending"] = len(self._pending)
+        stats["executed"] = int(self._counters[_EXECUTED])
+        stats["errors"] = int(self._counters[_ERRORS])
+        stats["alive"] = self.alive
+        return stats
+
+    def start(self) -> None:
+        """Start the worker process and the sender and supervisor threads."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._spawn(restore=False)
+        self._threads = [threading.Thread(target=self._send_loop, name=f"vdc-worker-{self.name}", daemon=True),
+                         threading.Thread(target=self._supervise, name=f"vdc-supervisor-{self.name}", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Deliver the queued commands, stop the worker and the threads.
+
+        Args:
+            timeout: Seconds to wait for the worker to exit before it is killed
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._pending.append(_RECORD.pack(_OP_STOP, 0, 0, 0.0, 0))
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        process = self._process
+        if process is not None:
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        if self._conn is not None:
+            self._conn.close()
+        if self._replies is not None:
+            self._replies.close()
+        self._process = None
+        self._conn = None
+        self._replies = None
+        with self._cond:
+            requests = list(self._requests.values())
+            self._requests.clear()
+        for result, _, _, _ in requests:
+            result.set_exception(RuntimeError(f"Worker {self.name} stopped"))
+
+    def send(self, slot: int, op: int, iarg: int, farg: float, payload: bytes = b"") -> bool:
+        """
+        Queue a command record for the worker.
+
+        Returns:
+            False if the command was dropped because the queue is full
+        """
+        record = _RECORD.pack(op, slot, iarg, farg, len(payload))
+        if payload:
+            record += payload
+        with self._cond:
+            self.stats["commands"] += 1
+            if len(self._pending) >= self.max_pending:
+                self.stats["dropped"] += 1
+                return False
+            self._pending.append(record)
+            if len(self._pending) == 1:
+                self._cond.notify_all()
+        return True
+
+    def write_properties(self, slot: int, properties: Dict[str, Any]) -> concurrent.futures.Future:
+        """
+        Have the driver of a slot apply a setProperty request.
+
+        Applied requests are kept and replayed to the drivers of a restarted
+        worker; a request that timed out is not.
+
+        Args:
+            slot: Device slot
+            properties: Nested property dictionary
+
+        Returns:
+            Future resolved with None once the driver applied the request, or
+            failed with PropertyPathError if the driver rejected it,
+            RuntimeError if it was dropped or the driver failed to apply it,
+            and TimeoutError if the worker did not answer within property_timeout
+        """
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        with self._cond:
+            self._ticket = self._ticket % 0x7FFFFFFF + 1
+            ticket = self._ticket
+            self._requests[ticket] = (result, slot, properties, time.monotonic() + self.property_timeout)
+        if not self.send(slot, _OP_PROPERTIES, ticket, 0.0, pickle.dumps(properties, pickle.HIGHEST_PROTOCOL)):
+            with self._cond:
+                del self._requests[ticket]
+            result.set_exception(RuntimeError(f"Worker {self.name} has too many pending commands, "
+                                              f"setProperty dropped"))
+        return result
+
+    def _spawn(self, restore: bool) -> None:
+        """Start a worker process. Caller holds the lock."""
+        reader, writer = self._context.Pipe(duplex=False)
+        replies, reply_writer = self._context.Pipe(duplex=False)
+        self._counters[_HEARTBEAT] = time.monotonic()
+        process = self._context.Process(
+            target=_worker_main, name=f"vdc-worker-{self.name}", daemon=True,
+            args=(self.device_type, self.specs, self.table, self._counters, reader, reply_writer, restore,
+                  self._applied))
+        process.start()
+        reader.close()
+        reply_writer.close()
+        if self._replies is not None:
+            self._replies.close()
+        self._process = process
+        self._conn = writer
+        self._replies = replies
+        self._started_at = time.monotonic()
+        self._cond.notify_all()
+
+    def _send_loop(self) -> None:
+        """Sender thread: write queued records to the worker in batches."""
+        while True:
+            with self._cond:
+                while self._running and (not self._pending or self._conn is None):
+                    self._cond.wait()
+                conn = self._conn
+                if not self._pending or conn is None:
+                    return  # stopped
+                batch = b"".join(self._pending)
+                count = len(self._pending)
+                self._pending.clear()
+            try:
+                conn.send_bytes(batch)
+            except (OSError, ValueError):
+                # The worker went away; the supervisor restarts it
+                with self._cond:
+                    self.stats["dropped"] += count
+                    if self._conn is conn:
+                        self._conn = None
+
+    def _take_replies(self, replies: Any) -> None:
+        """Resolve the setProperty requests the worker answered, then those that timed out."""
+        try:
+            while replies.poll():
+                ticket, error = replies.recv()
+                with self._cond:
+                    request = self._requests.pop(ticket, None)
+                    if request is None:
+                        continue  # timed out
+                    result, slot, properties, _ = request
+                    if error is None:
+                        _merge_properties(self._applied.setdefault(slot, {}), properties)
+                if error is None:
+                    result.set_result(None)
+                elif isinstance(error, PropertyPathError):
+                    result.set_exception(error)
+                else:
+                    result.set_exception(RuntimeError(f"Driver failed to apply setProperty: {error}"))
+        except (EOFError, OSError):
+            pass  # the worker went away; the supervisor restarts it
+
+        now = time.monotonic()
+        with self._cond:
+            expired = [ticket for ticket, request in self._requests.items() if request[3] <= now]
+            results = [self._requests.pop(ticket)[0] for ticket in expired]
+        for result in results:
+            result.set_exception(TimeoutError(f"Worker {self.name} did not answer setProperty "
+                                              f"within {self.property_timeout} s"))
+
+    def _supervise(self) -> None:
+        """Supervisor thread: deliver setProperty results, restart the worker when it dies or hangs."""
+        failures = 0
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                process = self._process
+                replies = self._replies
+            multiprocessing.connection.wait([process.sentinel, replies], timeout=0.5)
+            self._take_replies(replies)
+            with self._cond:
+                if not self._running:
+                    return
+            hung = time.monotonic() - self._counters[_HEARTBEAT] > self.hang_timeout
+            if process.is_alive() and not hung:
+                continue
+
+            if hung and process.is_alive():
+                logger.error(f"Worker {self.name} is not responding, killing it")
+                process.kill()
+            process.join()
+            uptime = time.monotonic() - self._started_at
+            failures = failures + 1 if uptime < 60.0 else 1
+            delay = min(self.restart_delay * 2 ** (failures - 1), 30.0)
+            logger.error(f"Worker {self.name} exited with code {process.exitcode}, restarting in {delay:.1f} s")
+            with self._cond:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+            deadline = time.monotonic() + delay
+            while True:
+                with self._cond:
+                    if not self._running:
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["restarts"] += 1
+                        self._spawn(restore=True)
+                        break
+                    self._cond.wait(min(remaining, 0.5))
+                self._take_replies(replies)
+
+
+def _state_width(device_type: type) -> int:
+    """Values in a table row: channels, then sensors, then binary inputs."""
+    return len(device_type.CHANNELS) + len(device_type.SENSORS) + len(device_type.BINARY_INPUTS)
+
+
+def _device_state(device: VdcDevice) -> array:
+    """The table row of a device."""
+    state = array('d', device.channels.values)
+    for store in (device.sensors, device.binary_inputs):
+        if store is not None:
+            state.extend(store.values)
+    return state
+
+
+def _load_state(device: VdcDevice, state: Sequence[float]) -> None:
+    """Set the channel, sensor and binary input values of a device from its table row."""
+    offset = len(device.channels)
+    device.channels.values[:] = array('d', state[:offset])
+    for store in (device.sensors, device.binary_inputs):
+        if store is not None:
+            store.values[:] = array('d', state[offset:offset + len(store)])
+            offset += len(store)
+
+
+def _merge_properties(target: Dict[str, Any], properties: Dict[str, Any]) -> None:
+    """Merge a setProperty request into the requests applied before it."""
+    for name, value in properties.items():
+        if isinstance(value, dict):
+            current = target.get(name)
+            if not isinstance(current, dict):
+                current = target[name] = {}
+            _merge_properties(current, value)
+        else:
+            target[name] = value
+
+
+def _worker_main(device_type: type, specs: List[DeviceSpec], table: SharedStateTable, counters: Any,
+                 conn: Any, replies: Any, restore: bool, applied: Dict[int, Dict[str, Any]]) -> None:
+    """Worker process: build the drivers and execute the command records."""
+    devices = [spec.build(device_type) for spec in specs]
+    loop = asyncio.new_event_loop() if any(isinstance(device, AsyncVdcDevice) for device in devices) else None
+    for slot, device in enumerate(devices):
+        table.repair(slot)
+        if slot in applied:
+            try:
+                result = device.write_properties(applied[slot])
+                if loop is not None and asyncio.iscoroutine(result):
+                    loop.run_until_complete(result)
+            except Exception as e:
+                counters[_ERRORS] += 1
+                logger.error(f"Replaying setProperty on device {device.name} failed: {e}")
+        if restore:
+            _load_state(device, table.read(slot))
+        else:
+            table.write(slot, _device_state(device))
+
+    record_size = _RECORD.size
+    while True:
+        counters[_HEARTBEAT] = time.monotonic()
+        if not conn.poll(0.5):
+            # Publish what drivers sampled on their own
+            for slot, device in enumerate(devices):
+                table.write(slot, _device_state(device))
+            continue
+        try:
+            data = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        offset = 0
+        while offset < len(data):
+            op, slot, iarg, farg, size = _RECORD.unpack_from(data, offset)
+            offset += record_size
+            payload = data[offset:offset + size]
+            offset += size
+            if op == _OP_STOP:
+                return
+            device = devices[slot]
+            error: Any = None
+            try:
+                result = _execute(device, op, iarg, farg, payload)
+                if loop is not None and asyncio.iscoroutine(result):
+                    loop.run_until_complete(result)
+            except Exception as e:
+                counters[_ERRORS] += 1
+                logger.error(f"Command {op} on device {device.name} failed: {e}")
+                error = e if isinstance(e, PropertyPathError) else str(e) or type(e).__name__
+            else:
+                counters[_EXECUTED] += 1
+            if op == _OP_PROPERTIES:
+                try:
+                    replies.send((iarg, error))
+                except (OSError, ValueError):
+                    pass  # the host stopped the group
+            table.write(slot, _device_state(device))
+            counters[_HEARTBEAT] = time.monotonic()
+
+
+def _execute(device: VdcDevice, op: int, iarg: int, farg: float, payload: bytes) -> Any:
+    """Call the driver method of one command record."""
+    if op == _OP_CHANNEL or op == _OP_CHANNEL_STAGED:
+        apply_now = op == _OP_CHANNEL
+        if iarg == 0:
+            return device.set_output_value(farg, apply_now)
+        return device.set_channel_value(iarg, farg, apply_now)
+    if op == _OP_SCENE:
+        return device.call_scene(iarg, bool(farg))
+    if op == _OP_DIM:
+        return device.dim_channel(int(farg), iarg)
+    if op == _OP_IDENTIFY:
+        return device.identify()
+    if op == _OP_PROPERTIES:
+        return device.write_properties(pickle.loads(payload))
+    raise ValueError(f"Unknown command record {op}")
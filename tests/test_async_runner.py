@@ -0,0 +1,194 @@
+"""
+Async command runner - concurrent async devices, per-device order, coalescing and timeouts
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from ds_vdc_api import VdcDevice, VdcHost
+from ds_vdc_api.async_device import KIND_PROPERTIES, AsyncCommandRunner, AsyncVdcDevice
+from ds_vdc_api.debounce import KIND_OUTPUT, KIND_SCENE
+from ds_vdc_api.genericVDC_pb2 import ResultCode
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+
+class HttpLight(AsyncVdcDevice):
+    """Backend that answers after a delay per call."""
+
+    COMMAND_TIMEOUT = 2.0
+
+    def __init__(self, *args, delay=0.1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.written = []
+
+    async def write_channels(self, changes):
+        await asyncio.sleep(self.delay)
+        self.written.append(changes[0])
+
+    async def commit_properties(self, changes):
+        await asyncio.sleep(self.delay)
+
+
+def dsuid(index):
+    return f"CC{index:030X}C1"
+
+
+@pytest.fixture
+def runner():
+    runner = AsyncCommandRunner(timeout=2.0)
+    runner.start()
+    yield runner
+    runner.stop()
+
+
+def wait(futures, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    for future in futures:
+        try:
+            future.result(max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.CancelledError:
+            pass
+
+
+def test_async_devices_wait_for_their_backends_concurrently(runner):
+    devices = [HttpLight(dsuid(index), f"Light {index}", delay=0.2) for index in range(50)]
+    started = time.monotonic()
+    wait([runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 60.0, True) for device in devices])
+    assert time.monotonic() - started < 1.0
+    assert all(device.output_value == 60.0 for device in devices)
+    assert runner.metrics[KIND_OUTPUT]["executed"] == 50
+
+
+def test_commands_of_one_device_run_in_arrival_order(runner):
+    device = HttpLight(dsuid(0), "Light", delay=0.02)
+    futures = [runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, float(value), True)
+               for value in range(1, 6)]
+    wait(futures)
+    assert device.written == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_newer_value_cancels_the_running_one(runner):
+    device = HttpLight(dsuid(0), "Light", delay=0.3)
+    first = runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 10.0, True, coalesce=True)
+    time.sleep(0.1)
+    second = runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 20.0, True, coalesce=True)
+    third = runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 30.0, True, coalesce=True)
+    wait([first, second, third])
+    assert first.cancelled() and second.cancelled() and not third.cancelled()
+    # The cancelled write never reached the backend
+    assert device.written == [30.0]
+    assert device.output_value == 30.0
+    assert runner.metrics[KIND_OUTPUT]["cancelled"] == 2
+
+
+def test_scene_calls_are_barriers(runner):
+    device = HttpLight(dsuid(0), "Light", delay=0.1)
+    first = runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 10.0, True, coalesce=True)
+    scene = runner.submit(device, KIND_SCENE, None, device.call_scene, 5)
+    second = runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 20.0, True, coalesce=True)
+    wait([first, scene, second])
+    assert not any(future.cancelled() for future in (first, scene, second))
+    assert device.written == [10.0, 100.0, 20.0]
+
+
+def test_async_command_times_out_and_the_device_goes_on(runner):
+    device = HttpLight(dsuid(0), "Light", delay=1.0)
+    device.COMMAND_TIMEOUT = 0.1
+    slow = runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 10.0, True)
+    with pytest.raises(asyncio.TimeoutError):
+        slow.result(5.0)
+    assert device.output_value == 0.0
+    device.delay = 0.0
+    wait([runner.submit(device, KIND_OUTPUT, 0, device.set_output_value, 20.0, True)])
+    assert device.output_value == 20.0
+    assert runner.metrics[KIND_OUTPUT]["timeouts"] == 1
+
+
+def test_synchronous_devices_run_on_the_thread_pool(runner):
+    device = VdcDevice(dsuid(0), "Relay")
+    threads = []
+    release = threading.Event()
+    device.COMMAND_TIMEOUT = 0.1
+
+    def blocking(value):
+        threads.append(threading.current_thread().name)
+        release.wait(5.0)
+        return value
+
+    timed_out = runner.submit(device, KIND_SCENE, None, blocking, 1)
+    with pytest.raises(asyncio.TimeoutError):
+        timed_out.result(5.0)
+    # The call cannot be interrupted, so the device stays busy until it returns
+    queued = runner.submit(device, KIND_SCENE, None, lambda: threads.append("next"))
+    time.sleep(0.2)
+    assert threads == [threads[0]] and threads[0].startswith("vdc-sync")
+    release.set()
+    wait([queued])
+    assert threads[1:] == ["next"]
+
+
+def test_failures_are_reported_on_the_future(runner):
+    device = VdcDevice(dsuid(0), "Relay")
+
+    def fail():
+        raise IOError("bus down")
+
+    with pytest.raises(IOError):
+        runner.submit(device, KIND_SCENE, None, fail).result(5.0)
+    assert runner.metrics[KIND_SCENE]["errors"] == 1
+    assert runner.pending == 0
+
+
+def test_submit_without_a_running_loop_fails_the_future():
+    runner = AsyncCommandRunner()
+    device = VdcDevice(dsuid(0), "Relay")
+    with pytest.raises(RuntimeError):
+        runner.submit(device, KIND_SCENE, None, device.call_scene, 5).result(1.0)
+    assert runner.pending == 0
+
+
+def test_stop_cancels_what_did_not_finish():
+    runner = AsyncCommandRunner()
+    runner.start()
+    device = HttpLight(dsuid(0), "Light", delay=5.0)
+    future = runner.submit(device, KIND_PROPERTIES, None, device.write_properties, {"name": "Hall"})
+    runner.stop(timeout=0.1)
+    assert future.cancelled()
+    assert device.name == "Light"
+
+
+def test_host_answers_set_property_when_the_coroutine_completes():
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    slow = HttpLight(dsuid(0), "Slow", delay=0.3)
+    host.add_devices([slow, HttpLight(dsuid(1), "Other", delay=0.0)])
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    try:
+        vdsm.connect()
+        vdsm.wait_announced(2, quiet=0.1, timeout=5)
+        codes = []
+        thread = threading.Thread(target=lambda: codes.append(
+            vdsm.set_property(slow.dsuid, {"name": "Hall"}).generic_response.code))
+        thread.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        vdsm.get_property(dsuid(1))
+        assert time.monotonic() - started < 0.2
+        thread.join(5.0)
+        assert codes == [ResultCode.ERR_OK]
+        assert slow.name == "Hall"
+        assert host.async_runner.metrics[KIND_PROPERTIES]["executed"] == 1
+    finally:
+        vdsm.close()
+        host.stop()
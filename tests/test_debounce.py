@@ -0,0 +1,169 @@
+"""
+Output debouncing - per-device order, coalescing, barriers and pacing
+
+Commands submitted before start() stay queued, so the coalesced queue can be
+set up exactly and then run.
+"""
+
+import threading
+import time
+
+from ds_vdc_api import VdcDevice, VdcHost
+from ds_vdc_api.debounce import KIND_DIM, KIND_IDENTIFY, KIND_OUTPUT, KIND_SCENE, OutputDebouncer
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self.lock:
+            self.calls.append(args)
+
+
+def device(index, **attributes):
+    member = VdcDevice(f"CC{index:030X}C1", f"Device {index}")
+    member.__dict__.update(attributes)
+    return member
+
+
+def run(debouncer):
+    debouncer.start()
+    debouncer.stop(timeout=5.0)
+
+
+def test_applied_values_coalesce_to_the_latest_per_channel():
+    debouncer = OutputDebouncer(workers=1)
+    target, record = device(0), Recorder()
+    assert debouncer.submit(target, KIND_OUTPUT, 0, record, 0, 10.0, coalesce=True)
+    assert debouncer.submit(target, KIND_OUTPUT, 1, record, 1, 50.0, coalesce=True)
+    assert not debouncer.submit(target, KIND_OUTPUT, 0, record, 0, 20.0, coalesce=True)
+    assert not debouncer.submit(target, KIND_OUTPUT, 0, record, 0, 30.0, coalesce=True)
+    assert debouncer.pending == 2
+    run(debouncer)
+    # The replaced command keeps its place in the queue
+    assert record.calls == [(0, 30.0), (1, 50.0)]
+    metrics = debouncer.metrics
+    assert metrics[KIND_OUTPUT] == {"submitted": 4, "coalesced": 2, "executed": 2, "errors": 0}
+    assert metrics["pending"] == 0
+    assert metrics["latency"]["count"] == 2
+
+
+def test_scenes_identify_and_staged_values_are_barriers():
+    debouncer = OutputDebouncer(workers=1)
+    target, record = device(0), Recorder()
+    debouncer.submit(target, KIND_OUTPUT, 0, record, "value", 1, coalesce=True)
+    debouncer.submit(target, KIND_SCENE, None, record, "scene", 5)
+    debouncer.submit(target, KIND_OUTPUT, 0, record, "value", 2, coalesce=True)
+    debouncer.submit(target, KIND_OUTPUT, 0, record, "staged", 3, coalesce=False)
+    debouncer.submit(target, KIND_OUTPUT, 0, record, "value", 4, coalesce=True)
+    debouncer.submit(target, KIND_IDENTIFY, None, record, "identify", 0)
+    debouncer.submit(target, KIND_OUTPUT, 0, record, "value", 5, coalesce=True)
+    debouncer.submit(target, KIND_DIM, 0, record, "dim", 1, coalesce=True)
+    debouncer.submit(target, KIND_OUTPUT, 0, record, "value", 6, coalesce=True)
+    run(debouncer)
+    assert record.calls == [("value", 1), ("scene", 5), ("value", 2), ("staged", 3), ("value", 4),
+                            ("identify", 0), ("value", 5), ("dim", 1), ("value", 6)]
+
+
+def test_a_busy_device_does_not_hold_up_the_others():
+    debouncer = OutputDebouncer(workers=2)
+    slow, fast = device(0), device(1)
+    release = threading.Event()
+    record = Recorder()
+    debouncer.start()
+    try:
+        debouncer.submit(slow, KIND_SCENE, None, lambda: release.wait(5.0))
+        debouncer.submit(slow, KIND_OUTPUT, 0, record, "slow", 1, coalesce=True)
+        for value in range(3):
+            debouncer.submit(fast, KIND_OUTPUT, 0, record, "fast", value, coalesce=True)
+        deadline = time.monotonic() + 2.0
+        while ("fast", 2) not in record.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ("fast", 2) in record.calls
+        assert ("slow", 1) not in record.calls
+        # Values for the busy device coalesce behind the running command
+        assert not debouncer.submit(slow, KIND_OUTPUT, 0, record, "slow", 2, coalesce=True)
+    finally:
+        release.set()
+        debouncer.stop(timeout=5.0)
+    assert [call for call in record.calls if call[0] == "slow"] == [("slow", 2)]
+
+
+def test_min_command_interval_paces_a_device():
+    debouncer = OutputDebouncer(workers=1)
+    target = device(0, MIN_COMMAND_INTERVAL=0.2)
+    times = []
+
+    def write(value):
+        times.append((time.monotonic(), value))
+
+    debouncer.start()
+    try:
+        debouncer.submit(target, KIND_OUTPUT, 0, write, 1, coalesce=True)
+        time.sleep(0.05)
+        for value in range(2, 6):
+            debouncer.submit(target, KIND_OUTPUT, 0, write, value, coalesce=True)
+    finally:
+        debouncer.stop(timeout=5.0)
+    assert [value for _, value in times] == [1, 5]
+    assert times[1][0] - times[0][0] >= 0.19
+
+
+def test_failing_commands_are_counted_and_the_queue_goes_on():
+    debouncer = OutputDebouncer(workers=1)
+    target, record = device(0), Recorder()
+    done = []
+
+    def fail():
+        raise IOError("bus down")
+
+    debouncer.on_done = lambda member, started: done.append(member)
+    debouncer.submit(target, KIND_SCENE, None, fail)
+    debouncer.submit(target, KIND_SCENE, None, record, 5)
+    run(debouncer)
+    assert record.calls == [(5,)]
+    assert debouncer.stats[KIND_SCENE] == {"submitted": 2, "coalesced": 0, "executed": 1, "errors": 1}
+    assert done == [target, target]
+
+
+class SlowLight(VdcDevice):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written = []
+
+    def write_channels(self, changes):
+        time.sleep(0.05)
+        self.written.append(changes[0])
+
+
+def test_host_delivers_the_last_value_of_a_slider_burst():
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    light = SlowLight("CC000000000000000000000000000000C1", "Slider")
+    host.add_device(light)
+    debouncer = host.enable_output_debouncing(workers=2)
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    try:
+        vdsm.connect()
+        vdsm.wait_announced(1, quiet=0.1, timeout=5)
+        for value in range(1, 41):
+            vdsm.set_output_value([light.dsuid], float(value))
+        deadline = time.monotonic() + 5.0
+        while light.output_value != 40.0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert light.output_value == 40.0
+        assert light.written[-1] == 40.0
+        assert len(light.written) < 40
+        assert debouncer.stats[KIND_OUTPUT]["coalesced"] == 40 - len(light.written)
+    finally:
+        vdsm.close()
+        host.stop()
@@ -0,0 +1,135 @@
+"""
+Device configuration - loading, diffing against live devices and incremental reload
+"""
+
+import json
+import time
+
+import pytest
+
+from ds_vdc_api import VdcDevice, VdcHost
+from ds_vdc_api.device_config import DeviceSpec, diff_config, load_config
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+
+def dsuid(index):
+    return f"CC{index:030X}C1"
+
+
+def spec(index, **fields):
+    return DeviceSpec(dsuid(index), fields.pop("name", f"Device {index}"), **fields)
+
+
+def live(*specs):
+    devices = {}
+    for entry in specs:
+        device = entry.build()
+        device.vdc_dsuid = VDC_DSUID
+        devices[device.dsuid] = device
+    return devices
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.02)
+
+
+def test_load_config_accepts_files_dictionaries_and_specs(tmp_path):
+    entries = [{"dSUID": dsuid(0), "name": "Hall", "deviceClass": "Shade", "modelUID": "vdc:shade"},
+               {"dsuid": dsuid(1), "name": "Desk", "properties": {"zone": 2}}]
+    path = tmp_path / "devices.json"
+    path.write_text(json.dumps({"devices": entries}))
+
+    specs = load_config(str(path))
+    assert specs == load_config({"devices": entries}) == load_config([DeviceSpec.from_dict(e) for e in entries])
+    assert specs[0] == DeviceSpec(dsuid(0), "Hall", model_uid="vdc:shade", device_class="Shade")
+    assert specs[1].properties == {"zone": 2}
+
+
+@pytest.mark.parametrize("entries", [
+    [{"dsuid": dsuid(0), "name": "Hall"}, {"dsuid": dsuid(0), "name": "Copy"}],
+    [{"dsuid": dsuid(0), "name": "Hall", "colour": "red"}],
+    [{"dsuid": dsuid(0)}],
+])
+def test_load_config_rejects_invalid_entries(entries):
+    with pytest.raises(ValueError):
+        load_config(entries)
+
+
+def test_diff_sorts_devices_by_the_change_they_need():
+    devices = live(spec(0), spec(1), spec(2), spec(3, properties={"zone": 1, "floor": 0}), spec(4))
+    diff = diff_config(devices, [
+        spec(0),
+        spec(1, name="Renamed"),
+        spec(2, device_class="Shade"),
+        spec(3, properties={"zone": 2}),
+        spec(5),
+    ], VDC_DSUID)
+
+    assert [entry.dsuid for entry in diff.added] == [dsuid(5)]
+    assert diff.added[0].vdc_dsuid == VDC_DSUID
+    assert [entry.dsuid for entry in diff.replaced] == [dsuid(2)]
+    assert diff.removed == [dsuid(4)]
+    assert [(device.dsuid, changes, dropped) for device, changes, dropped in diff.changed] == [
+        (dsuid(1), {"name": "Renamed"}, []),
+        (dsuid(3), {"zone": 2}, ["floor"]),
+    ]
+    assert diff.unchanged == 1
+
+
+def test_declared_properties_count_as_changed_only_when_the_device_differs():
+    devices = live(spec(0))
+    devices[dsuid(0)].set_property("outputValue", 40.0)
+    assert not diff_config(devices, [spec(0, properties={"outputValue": 40.0})], VDC_DSUID)
+    diff = diff_config(devices, [spec(0, properties={"outputValue": 60.0})], VDC_DSUID)
+    assert [changes for _, changes, _ in diff.changed] == [{"outputValue": 60.0}]
+
+
+@pytest.fixture
+def session():
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    host.reload_config([spec(index) for index in range(4)])
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    vdsm.connect()
+    vdsm.wait_announced(4, quiet=0.1, timeout=5)
+    yield host, vdsm
+    vdsm.close()
+    host.stop()
+
+
+def test_reload_sends_only_the_differences(session):
+    host, vdsm = session
+    kept = host.devices.get(dsuid(0))
+    announced = vdsm.stats["announcements"]
+
+    diff = host.reload_config([spec(0), spec(1, name="Renamed"), spec(2, device_class="Shade"), spec(4)])
+    assert repr(diff) == "ConfigDiff(added=1, removed=1, replaced=1, changed=1, unchanged=1)"
+    wait_until(lambda: vdsm.stats["pushes"] == 1 and vdsm.stats["vanishes"] == 2
+               and vdsm.stats["announcements"] == announced + 2)
+
+    assert host.devices.get(dsuid(0)) is kept
+    assert host.devices.get(dsuid(1)).name == "Renamed"
+    assert host.devices.get(dsuid(2)).device_class == "Shade"
+    assert dsuid(3) not in host.devices
+    assert sorted(vdsm.devices) == [dsuid(0), dsuid(1), dsuid(2), dsuid(4)]
+
+    assert not host.reload_config([spec(0), spec(1, name="Renamed"), spec(2, device_class="Shade"), spec(4)])
+
+
+def test_reload_with_an_unknown_vdc_changes_nothing(session):
+    host, vdsm = session
+    version = host.devices.version
+    with pytest.raises(KeyError):
+        host.reload_config([spec(0), spec(9, vdc_dsuid="DD000000000000000000000000000000DD")])
+    assert host.devices.version == version
+    assert len(host.devices) == 4
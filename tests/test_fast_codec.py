@@ -0,0 +1,151 @@
+"""
+Fast codec cross-checks - hand-written frames against the protobuf runtime
+
+The fast encoders must produce exactly the bytes of
+Message.SerializeToString() (framed by MessageHandler.encode_frame), and
+the fast decoders must return what ParseFromString() reads. The cases cover
+message ids across varint size boundaries, empty/ASCII/non-ASCII dSUIDs and
+all result codes. benchmarks/bench_fast_codec.py runs the same cross-check
+before timing anything.
+"""
+
+import pytest
+from google.protobuf.wrappers_pb2 import UInt64Value
+
+from ds_vdc_api import fast_codec
+from ds_vdc_api.genericVDC_pb2 import Message, Type, ResultCode
+from ds_vdc_api.message_handler import MessageHandler
+from ds_vdc_api.wire import encode_varint, read_varint
+
+
+MESSAGE_IDS = [0, 1, 127, 128, 16383, 16384, 2 ** 31, 2 ** 32 - 1]
+DSUIDS = ["", "AA000000000000000000000000000000AA", "gerät-ü"]
+VARINTS = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 21, 2 ** 28, 2 ** 31, 2 ** 32 - 1, 2 ** 32,
+           2 ** 35, 2 ** 56, 2 ** 63, 2 ** 64 - 1]
+
+
+def pb_pong(message_id, dsuid):
+    msg = Message()
+    msg.type = Type.VDC_SEND_PONG
+    msg.message_id = message_id
+    msg.vdc_send_pong.dSUID = dsuid
+    return MessageHandler.encode_frame(msg)
+
+
+def pb_generic_response(message_id, code, description=""):
+    msg = Message()
+    msg.type = Type.GENERIC_RESPONSE
+    msg.message_id = message_id
+    msg.generic_response.code = code
+    if description:
+        msg.generic_response.description = description
+    return MessageHandler.encode_frame(msg)
+
+
+def pb_announce_device(dsuid, vdc_dsuid):
+    msg = Message()
+    msg.type = Type.VDC_SEND_ANNOUNCE_DEVICE
+    msg.message_id = 0
+    msg.vdc_send_announce_device.dSUID = dsuid
+    msg.vdc_send_announce_device.vdc_dSUID = vdc_dsuid
+    return MessageHandler.encode_frame(msg)
+
+
+def pb_announce_vdc(dsuid):
+    msg = Message()
+    msg.type = Type.VDC_SEND_ANNOUNCE_VDC
+    msg.message_id = 0
+    msg.vdc_send_announce_vdc.dSUID = dsuid
+    return MessageHandler.encode_frame(msg)
+
+
+def pb_vanish(dsuid):
+    msg = Message()
+    msg.type = Type.VDC_SEND_VANISH
+    msg.message_id = 0
+    msg.vdc_send_vanish.dSUID = dsuid
+    return MessageHandler.encode_frame(msg)
+
+
+def pb_varint(value):
+    # UInt64Value is field 1 (tag 0x08) followed by the varint
+    return UInt64Value(value=value).SerializeToString()[1:] if value else b"\x00"
+
+
+def check(label, fast, reference):
+    assert fast == reference, f"{label}:\n  fast: {fast.hex()}\n  pb:   {reference.hex()}"
+
+
+def cross_check():
+    """
+    Compare every fast encoder/decoder with the protobuf runtime.
+
+    Returns:
+        Number of cases checked
+
+    Raises:
+        AssertionError: For the first differing frame or decoded value
+    """
+    checked = 0
+    for message_id in MESSAGE_IDS:
+        for dsuid in DSUIDS:
+            frame = fast_codec.encode_pong(message_id, dsuid)
+            check(f"pong {message_id} {dsuid!r}", frame, pb_pong(message_id, dsuid))
+            assert fast_codec.decode_pong(frame[2:]) == (message_id, dsuid)
+
+            ping = Message()
+            ping.type = Type.VDSM_SEND_PING
+            ping.message_id = message_id
+            ping.vdsm_send_ping.dSUID = dsuid
+            assert fast_codec.decode_ping(ping.SerializeToString()) == (message_id, dsuid)
+            checked += 2
+
+        for code in ResultCode.values():
+            for description in ("", "failed: übel"):
+                frame = fast_codec.encode_generic_response(message_id, code, description)
+                check(f"generic {message_id} {code}", frame,
+                      pb_generic_response(message_id, code, description))
+                assert fast_codec.decode_generic_response(frame[2:]) == (message_id, code, description)
+                checked += 1
+
+    for dsuid in DSUIDS:
+        for vdc_dsuid in DSUIDS:
+            frame = fast_codec.encode_announce_device(dsuid, vdc_dsuid)
+            check("announce device", frame, pb_announce_device(dsuid, vdc_dsuid))
+            assert fast_codec.decode_announce_device(frame[2:]) == (dsuid, vdc_dsuid)
+            checked += 1
+        frame = fast_codec.encode_announce_vdc(dsuid)
+        check("announce vdc", frame, pb_announce_vdc(dsuid))
+        assert fast_codec.decode_announce_vdc(frame[2:]) == dsuid
+        frame = fast_codec.encode_vanish(dsuid)
+        check("vanish", frame, pb_vanish(dsuid))
+        assert fast_codec.decode_vanish(frame[2:]) == dsuid
+        checked += 2
+
+    buffer = bytearray()
+    fast_codec.encode_pong(5, "x", into=buffer)
+    fast_codec.encode_vanish("y", into=buffer)
+    check("buffer", bytes(buffer), pb_pong(5, "x") + pb_vanish("y"))
+
+    return checked
+
+
+def test_frames_match_protobuf_runtime():
+    assert cross_check() == 271
+
+
+@pytest.mark.parametrize("value", VARINTS)
+def test_varint_matches_protobuf_runtime(value):
+    encoded = encode_varint(value)
+    check(f"varint {value}", encoded, pb_varint(value))
+    assert read_varint(encoded, 0) == (value, len(encoded))
+
+
+@pytest.mark.parametrize("value", [-1, -128, -(2 ** 63), 2 ** 64, 2 ** 70])
+def test_varint_rejects_out_of_range_values(value):
+    with pytest.raises(ValueError):
+        encode_varint(value)
+
+
+def test_protobuf_backend_is_reported():
+    assert fast_codec.protobuf_backend() in ("upb", "cpp", "python")
@@ -0,0 +1,88 @@
+"""
+Inbound lanes - control frames first, requests and notifications in arrival order
+"""
+
+import threading
+import time
+
+from ds_vdc_api import VdcDevice, VdcHost
+from ds_vdc_api.lanes import LANE_BULK, LANE_CONTROL, LANE_REQUEST, InboundLanes
+from ds_vdc_api.property_tree import property_tree_to_dict
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+DEVICE_DSUID = "CC000000000000000000000000000000C1"
+
+
+def drain(lanes, count):
+    return [lanes.get() for _ in range(count)]
+
+
+def test_requests_and_notifications_keep_arrival_order():
+    lanes = InboundLanes()
+    lanes.put(LANE_BULK, "callScene")
+    lanes.put(LANE_REQUEST, "getProperty")
+    lanes.put(LANE_BULK, "setOutputChannelValue")
+    lanes.put(LANE_REQUEST, "setProperty")
+    items = drain(lanes, 4)
+    assert [item for _, _, item in items] == ["callScene", "getProperty", "setOutputChannelValue", "setProperty"]
+    assert [lane for lane, _, _ in items] == [LANE_BULK, LANE_REQUEST, LANE_BULK, LANE_REQUEST]
+
+
+def test_control_items_jump_the_queue():
+    lanes = InboundLanes()
+    lanes.put(LANE_BULK, "callScene")
+    lanes.put(LANE_REQUEST, "getProperty")
+    lanes.put(LANE_CONTROL, "bye")
+    assert [item for _, _, item in drain(lanes, 3)] == ["bye", "callScene", "getProperty"]
+
+
+def test_offer_refuses_items_beyond_the_backlog():
+    lanes = InboundLanes(max_items=2)
+    assert lanes.offer(LANE_BULK, 1)
+    assert lanes.offer(LANE_REQUEST, 2)
+    assert not lanes.offer(LANE_REQUEST, 3)
+    lanes.get()
+    assert lanes.offer(LANE_REQUEST, 3)
+
+
+def test_close_wakes_a_waiting_dispatcher():
+    lanes = InboundLanes()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(lanes.get()))
+    thread.start()
+    time.sleep(0.05)
+    lanes.close()
+    thread.join(1.0)
+    assert result == [None]
+    assert lanes.closed
+    assert not lanes.offer(LANE_REQUEST, 1)
+
+
+class SlowDevice(VdcDevice):
+    def write_channels(self, changes):
+        if changes.get(0) == 1.0:
+            time.sleep(0.2)
+
+
+def test_get_property_sees_an_earlier_output_value():
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    host.add_device(SlowDevice(DEVICE_DSUID, "Slow"))
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    try:
+        vdsm.connect()
+        vdsm.wait_announced(1, quiet=0.1, timeout=5)
+        # The first write keeps the dispatcher busy while the next two queue up
+        vdsm.set_output_value([DEVICE_DSUID], 1.0)
+        vdsm.set_output_value([DEVICE_DSUID], 42.0)
+        response = vdsm.get_property(DEVICE_DSUID)
+        properties = property_tree_to_dict(response.vdc_response_get_property.properties)
+        assert properties["output"]["value"] == 42.0
+    finally:
+        vdsm.close()
+        host.stop()
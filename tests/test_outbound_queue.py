@@ -0,0 +1,128 @@
+"""
+Outbound queue - lane order, push coalescing, drops and stall handling
+
+The queue is filled while its writer thread is not running, so the queued
+state can be checked exactly, then started to read what reaches the peer.
+"""
+
+import socket
+
+import pytest
+
+from ds_vdc_api.lanes import LANE_BULK, LANE_CONTROL, LANE_REQUEST
+from ds_vdc_api.outbound_queue import OutboundQueue
+
+
+@pytest.fixture
+def pair():
+    host, peer = socket.socketpair()
+    peer.settimeout(5.0)
+    yield host, peer
+    host.close()
+    peer.close()
+
+
+def receive(peer, size):
+    data = b""
+    while len(data) < size:
+        chunk = peer.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def test_lanes_are_written_in_priority_order(pair):
+    host, peer = pair
+    queue = OutboundQueue(host)
+    queue.put(b"bulk|", lane=LANE_BULK)
+    queue.put(b"response|", lane=LANE_REQUEST)
+    queue.put(b"pong|", lane=LANE_CONTROL)
+    queue.start()
+    assert receive(peer, 19) == b"pong|response|bulk|"
+    queue.close()
+
+
+def test_pushes_are_not_coalesced_below_high_water(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=4, max_frames=8)
+    assert queue.put(b"a1", ("dev", "value"), LANE_BULK)
+    assert queue.put(b"a2", ("dev", "value"), LANE_BULK)
+    assert len(queue) == 2
+    assert queue.stats["coalesced"] == 0
+
+
+def test_latest_push_wins_above_high_water_and_keeps_its_position(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=2, max_frames=8)
+    queue.put(b"r1", lane=LANE_BULK)
+    queue.put(b"r2", lane=LANE_BULK)
+    assert queue.put(b"a1", ("dev", "value"), LANE_BULK)
+    queue.put(b"r3", lane=LANE_BULK)
+    assert queue.put(b"a2", ("dev", "value"), LANE_BULK)
+    assert queue.put(b"a3", ("dev", "value"), LANE_BULK)
+    assert len(queue) == 4
+    assert queue.stats["coalesced"] == 2
+    assert queue.stats["high_water_events"] == 1
+
+    queue.start()
+    assert receive(peer, 8) == b"r1r2a3r3"
+    queue.close()
+
+
+def test_pushes_beyond_max_frames_are_dropped(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=1, max_frames=2)
+    queue.put(b"r1")
+    queue.put(b"r2")
+    assert not queue.put(b"a1", ("dev", "value"), LANE_BULK)
+    assert queue.stats["dropped"] == 1
+    assert not queue.stalled
+    assert len(queue) == 2
+
+
+def test_control_frames_are_queued_beyond_max_frames(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=1, max_frames=1)
+    queue.put(b"r1")
+    assert queue.put(b"pong", lane=LANE_CONTROL)
+    assert len(queue) == 2
+    assert not queue.stalled
+
+
+def test_must_deliver_frame_on_a_full_queue_stalls_the_session(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=1, max_frames=1)
+    queue.put(b"r1")
+    assert not queue.put(b"r2")
+    assert queue.stalled
+    assert queue.stats["stalls"] == 1
+    assert len(queue) == 0
+    assert not queue.put(b"r3")
+    # The socket was shut down, so the peer sees the end of the stream
+    assert peer.recv(16) == b""
+
+
+def test_blocking_producer_stalls_when_the_queue_does_not_drain(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=1, max_frames=4, send_timeout=0.05)
+    queue.put(b"r1", lane=LANE_BULK)
+    assert not queue.put(b"announce", lane=LANE_BULK, block=True)
+    assert queue.stalled
+
+
+def test_blocking_producer_waits_for_the_writer(pair):
+    host, peer = pair
+    queue = OutboundQueue(host, high_water=1, max_frames=4, send_timeout=5.0)
+    queue.put(b"a1", lane=LANE_BULK)
+    queue.start()
+    assert queue.put(b"a2", lane=LANE_BULK, block=True)
+    assert receive(peer, 4) == b"a1a2"
+    assert not queue.stalled
+    queue.close()
+
+
+def test_high_water_above_max_frames_is_rejected(pair):
+    host, peer = pair
+    with pytest.raises(ValueError):
+        OutboundQueue(host, high_water=8, max_frames=4)
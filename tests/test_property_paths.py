@@ -0,0 +1,138 @@
+"""
+Property paths - trie resolution, index checks and typed setters
+"""
+
+import pytest
+
+from ds_vdc_api import VdcDevice
+from ds_vdc_api.genericVDC_pb2 import ResultCode
+from ds_vdc_api.property_paths import INDEX, PropertyPathError, PropertyPathTrie, PropertySetter, parse_path
+
+
+class Panel:
+    def __init__(self):
+        self.name = "Panel"
+        self.buttons = [{"group": 1}, {"group": 2}]
+        self.scenes = {}
+        self.matrix = [[0, 0], [0, 0, 0]]
+        self.levels = [0.0] * 4
+        self.slots = 3
+
+
+SETTERS = {
+    "name": PropertySetter(str, attr="name"),
+    "buttons[].group": PropertySetter(int, method="set_group", count="buttons"),
+    "buttonGroups[]": PropertySetter(int, attr="buttons", count=4),
+    "scenes[].value": PropertySetter(float, attr="scenes", minimum=0, maximum=100),
+    "matrix[][]": PropertySetter(int, attr="matrix", count="slots"),
+    "levels[]": PropertySetter(float, attr="levels", choices=[0.0, 50.0, 100.0]),
+    "mode": PropertySetter(str, attr="name", validate=lambda value: value.islower()),
+}
+
+
+@pytest.fixture
+def trie():
+    return PropertyPathTrie(SETTERS)
+
+
+def codes(trie, properties, device=None):
+    with pytest.raises(PropertyPathError) as error:
+        trie.plan(properties, device)
+    return error.value.code
+
+
+def test_paths_parse_with_dots_or_brackets():
+    assert parse_path("buttons[0].group") == parse_path("buttons.0.group") == ("buttons", "0", "group")
+    assert parse_path("buttons[].group") == parse_path("buttons[*].group") == ("buttons", INDEX, "group")
+
+
+def test_nested_request_resolves_in_request_order(trie):
+    writes = trie.plan({"scenes": {"5": {"value": 20}}, "name": "Hall", "matrix": {"1": {"2": 7.0}}})
+    assert [(write.path, write.indexes, write.value) for write in writes] == [
+        ("scenes.5.value", (5,), 20.0),
+        ("name", (), "Hall"),
+        ("matrix.1.2", (1, 2), 7),
+    ]
+    assert type(writes[0].value) is float and type(writes[2].value) is int
+
+
+@pytest.mark.parametrize("segment", ["²", "٣", "1²", "-1", "+1", " 1", "0x1"])
+def test_only_ascii_digits_address_an_index(trie, segment):
+    with pytest.raises(PropertyPathError) as error:
+        trie.plan({"scenes": {segment: {"value": 1.0}}})
+    assert error.value.code == ResultCode.ERR_NOT_FOUND
+    assert segment not in PropertyPathTrie({"[]": PropertySetter(int, attr="levels")})
+    with pytest.raises(PropertyPathError):
+        trie.lookup(f"scenes.{segment}.value")
+
+
+def test_unknown_paths_and_bad_values_have_their_result_codes(trie):
+    assert codes(trie, {"unknown": 1}) == ResultCode.ERR_NOT_FOUND
+    assert codes(trie, {"scenes": {"1": {"other": 1}}}) == ResultCode.ERR_NOT_FOUND
+    assert codes(trie, {"name": 1}) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"scenes": {"1": {"value": True}}}) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"scenes": {"1": {"value": 101}}}) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"scenes": {"1": 5}}) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"levels": {"0": 25.0}}) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"mode": "Upper"}) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"matrix": {"0": {"0": 1.5}}}) == ResultCode.ERR_INVALID_VALUE_TYPE
+
+
+def test_indexes_are_checked_against_count_and_containers(trie):
+    panel = Panel()
+    trie.plan({"buttons": {"1": {"group": 3}}}, panel)
+    assert codes(trie, {"buttons": {"2": {"group": 3}}}, panel) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"levels": {"4": 0.0}}, panel) == ResultCode.ERR_INVALID_VALUE_TYPE
+    # Without a device the indexes are not bounded
+    trie.plan({"levels": {"4": 0.0}})
+    # Mapping containers take new keys
+    trie.plan({"scenes": {"17": {"value": 1.0}}}, panel)
+
+
+def test_count_bounds_the_first_index_and_containers_the_others(trie):
+    panel = Panel()
+    trie.plan({"matrix": {"1": {"2": 1}}}, panel)
+    assert codes(trie, {"matrix": {"3": {"0": 1}}}, panel) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"matrix": {"0": {"2": 1}}}, panel) == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert codes(trie, {"matrix": {"1": {"3": 1}}}, panel) == ResultCode.ERR_INVALID_VALUE_TYPE
+    # count allows first indexes beyond the container; deeper ones cannot be checked there
+    trie.plan({"matrix": {"2": {"9": 1}}}, panel)
+    trie.plan({"buttonGroups": {"3": 1}}, panel)
+    assert codes(trie, {"buttonGroups": {"4": 1}}, panel) == ResultCode.ERR_INVALID_VALUE_TYPE
+
+
+def test_setters_apply_and_read_back():
+    panel = Panel()
+    groups = []
+    panel.set_group = lambda index, value: groups.append((index, value))
+    trie = PropertyPathTrie(SETTERS)
+    for write in trie.plan({"name": "Hall", "buttons": {"1": {"group": 5}}, "matrix": {"1": {"2": 9}}}, panel):
+        write.apply(panel)
+    assert panel.name == "Hall"
+    assert groups == [(1, 5)]
+    assert panel.matrix == [[0, 0], [0, 0, 9]]
+
+    setter, indexes = trie.lookup("matrix[1][2]")
+    assert setter.current(panel, indexes) == 9
+    setter, indexes = trie.lookup("buttons.1.group")
+    with pytest.raises(LookupError):
+        setter.current(panel, indexes)
+
+
+def test_setter_needs_exactly_one_target():
+    with pytest.raises(ValueError):
+        PropertySetter(int)
+    with pytest.raises(ValueError):
+        PropertySetter(int, attr="a", method="b")
+
+
+def test_device_classes_merge_setters_with_their_bases():
+    class Light(VdcDevice):
+        PROPERTY_SETTERS = {"zone": PropertySetter(int, attr="zone")}
+
+    device = Light("CC000000000000000000000000000000C1", "Light")
+    assert {"name", "output.value", "outputValue", "zone"} <= set(device.property_paths().paths)
+    device.set_property("zone", 4.0)
+    assert device.zone == 4 and type(device.zone) is int
+    with pytest.raises(PropertyPathError):
+        device.set_property("zone", "4")
@@ -0,0 +1,108 @@
+"""
+Device registry - copy-on-write snapshots, versions and batched updates
+"""
+
+import threading
+
+import pytest
+
+from ds_vdc_api import VdcDevice
+from ds_vdc_api.registry import DeviceRegistry
+
+
+def device(index, name=None):
+    return VdcDevice(f"CC{index:030X}C1", name or f"Device {index}")
+
+
+def test_snapshot_does_not_change_after_writes():
+    registry = DeviceRegistry([device(0)])
+    before = registry.snapshot()
+    registry.add(device(1))
+    registry.remove(device(0).dsuid)
+    assert list(before) == [device(0).dsuid]
+    assert before.version == 0
+    assert list(registry) == [device(1).dsuid]
+    assert registry.version == 2
+
+
+def test_update_publishes_one_version_with_removals_first():
+    first = device(0)
+    registry = DeviceRegistry([first])
+    replacement = device(0, "Replacement")
+    version = registry.update(add=[replacement, device(1)], remove=[first.dsuid, "unknown"])
+    assert version == registry.version == 1
+    assert registry[first.dsuid] is replacement
+    assert len(registry) == 2
+
+
+def test_update_without_changes_keeps_the_version():
+    registry = DeviceRegistry([device(0)])
+    snapshot = registry.snapshot()
+    assert registry.update(remove=["unknown"]) == 0
+    assert registry.snapshot() is snapshot
+
+
+def test_remove_only_the_expected_device():
+    first = device(0)
+    registry = DeviceRegistry([first])
+    assert registry.remove(first.dsuid, expected=device(0)) is None
+    assert registry.version == 0
+    assert registry.remove(first.dsuid, expected=first) is first
+    assert registry.remove(first.dsuid) is None
+    assert registry.version == 1
+
+
+def test_batch_publishes_on_exit_and_nothing_on_error():
+    registry = DeviceRegistry()
+    with registry.batch() as batch:
+        for index in range(3):
+            batch.add(device(index))
+        assert len(registry) == 0
+    assert len(registry) == 3
+    assert registry.version == 1
+
+    with pytest.raises(RuntimeError):
+        with registry.batch() as batch:
+            batch.remove(device(0).dsuid)
+            raise RuntimeError("discovery failed")
+    assert len(registry) == 3
+    assert registry.version == 1
+
+
+def test_mapping_assignment_checks_the_key():
+    registry = DeviceRegistry()
+    first = device(0)
+    registry[first.dsuid] = first
+    assert registry.get(first.dsuid) is first
+    with pytest.raises(ValueError):
+        registry["other"] = device(1)
+    del registry[first.dsuid]
+    with pytest.raises(KeyError):
+        del registry[first.dsuid]
+
+
+def test_readers_always_see_a_whole_version():
+    # Writers replace pairs of devices in one update; every snapshot holds both or neither
+    registry = DeviceRegistry()
+    pairs = [(device(2 * index), device(2 * index + 1)) for index in range(200)]
+    torn = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            snapshot = registry.snapshot()
+            if len(snapshot) % 2 or len(list(snapshot)) != len(snapshot):
+                torn.append(snapshot.version)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    previous = ()
+    for pair in pairs:
+        registry.update(add=pair, remove=[member.dsuid for member in previous])
+        previous = pair
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert torn == []
+    assert registry.version == len(pairs)
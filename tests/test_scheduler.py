@@ -0,0 +1,77 @@
+"""
+Poll scheduler - batched backend reads, change reporting and polled state
+"""
+
+import threading
+import time
+
+from ds_vdc_api import VdcDevice
+from ds_vdc_api.scheduler import PollBackend, PollScheduler
+
+
+class Bus(PollBackend):
+    def __init__(self, values):
+        self.values = values
+        self.reads = []
+
+    def read(self, keys):
+        self.reads.append(list(keys))
+        return {key: self.values.get(key, 0) for key in keys}
+
+
+class RecordingDevice(VdcDevice):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written = []
+
+    def write_channels(self, changes):
+        self.written.append(dict(changes))
+
+
+def device(index):
+    return RecordingDevice(f"CC{index:030X}C1", f"Device {index}")
+
+
+def poll(scheduler, condition, timeout=5.0):
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "condition not reached"
+            time.sleep(0.02)
+    finally:
+        scheduler.stop()
+
+
+def test_polled_output_value_is_recorded_without_writing_it_back():
+    devices = [device(index) for index in range(3)]
+    bus = Bus({index: 40.0 + index for index in range(3)})
+    changes = []
+    scheduler = PollScheduler(on_change=lambda job, value: changes.append((job.device.dsuid, value)),
+                              batch_window=0.5)
+    for index, member in enumerate(devices):
+        scheduler.add_job(member, 0.2, name="output.value", backend=bus, key=index)
+    poll(scheduler, lambda: len(changes) == 3)
+
+    assert [member.output_value for member in devices] == [40.0, 41.0, 42.0]
+    assert [member.written for member in devices] == [[], [], []]
+    assert not any(member.channels.pending for member in devices)
+    # The first reads are spread over one interval, within a single batch window
+    assert sorted(bus.reads[0]) == [0, 1, 2]
+
+
+def test_polled_output_value_is_clamped_to_the_channel_range():
+    member = device(0)
+    member.update_property("output.value", 250.0)
+    assert member.output_value == 100.0
+    assert member.written == []
+
+
+def test_polled_custom_property_is_stored_on_the_device():
+    member = device(0)
+    done = threading.Event()
+    scheduler = PollScheduler(on_change=lambda job, value: done.set())
+    scheduler.add_job(member, 0.1, name="brightness", read=lambda: 7)
+    poll(scheduler, done.is_set)
+    assert member.get_properties()["brightness"] == 7
+    assert member.written == []
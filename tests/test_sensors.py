@@ -0,0 +1,166 @@
+"""
+Sensor pipeline - deadband, minimum push interval, batching and alive timeouts
+
+Samples and flushes carry explicit times, so the push rules are checked
+without waiting for the flush thread.
+"""
+
+import time
+
+from ds_vdc_api import VdcDevice, VdcHost
+from ds_vdc_api.registry import DeviceRegistry
+from ds_vdc_api.sensors import (ERROR_NO_DATA, ERROR_OK, SENSOR_HUMIDITY, SENSOR_TEMPERATURE, BinaryInputSpec,
+                                SensorPipeline, SensorSpec)
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+
+
+class Climate(VdcDevice):
+    SENSORS = (
+        SensorSpec("temperature", SENSOR_TEMPERATURE, deadband=0.5, min_push_interval=2.0, alive_timeout=5.0),
+        SensorSpec("humidity", SENSOR_HUMIDITY, deadband=1.0, min_push_interval=0.0),
+    )
+    BINARY_INPUTS = (BinaryInputSpec("window"),)
+
+
+class Host:
+    """Records pushes instead of sending them."""
+
+    def __init__(self, *devices):
+        self.devices = DeviceRegistry(devices)
+        self.pushes = []
+
+    def push_property(self, dsuid, properties, coalesce_key=None):
+        self.pushes.append((dsuid, properties))
+
+
+def climate(index=0):
+    return Climate(f"CC{index:030X}C1", f"Climate {index}")
+
+
+def values(push, name="sensorStates"):
+    return {index: state["value"] for index, state in push[1][name].items()}
+
+
+def test_samples_within_the_deadband_are_not_pushed():
+    device = climate()
+    host = Host(device)
+    pipeline = SensorPipeline(host)
+    pipeline.ingest(device, 1, 40.0, now=0.0)
+    assert pipeline.flush(now=0.0) == 1
+    assert values(host.pushes[-1]) == {"1": 40.0}
+
+    pipeline.ingest(device, 1, 40.9, now=1.0)
+    pipeline.ingest(device, 1, 39.2, now=2.0)
+    assert pipeline.flush(now=2.0) == 0
+    # The deadband is measured from the last pushed value, not the last sample
+    pipeline.ingest(device, 1, 41.0, now=3.0)
+    assert pipeline.flush(now=3.0) == 1
+    assert values(host.pushes[-1]) == {"1": 41.0}
+    assert pipeline.stats["samples"] == 4
+    assert pipeline.stats["scheduled"] == 2
+
+
+def test_bursts_are_reduced_to_the_latest_value_per_interval():
+    device = climate()
+    host = Host(device)
+    pipeline = SensorPipeline(host)
+    pipeline.ingest(device, 0, 20.0, now=0.0)
+    pipeline.flush(now=0.0)
+    for step in range(1, 4):
+        pipeline.ingest(device, 0, 20.0 + step, now=step * 0.5)
+        assert pipeline.flush(now=step * 0.5) == 0
+    assert pipeline.flush(now=2.0) == 1
+    assert values(host.pushes[-1]) == {"0": 23.0}
+    assert len(host.pushes) == 2
+
+
+def test_due_inputs_of_a_device_share_one_push():
+    devices = [climate(index) for index in range(2)]
+    host = Host(*devices)
+    pipeline = SensorPipeline(host)
+    pipeline.ingest_many([(devices[0], 0, 21.0), (devices[0], 1, 55.0), (devices[1], 1, 60.0)])
+    pipeline.ingest_binary(devices[0], 0, True)
+    assert pipeline.flush() == 2
+    first, second = host.pushes
+    assert first[0] == devices[0].dsuid
+    assert values(first) == {"0": 21.0, "1": 55.0}
+    assert values(first, "binaryInputStates") == {"0": True}
+    assert values(second) == {"1": 60.0}
+    assert pipeline.stats["values"] == 4
+
+
+def test_binary_inputs_push_every_change():
+    device = climate()
+    host = Host(device)
+    pipeline = SensorPipeline(host)
+    for state in (True, True, False):
+        pipeline.ingest_binary(device, 0, state)
+        pipeline.flush()
+    assert [values(push, "binaryInputStates") for push in host.pushes] == [{"0": True}, {"0": False}]
+
+
+def test_silent_sensors_report_an_error_until_the_next_sample():
+    device = climate()
+    host = Host(device)
+    pipeline = SensorPipeline(host)
+    start = time.monotonic()
+    pipeline.ingest(device, 0, 20.0, now=start)
+    pipeline.flush(now=start)
+
+    assert pipeline.expire(now=start + 4.0) == 0
+    assert pipeline.expire(now=start + 6.0) == 1
+    assert pipeline.flush(now=start + 6.0) == 1
+    assert host.pushes[-1][1]["sensorStates"]["0"] == {"value": None, "error": ERROR_NO_DATA}
+    # Flagged once; the humidity sensor has no alive timeout
+    assert pipeline.expire(now=start + 20.0) == 0
+
+    # The recovered value follows the error report after the minimum interval
+    pipeline.ingest(device, 0, 20.1, now=start + 6.5)
+    assert pipeline.flush(now=start + 6.5) == 0
+    assert pipeline.flush(now=start + 8.0) == 1
+    state = host.pushes[-1][1]["sensorStates"]["0"]
+    assert (state["value"], state["error"]) == (20.1, ERROR_OK)
+
+
+def test_a_sample_replaces_an_error_report_not_yet_pushed():
+    device = climate()
+    host = Host(device)
+    pipeline = SensorPipeline(host)
+    start = time.monotonic()
+    pipeline.ingest(device, 0, 20.0, now=start)
+    pipeline.flush(now=start)
+    assert pipeline.expire(now=start + 6.0) == 1
+    pipeline.ingest(device, 0, 20.0, now=start + 6.1)
+    assert pipeline.flush(now=start + 6.1) == 1
+    state = host.pushes[-1][1]["sensorStates"]["0"]
+    assert (state["value"], state["error"]) == (20.0, ERROR_OK)
+
+
+def test_host_pipeline_pushes_sensor_bursts_to_the_vdsm():
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    device = climate()
+    host.add_device(device)
+    pipeline = host.enable_sensor_pipeline(flush_interval=0.02)
+    host.start(blocking=False)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    try:
+        vdsm.connect()
+        vdsm.wait_announced(1, quiet=0.1, timeout=5)
+        for step in range(100):
+            pipeline.ingest(device, 0, 20.0 + step)
+        deadline = time.monotonic() + 5.0
+        while not vdsm.stats["pushes"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.1)
+        # One push for the burst; the rest waits for the minimum push interval
+        assert vdsm.stats["pushes"] == 1
+        assert device.sensors.values[0] == 119.0
+    finally:
+        vdsm.close()
+        host.stop()
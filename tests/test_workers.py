@@ -0,0 +1,174 @@
+"""
+Worker groups - drivers in a supervised process behind host-side stand-ins
+
+Driver classes are defined at module level, as the worker imports them.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from ds_vdc_api import VdcDevice, VdcHost
+from ds_vdc_api.genericVDC_pb2 import ResultCode
+from ds_vdc_api.property_paths import PropertySetter
+from ds_vdc_api.sensors import SensorSpec
+from ds_vdc_api.simulator import VdsmSimulator
+from ds_vdc_api.transport import MemoryTransport
+
+
+HOST_DSUID = "AA000000000000000000000000000000AA"
+VDC_DSUID = "BB000000000000000000000000000000BB"
+SPECS = [{"dsuid": f"CC{index:030X}C1", "name": f"Device {index}"} for index in range(2)]
+
+
+class ZoneDriver(VdcDevice):
+    PROPERTY_SETTERS = {"zone": PropertySetter(int, attr="zone", minimum=0, maximum=100)}
+    zone = 0
+
+    def commit_properties(self, changes):
+        if changes.get("zone") == 50:
+            time.sleep(1.0)
+
+
+class CrashingDriver(VdcDevice):
+    """identify kills the worker, dim hangs it; scenes publish the zone and a sensor value."""
+
+    SENSORS = (SensorSpec("temperature", 1),)
+    PROPERTY_SETTERS = ZoneDriver.PROPERTY_SETTERS
+    zone = 0
+
+    def commit_properties(self, changes):
+        if changes.get("zone") == 13:
+            raise IOError("backend refused 13")
+
+    def call_scene(self, scene, force=False):
+        self.sensors.values[0] = 20.0 + scene
+        self.set_output_value(float(self.zone))
+
+    def identify(self):
+        os._exit(3)
+
+    def dim_channel(self, mode, channel=0):
+        time.sleep(60.0)
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.02)
+
+
+@contextmanager
+def serve(driver, **options):
+    transport = MemoryTransport()
+    host = VdcHost(HOST_DSUID, VDC_DSUID, transport=transport, ping_interval=None)
+    host.start(blocking=False)
+    group = host.add_worker_group(driver, SPECS, restart_delay=0.1, **options)
+    vdsm = VdsmSimulator(transport=transport, ping_interval=None)
+    try:
+        vdsm.connect()
+        vdsm.wait_announced(len(SPECS), quiet=0.2, timeout=10)
+        yield host, group, vdsm
+    finally:
+        vdsm.close()
+        host.stop()
+
+
+@pytest.fixture
+def session():
+    with serve(ZoneDriver) as running:
+        yield running
+
+
+@pytest.fixture
+def crashing():
+    with serve(CrashingDriver, hang_timeout=1.0) as running:
+        yield running
+
+
+def restarted(group, count):
+    wait_until(lambda: group.metrics["restarts"] >= count and group.alive)
+
+
+def test_slow_set_property_does_not_block_other_requests(session):
+    host, group, vdsm = session
+    slow, other = (spec["dsuid"] for spec in SPECS)
+    codes = []
+    thread = threading.Thread(target=lambda: codes.append(
+        vdsm.set_property(slow, {"zone": 50}).generic_response.code))
+    thread.start()
+    time.sleep(0.2)
+
+    started = time.monotonic()
+    vdsm.get_property(other)
+    assert time.monotonic() - started < 0.5
+    assert not hasattr(host.devices.get(slow), "zone")
+
+    thread.join(10.0)
+    assert codes == [0]
+    assert host.devices.get(slow).zone == 50
+
+
+def test_set_property_timeout_is_answered_as_unavailable(session):
+    host, group, vdsm = session
+    group.property_timeout = 0.3
+    slow = SPECS[0]["dsuid"]
+    response = vdsm.set_property(slow, {"zone": 50})
+    assert response.generic_response.code == ResultCode.ERR_SERVICE_NOT_AVAILABLE
+    assert not hasattr(host.devices.get(slow), "zone")
+    # A timed out request is not replayed after a restart
+    assert group._applied == {}
+
+
+def test_rejected_requests_leave_the_host_copy_unchanged(crashing):
+    host, group, vdsm = crashing
+    target = SPECS[0]["dsuid"]
+    assert vdsm.set_property(target, {"zone": 7}).generic_response.code == ResultCode.ERR_OK
+    # Refused by the driver's backend, then invalid on the host
+    assert vdsm.set_property(target, {"zone": 13}).generic_response.code != ResultCode.ERR_OK
+    assert vdsm.set_property(target, {"zone": 200}).generic_response.code == ResultCode.ERR_INVALID_VALUE_TYPE
+    assert host.devices.get(target).zone == 7
+
+    group.max_pending = 0
+    assert vdsm.set_property(target, {"zone": 9}).generic_response.code != ResultCode.ERR_OK
+    assert host.devices.get(target).zone == 7
+
+
+def test_crashed_worker_is_restarted_with_applied_requests_replayed(crashing):
+    host, group, vdsm = crashing
+    target, other = (spec["dsuid"] for spec in SPECS)
+    assert vdsm.set_property(target, {"zone": 7}).generic_response.code == ResultCode.ERR_OK
+
+    vdsm.identify([target])
+    restarted(group, 1)
+    assert vdsm.connected
+
+    # The restarted driver applies the zone it had before the crash
+    vdsm.call_scene([target], 5)
+    vdsm.call_scene([other], 1)
+    proxy = host.devices.get(target)
+    wait_until(lambda: vdsm.get_property(target) and proxy.output_value == 7.0)
+    assert proxy.sensors.values[0] == 25.0
+    # The device without applied requests restarted from its defaults
+    neighbour = host.devices.get(other)
+    wait_until(lambda: vdsm.get_property(other) and neighbour.sensors.values[0] == 21.0)
+    assert neighbour.output_value == 0.0
+
+
+def test_hung_worker_is_killed_and_restarted(crashing):
+    host, group, vdsm = crashing
+    target = SPECS[0]["dsuid"]
+    vdsm.call_scene([target], 2)
+    wait_until(lambda: vdsm.get_property(target) and host.devices.get(target).sensors.values[0] == 22.0)
+
+    host.devices.get(target).dim_channel(1)
+    restarted(group, 1)
+    # The restarted worker starts from the last published values
+    vdsm.get_property(target)
+    assert host.devices.get(target).sensors.values[0] == 22.0
+    assert group.metrics["alive"]
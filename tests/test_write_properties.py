@@ -0,0 +1,132 @@
+"""
+setProperty transactions - validation, one commit per request and rollback
+"""
+
+import asyncio
+
+import pytest
+
+from ds_vdc_api import VdcDevice
+from ds_vdc_api.async_device import AsyncVdcDevice
+from ds_vdc_api.property_paths import PropertyPathError, PropertySetter
+
+
+DSUID = "CC000000000000000000000000000000C1"
+
+
+class Backend:
+    """Records the hook calls of a device and fails write_channels on request."""
+
+    def __init__(self):
+        self.commits = []
+        self.channels = []
+        self.persisted = []
+        self.fail_channels = False
+
+
+class Driver(VdcDevice):
+    PROPERTY_SETTERS = {"zone": PropertySetter(int, attr="zone", minimum=0, maximum=100)}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.zone = 1
+        self.backend = Backend()
+
+    def commit_properties(self, changes):
+        self.backend.commits.append(dict(changes))
+
+    def write_channels(self, changes):
+        if self.backend.fail_channels:
+            raise IOError("bus down")
+        self.backend.channels.append(dict(changes))
+
+    def persist_properties(self, changes):
+        self.backend.persisted.append(dict(changes))
+
+
+class AsyncDriver(AsyncVdcDevice):
+    PROPERTY_SETTERS = Driver.PROPERTY_SETTERS
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.zone = 1
+        self.backend = Backend()
+
+    async def commit_properties(self, changes):
+        self.backend.commits.append(dict(changes))
+
+    async def write_channels(self, changes):
+        if self.backend.fail_channels:
+            raise IOError("bus down")
+        self.backend.channels.append(dict(changes))
+
+    def persist_properties(self, changes):
+        self.backend.persisted.append(dict(changes))
+
+
+def write(device, properties):
+    result = device.write_properties(properties)
+    if asyncio.iscoroutine(result):
+        return asyncio.run(result)
+    return result
+
+
+@pytest.fixture(params=[Driver, AsyncDriver], ids=["sync", "async"])
+def device(request):
+    return request.param(DSUID, "Kitchen")
+
+
+def state(device):
+    return device.name, device.zone, device.output_value, dict(device.custom_properties)
+
+
+@pytest.mark.parametrize("properties", [
+    {"name": "Hall", "zone": 101},
+    {"name": "Hall", "zone": "7"},
+    {"name": "Hall", "unknown": {"deep": 1}},
+])
+def test_invalid_request_leaves_no_trace(device, properties):
+    before = state(device)
+    with pytest.raises(PropertyPathError):
+        write(device, properties)
+    assert state(device) == before
+    assert device.backend.commits == device.backend.channels == device.backend.persisted == []
+    assert not device.channels.pending
+
+
+def test_request_is_committed_once_with_its_output_value(device):
+    changes = write(device, {"name": "Hall", "zone": 7, "output": {"value": 60.0}})
+    assert changes == {"name": "Hall", "zone": 7, "output.value": 60.0}
+    assert state(device) == ("Hall", 7, 60.0, {})
+    assert device.backend.commits == [changes]
+    assert device.backend.channels == [{0: 60.0}]
+    assert device.backend.persisted == [changes]
+
+
+def test_failed_channel_write_restores_device_and_backend(device):
+    write(device, {"output": {"value": 20.0}})
+    device.backend.fail_channels = True
+    with pytest.raises(IOError):
+        write(device, {"name": "Hall", "zone": 7, "output": {"value": 60.0}})
+    assert state(device) == ("Kitchen", 1, 20.0, {})
+    assert not device.channels.pending
+    # The second commit hands the replaced values back to the backend
+    assert device.backend.commits[-2:] == [
+        {"name": "Hall", "zone": 7, "output.value": 60.0},
+        {"name": "Kitchen", "zone": 1, "output.value": 20.0},
+    ]
+    assert device.backend.persisted == [{"output.value": 20.0}]
+
+
+def test_failed_backend_restore_keeps_the_original_error():
+    class Flaky(Driver):
+        def commit_properties(self, changes):
+            super().commit_properties(changes)
+            if len(self.backend.commits) > 1:
+                raise IOError("backend gone")
+
+    device = Flaky(DSUID, "Kitchen")
+    device.backend.fail_channels = True
+    with pytest.raises(IOError, match="bus down"):
+        device.write_properties({"zone": 7, "output": {"value": 60.0}})
+    assert state(device) == ("Kitchen", 1, 0.0, {})